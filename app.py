@@ -1,18 +1,75 @@
-from flask import Flask
+import hmac
+import os
+
+from flask import Flask, abort, g, jsonify, request
 from backend.routes import routes
-from utils.data_manager import init_files, ensure_likes_field, ensure_follow_fields
+from utils import profiling
+from utils.data_manager import init_files, ensure_notification_inboxes
+from utils.migrations import migrate
+from utils.uploads import MAX_REQUEST_SIZE, SERVE_MODE
 
 app = Flask(__name__)
 app.secret_key = 'votre_cle_secrete'
 app.debug = True
+# Taille maximale d'une requête (les images sont aussi limitées une à une)
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_SIZE
+# Images de /uploads envoyées par le proxy frontal (voir utils.uploads)
+app.config['USE_X_SENDFILE'] = SERVE_MODE == 'x-sendfile'
+# Profilage cProfile (voir utils.profiling) : fraction des requêtes profilées
+# (0 = désactivé) ; avec un jeton, l'en-tête « X-Profile: <jeton> » force le
+# profilage d'une requête et donne accès au rapport /debug/profiles
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('TIGERS_PROFILE_RATE', '0'))
+app.config['PROFILE_TOKEN'] = os.environ.get('TIGERS_PROFILE_TOKEN')
+app.config['PROFILE_DIR'] = profiling.PROFILE_DIR
+app.config['PROFILE_MAX_FILES'] = profiling.MAX_FILES
 # Enregistrement du blueprint
 app.register_blueprint(routes)
 
-# Initialisation des fichiers JSON
+
+def profile_token_sent(header):
+    token = app.config['PROFILE_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get(header, ''), token)
+
+
+@app.before_request
+def start_profile():
+    if profile_token_sent('X-Profile') or profiling.sampled(app.config['PROFILE_SAMPLE_RATE']):
+        g.profiler = profiling.start()
+
+
+@app.teardown_request
+def stop_profile(exc=None):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiling.stop(profiler, request.endpoint or 'none', app.config['PROFILE_DIR'],
+                       app.config['PROFILE_MAX_FILES'])
+
+
+@app.after_request
+def stop_profile_before_stream(response):
+    # Flux (SSE) : le contexte de la requête dure autant que le flux, on s'arrête à la réponse
+    if response.is_streamed:
+        stop_profile()
+    return response
+
+
+@app.route('/debug/profiles')
+def profiles_report():
+    """Fonctions les plus coûteuses des profils enregistrés (?endpoint=, ?limit=, ?sort=)."""
+    if not profile_token_sent('X-Profile-Token'):
+        abort(404)
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in profiling.REPORT_SORTS:
+        return jsonify({"success": False, "message": f"Tri inconnu : {sort}"}), 400
+    limit = min(request.args.get('limit', profiling.REPORT_LIMIT, type=int), 200)
+    report = profiling.report(app.config['PROFILE_DIR'], request.args.get('endpoint'), limit, sort)
+    return jsonify({"success": True, **report})
+
+
+# Initialisation des fichiers JSON, puis migrations en attente (aucune écriture si les données sont à jour)
 init_files()
-ensure_likes_field()
-ensure_follow_fields()
+migrate()
+ensure_notification_inboxes()
 
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5000, debug=True, use_reloader=False)
-
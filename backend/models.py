@@ -1,5 +1,7 @@
 import json
 import os
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
 
 # Chemins vers les fichiers JSON
 USER_JSON_PATH = 'users.json'
@@ -54,8 +56,19 @@ def print_user_tweets(user_id):
             print(f"  Posté le : {tweet['timestamp']}\n")
             
 # gestion page de profil 
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(50), unique=True, nullable=False)
-    bio = db.Column(db.Text, default="")
-    profile_pic = db.Column(db.String(200), default="default.jpg")
+@dataclass
+class User:
+    """Utilisateur tel que stocké dans la table `users` (voir utils/sqlite_backend.py)."""
+    id: int
+    username: str
+    email: str = ""
+    password: str = ""
+    bio: str = ""
+    profile_pic_url: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{f.name: data.get(f.name) for f in fields(cls) if f.name in data})
+
+    def to_dict(self):
+        return asdict(self)
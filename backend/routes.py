@@ -1,14 +1,19 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, send_from_directory
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from utils.data_manager import read_users, write_users, read_tweets, write_tweets, init_files, ensure_likes_field, ensure_follow_fields, ensure_comments_field, ensure_retweets_field, add_notification, read_notifications,write_notifications
+from flask import Blueprint, Response, stream_with_context, render_template, make_response, request, redirect, url_for, flash, session, jsonify, send_from_directory, abort, current_app, before_render_template, template_rendered
+from werkzeug.security import safe_join
+from utils import assets, events, metrics, passwords, timelines, tweet_search, uploads, versions
+from utils.user_search import username_index
+from utils.pagination import page_params, paginate, merged_fetcher, encode_cursor
+from utils.data_manager import get_user, get_users, hydrate_users, get_user_by_username, get_user_by_email, get_tweet, get_tweets, next_tweet_id, interaction_counts, tweets_page, count_tweets, retweets_page, count_retweets, liked_tweet_ids, retweeted_tweet_ids, liked_comment, tweet_sort_key, EPOCH, apply_tweet_op, tweets_transaction, users_lock, tweets_lock, next_user_id, add_user, update_user, rename_user_tweets, follow_user, unfollow_user, add_notification, notifications_page, notification_sort_key, unread_count, mark_notifications_seen
 from datetime import datetime
+from functools import partial
+import hmac
+import mimetypes
 import os
 
 routes = Blueprint('routes', __name__)
 
-UPLOAD_FOLDER = os.path.join(os.getcwd(), "backend", "uploads", "profile_pics")
-TWEET_UPLOAD_FOLDER = os.path.join(os.getcwd(), "backend", "uploads", "tweet_images")
+UPLOAD_FOLDER = os.path.join(uploads.UPLOAD_ROOT, uploads.PROFILE_PICS)
+TWEET_UPLOAD_FOLDER = os.path.join(uploads.UPLOAD_ROOT, uploads.TWEET_IMAGES)
 os.makedirs(TWEET_UPLOAD_FOLDER, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
@@ -17,12 +22,81 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Initialisation des fichiers
-init_files()
-ensure_likes_field()
-ensure_follow_fields()
-ensure_comments_field()
-ensure_retweets_field()
+# Données d'auteur affichées avec chaque tweet (voir hydrate_users)
+AUTHOR_FIELDS = {'username': 'username', 'profile_pic_url': 'profile_pic_url'}
+
+# Champs des tweets de /api/feed, sélectionnables avec ?fields= (l'id est toujours donné)
+TWEET_API_FIELDS = {
+    'author': lambda post: post['user_id'],
+    'content': lambda post: post.get('content', ''),
+    'image_urls': lambda post: post.get('image_urls') or [],
+    'created_at': lambda post: post.get('created_at'),
+    'counts': lambda post: {'likes': len(post.get('likes', [])), 'retweets': len(post.get('retweets', [])),
+                            'comments': len(post.get('comments', []))},
+    'liked': lambda post: post['liked'],
+    'retweeted': lambda post: post['retweeted'],
+}
+
+def upload_too_large_message():
+    return f"Image trop volumineuse ({uploads.MAX_UPLOAD_SIZE // (1024 * 1024)} Mo maximum)."
+
+def author_defaults():
+    return {'username': "Utilisateur", 'profile_pic_url': url_for('static', filename='default-avatar.png')}
+
+def conditional_json(etag, build):
+    """
+    Réponse JSON revalidable : si le client envoie déjà `etag` (If-None-Match),
+    304 sans appeler build() ; sinon la réponse de build(), marquée de l'ETag
+    si elle a réussi. `etag` vient de utils.versions et doit être calculé
+    avant build() (une écriture concurrente donne au pire un ETag périmé).
+    L'ETag est faible : le corps peut être compressé ou non (compress_response).
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+# ------------------- MÉTRIQUES -------------------
+# Requêtes plus longues que ce seuil journalisées avec le détail par phase
+SLOW_REQUEST_MS = int(os.environ.get('TIGERS_SLOW_REQUEST_MS', '500'))
+# Si défini, /metrics exige l'en-tête « Authorization: Bearer <jeton> »
+METRICS_TOKEN = os.environ.get('TIGERS_METRICS_TOKEN')
+
+@routes.before_app_request
+def start_request_metrics():
+    metrics.start_request()
+
+# Enregistré avant compress_response : les after_request s'exécutent en ordre
+# inverse, la compression est donc comprise dans la durée mesurée
+@routes.after_app_request
+def record_request_metrics(response):
+    duration, phases, io = metrics.end_request(request.endpoint or 'none', request.method, response.status_code)
+    if duration * 1000 >= SLOW_REQUEST_MS:
+        current_app.logger.warning("Requête lente %s %s : %s", request.method, request.full_path.rstrip('?'),
+                                   metrics.describe(duration, phases, io))
+    return response
+
+@before_render_template.connect
+def start_render_phase(sender, **extra):
+    metrics.begin_phase('render')
+
+@template_rendered.connect
+def end_render_phase(sender, **extra):
+    metrics.end_phase('render')
+
+@routes.route('/metrics')
+def metrics_page():
+    """Métriques du processus au format texte de Prometheus (voir utils.metrics)."""
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''),
+                                                 f"Bearer {METRICS_TOKEN}"):
+        abort(403)
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # ------------------- ACCUEIL -------------------
 @routes.route('/')
@@ -30,6 +104,20 @@ def home():
     return redirect(url_for('routes.login'))
 
 # ------------------- INSCRIPTION -------------------
+def hashing_busy(template):
+    """Réponse quand le pool de hachage est saturé (voir utils.passwords) : à réessayer."""
+    flash("Serveur occupé, réessayez dans un instant.", "error")
+    response = make_response(render_template(template), 503)
+    response.headers['Retry-After'] = '1'
+    return response
+
+def signup_conflict(email, username):
+    if get_user_by_email(email):
+        return "Cet email est déjà utilisé."
+    if get_user_by_username(username, ignore_case=True):
+        return "Ce nom d'utilisateur est déjà pris."
+    return None
+
 @routes.route('/signup', methods=['GET', 'POST'])
 def signup():
     if request.method == 'POST':
@@ -45,27 +133,35 @@ def signup():
             flash("Le mot de passe doit contenir au moins 6 caractères.", "error")
             return redirect(url_for('routes.signup'))
 
-        users = read_users()
-        if any(u['email'] == email for u in users):
-            flash("Cet email est déjà utilisé.", "error")
-            return redirect(url_for('routes.signup'))
-        if any(u['username'].lower() == username.lower() for u in users):
-            flash("Ce nom d'utilisateur est déjà pris.", "error")
+        # Vérifié avant le hachage (rien à hacher pour un doublon), puis à nouveau sous le verrou
+        conflict = signup_conflict(email, username)
+        if conflict:
+            flash(conflict, "error")
             return redirect(url_for('routes.signup'))
-
-        hashed_password = generate_password_hash(password)
-        new_user = {
-            'id': len(users) + 1,
-            'username': username,
-            'email': email,
-            'password': hashed_password,
-            'following': [],
-            'followers': [],
-            'profile_pic_url': None,
-            'bio': ''
-        }
-        users.append(new_user)
-        write_users(users)
+        try:
+            hashed_password = passwords.hash_password(password)
+        except passwords.HashingBusy:
+            return hashing_busy('signup.html')
+
+        with users_lock(), username_index.updating():
+            conflict = signup_conflict(email, username)
+            if conflict:
+                flash(conflict, "error")
+                return redirect(url_for('routes.signup'))
+
+            new_user = {
+                'id': next_user_id(),
+                'username': username,
+                'email': email,
+                'password': hashed_password,
+                'following': [],
+                'followers': [],
+                'profile_pic_url': None,
+                'bio': ''
+            }
+            add_user(new_user)
+            username_index.add(new_user)
+            versions.bump('users')
         flash("Inscription réussie ! Vous pouvez maintenant vous connecter.", "success")
         return redirect(url_for('routes.login'))
 
@@ -78,10 +174,16 @@ def login():
         email = request.form.get('email', '').strip()
         password = request.form.get('password', '').strip()
 
-        users = read_users()
-        user = next((u for u in users if u['email'] == email), None)
+        user = get_user_by_email(email)
+        try:
+            valid, new_hash = passwords.verify_password(user['password'], password) if user else (False, None)
+        except passwords.HashingBusy:
+            return hashing_busy('login.html')
 
-        if user and check_password_hash(user['password'], password):
+        if valid:
+            if new_hash:
+                # Paramètres de hachage changés depuis l'inscription : re-haché de façon transparente
+                update_user(user['id'], {'password': new_hash})
             session['user_id'] = user['id']
             session['username'] = user['username']
             flash("Connexion réussie !", "success")
@@ -101,8 +203,9 @@ def search():
     query = request.args.get("q", "").strip()
     
     if query:
-        users = read_users()
-        matched_user = next((u for u in users if query.lower() in u['username'].lower()), None)
+        # Meilleure correspondance de l'index (exacte, préfixe, sous-chaîne puis approchée)
+        best = username_index.search(query, limit=1)
+        matched_user = get_user(best[0]) if best else None
         
         if matched_user:
             # Redirect directly to profile instead of search page
@@ -121,61 +224,121 @@ def search_live():
     if not query:
         return jsonify([])
     
-    users = read_users()
     # Exclude current user from results
     current_user_id = session['user_id']
-    
-    matched = []
-    for user in users:
-        if user['id'] != current_user_id and query in user['username'].lower():
-            matched.append({
-                'id': user['id'],
-                'username': user['username'],
-                'profile_pic_url': user.get('profile_pic_url')
-            })
-    
-    return jsonify(matched[:10])  # Limit to 10 results
+
+    def build():
+        matched_ids = username_index.search(query, limit=10, exclude_id=current_user_id)
+        users = get_users(matched_ids)
+        return jsonify([{
+            'id': users[uid]['id'],
+            'username': users[uid]['username'],
+            'profile_pic_url': users[uid].get('profile_pic_url')
+        } for uid in matched_ids if uid in users])  # Limited to 10 results
+
+    # Les résultats dépendent des noms, photos et nombres d'abonnés de tous les utilisateurs
+    return conditional_json(f"{current_user_id}-{versions.etag('users')}", build)
+
+@routes.route('/search/tweets')
+def search_tweets():
+    """Recherche plein texte dans les tweets et leurs commentaires (JSON paginé)."""
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Non connecté"}), 401
+
+    current_user_id = session['user_id']
+    query = request.args.get('q', '').strip()
+    sort = 'recent' if request.args.get('sort') == 'recent' else 'relevance'
+    before, after, limit = page_params(request.args)
+
+    page = tweet_search.search_page(query, before, after, limit, sort=sort)
+    found = get_tweets([tweet_id for _, tweet_id in page.items])
+    liked = liked_tweet_ids(current_user_id, found)
+    tweets = [dict(found[tweet_id], liked=tweet_id in liked) for _, tweet_id in page.items if tweet_id in found]
+    hydrate_users(tweets, AUTHOR_FIELDS, defaults=author_defaults())
+
+    return jsonify({
+        "success": True,
+        "tweets": tweets,
+        "next_url": url_for('routes.search_tweets', q=query, sort=sort, before=page.older,
+                            limit=request.args.get('limit')) if page.older else None,
+        "newer_url": url_for('routes.search_tweets', q=query, sort=sort, after=page.newer,
+                             limit=request.args.get('limit')) if page.newer else None
+    })
 
 # ------------------- FEED -------------------
+def feed_page(current_user, view, before, after, limit):
+    """
+    Page du fil `view` ('followed' ou autre : recommandés) de current_user :
+    (Page, copies des tweets avec liked/retweeted, curseur du tweet le plus
+    récent de la page, à passer en ?after= pour n'avoir que les nouveaux).
+    """
+    current_user_id = current_user['id']
+    if view == 'followed':
+        # Timeline pré-calculée : tweets et retweets des abonnements, déjà triés
+        # (au-delà de TIMELINE_MAX_LENGTH entrées, lus dans les tweets des abonnements)
+        page = timelines.home_timeline_page(current_user_id, before, after, limit,
+                                            following=current_user.get('following', []))
+        # Tweets de la page résolus en une seule recherche
+        found = get_tweets([entry[1] for entry in page.items])
+        posts = [found[entry[1]] for entry in page.items if entry[1] in found]
+        key = timelines.entry_key
+    else:
+        # Tweets des comptes non suivis, via l'index trié par date
+        excluded = set(current_user.get('following', [])) | {current_user_id}
+        page = paginate(partial(tweets_page, exclude_user_ids=excluded), tweet_sort_key, before, after, limit)
+        posts = page.items
+        key = tweet_sort_key
+
+    # Add liked/retweeted fields (copies: the tweets returned by the store are shared)
+    page_ids = [post['id'] for post in posts]
+    liked, retweeted = liked_tweet_ids(current_user_id, page_ids), retweeted_tweet_ids(current_user_id, page_ids)
+    posts = [dict(post, likes=post.get('likes', []), liked=post['id'] in liked, retweeted=post['id'] in retweeted)
+             for post in posts]
+    latest = encode_cursor(key(page.items[0])) if page.items else (encode_cursor(after) if after else None)
+    return page, posts, latest
+
 @routes.route('/feed', methods=['GET', 'POST'])
 def feed():
     if 'user_id' not in session:
         return redirect(url_for('routes.login'))
 
-    tweets = read_tweets()
-    users = read_users()
     current_user_id = session['user_id']
-    current_user = next((u for u in users if u['id'] == current_user_id), None)
+    current_user = get_user(current_user_id)
 
     # POST d'un nouveau tweet
     if request.method == 'POST':
         content = request.form.get('content', '').strip()
-        images = request.files.getlist('images')
-
-        image_urls = []
+        images = [img for img in request.files.getlist('images') if img and allowed_file(img.filename)]
 
-        # Handle multiple image uploads
-        for img in images:
-            if img and allowed_file(img.filename):
-                filename = secure_filename(f"{current_user_id}_{datetime.now().timestamp()}_{img.filename}")
-                img.save(os.path.join(TWEET_UPLOAD_FOLDER, filename))
-                image_urls.append(f"/uploads/tweet_images/{filename}")
+        # Images écrites en parallèle, nommées par leur contenu (voir utils.uploads)
+        try:
+            pending = uploads.ingest(images, uploads.TWEET_IMAGES)
+        except uploads.UploadTooLarge:
+            flash(upload_too_large_message(), "error")
+            return redirect(url_for('routes.feed'))
 
         # Require at least text or images
-        if content or image_urls:
-            new_tweet = {
-                'id': len(tweets) + 1,
-                'user_id': current_user_id,
-                'username': session['username'],
-                'content': content,
-                'image_urls': image_urls,
-                'likes': [],
-                'created_at': datetime.utcnow().isoformat() + 'Z',  # ← FIXED
-                'comments': [],  # ← ADD THIS
-                'retweets': []   # ← ADD THIS
-            }
-            tweets.append(new_tweet)
-            write_tweets(tweets)
+        if content or pending:
+            with tweets_lock():
+                tweet_id = next_tweet_id()
+                names = uploads.attach(pending, uploads.TWEET_IMAGES, f"tweet:{tweet_id}")
+                image_urls = [f"/uploads/tweet_images/{name}" for name in names]
+                new_tweet = {
+                    'id': tweet_id,
+                    'user_id': current_user_id,
+                    'username': session['username'],
+                    'content': content,
+                    'image_urls': image_urls,
+                    'likes': [],
+                    'created_at': datetime.utcnow().isoformat() + 'Z',  # ← FIXED
+                    'comments': [],  # ← ADD THIS
+                    'retweets': []   # ← ADD THIS
+                }
+                apply_tweet_op({"op": "add_tweet", "tweet": new_tweet})
+                timelines.push_tweet(new_tweet, current_user.get('followers', []))
+                tweet_search.index_tweet(new_tweet)
+                events.publish(events.author_channel(current_user_id), 'tweet', {
+                    'tweet_id': new_tweet['id'], 'user_id': current_user_id, 'username': session['username']})
 
             flash("Votre tweet a été publié !", "success")
             return redirect(url_for('routes.feed'))
@@ -183,35 +346,79 @@ def feed():
         flash("Votre tweet doit contenir un texte ou une image.", "error")
         return redirect(url_for('routes.feed'))
 
-    # First, ensure all tweets have created_at
-    for tweet in tweets:
-        if 'created_at' not in tweet:
-            tweet['created_at'] = '1970-01-01T00:00:00Z'  # Very old date
-    
-     # Now sort ALL tweets by date
-    tweets.sort(key=lambda t: t.get('created_at', '1970-01-01T00:00:00Z'), reverse=True)
-
-    # Add liked field
-    for post in tweets:
-        post.setdefault('likes', [])
-        post['liked'] = current_user_id in post['likes']
-   
-    # Filter tweets
-    followed_ids = current_user.get('following', [])
-    followed_tweets = [t for t in tweets if t['user_id'] in followed_ids or t['user_id'] == current_user_id]
-    recommended_tweets = [t for t in tweets if t['user_id'] not in followed_ids and t['user_id'] != current_user_id]
     view = request.args.get('view', 'followed')
+    before, after, limit = page_params(request.args)
+    page, posts, latest = feed_page(current_user, view, before, after, limit)
+    # Auteurs de la page résolus en une seule recherche
+    hydrate_users(posts, AUTHOR_FIELDS, defaults=author_defaults())
 
-    return render_template(
-        'feed.html',
+    context = dict(
         username=session['username'],
         view=view,
-        followed_tweets=followed_tweets,
-        recommended_tweets=recommended_tweets,
-        users=users,
-        current_user=current_user
+        posts=posts,
+        next_url=url_for('routes.feed', view=view, before=page.older,
+                         limit=request.args.get('limit')) if page.older else None,
+        newer_url=url_for('routes.feed', view=view, after=page.newer,
+                          limit=request.args.get('limit')) if page.newer else None,
+        # Tweets publiés depuis l'affichage, rendus côté client (voir /api/feed)
+        latest_url=url_for('routes.api_feed', view=view, after=latest) if latest else None,
+        current_user=current_user,
+        unread_notifications=unread_count(current_user_id)
     )
+    # Page suivante demandée par le défilement infini : seulement les tweets
+    if request.args.get('partial'):
+        return render_template('_feed_posts.html', **context)
+    return render_template('feed.html', **context)
+
+
+@routes.route('/api/feed')
+def api_feed():
+    """
+    Fil en JSON pour le rendu côté client : même pagination que /feed
+    (?view=followed|recommended, before / after / limit), tweets compacts
+    et auteurs donnés une fois dans "authors". ?fields=content,counts
+    restreint les champs (voir TWEET_API_FIELDS). "newer_url" donne
+    toujours les tweets plus récents que la page, même s'il n'y en a pas
+    encore : c'est l'URL à rappeler pour n'obtenir que les nouveautés.
+    """
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Non connecté"}), 401
+
+    current_user = get_user(session['user_id'])
+    if not current_user:
+        return jsonify({"success": False, "message": "Utilisateur introuvable"}), 404
 
+    fields = request.args.get('fields')
+    fields = [f for f in fields.split(',') if f] if fields else list(TWEET_API_FIELDS)
+    unknown = [f for f in fields if f not in TWEET_API_FIELDS and f != 'id']
+    if unknown:
+        return jsonify({"success": False, "message": f"Champs inconnus : {', '.join(unknown)}"}), 400
+
+    view = 'recommended' if request.args.get('view') == 'recommended' else 'followed'
+    before, after, limit = page_params(request.args)
+    page, posts, latest = feed_page(current_user, view, before, after, limit)
+
+    tweets = [dict({'id': post['id']}, **{f: TWEET_API_FIELDS[f](post) for f in fields if f != 'id'})
+              for post in posts]
+    authors = {}
+    if 'author' in fields:
+        defaults = author_defaults()
+        found = get_users({post['user_id'] for post in posts})
+        authors = {user_id: {f: user.get(f) or defaults[f] for f in AUTHOR_FIELDS}
+                   for user_id, user in found.items()}
+
+    limit_arg = request.args.get('limit')
+    fields_arg = request.args.get('fields')
+    return jsonify({
+        "success": True,
+        "view": view,
+        "tweets": tweets,
+        "authors": authors,
+        "next_url": url_for('routes.api_feed', view=view, before=page.older, limit=limit_arg,
+                            fields=fields_arg) if page.older else None,
+        "newer_url": url_for('routes.api_feed', view=view, after=page.newer or latest, limit=limit_arg,
+                             fields=fields_arg) if page.newer or latest else None
+    })
 
 # ------------------- LOGOUT -------------------
 @routes.route('/logout')
@@ -221,29 +428,32 @@ def logout():
     return redirect(url_for('routes.login'))
 
 # ------------------- LIKE -------------------
+# Les bascules like / retweet / like de commentaire sont partagées par leur
+# route et par /api/batch : à appeler sous tweets_lock, elles retournent
+# (réponse JSON, code HTTP).
+
+def toggle_like(user_id, tweet_id):
+    tweet = get_tweet(tweet_id)
+    if not tweet:
+        return {"success": False, "message": "Tweet non trouvé"}, 404
+    if liked_tweet_ids(user_id, [tweet_id]):
+        tweet = apply_tweet_op({"op": "unlike", "tweet_id": tweet_id, "user_id": user_id})
+        liked = False
+    else:
+        tweet = apply_tweet_op({"op": "like", "tweet_id": tweet_id, "user_id": user_id})
+        liked = True
+        # ✅ Ajouter notif si ce n'est pas son propre tweet
+        add_notification(tweet['user_id'], user_id, "like", tweet_id)
+    return {"success": True, "liked": liked, "like_count": len(tweet['likes'])}, 200
+
 @routes.route('/like/<int:tweet_id>', methods=['POST'])
 def like_tweet(tweet_id):
     if 'user_id' not in session:
         return jsonify({"success": False, "message": "Non connecté"}), 401
 
-    tweets = read_tweets()
-    user_id = session['user_id']
-
-    for tweet in tweets:
-        if tweet['id'] == tweet_id:
-            tweet.setdefault('likes', [])
-            if user_id in tweet['likes']:
-                tweet['likes'].remove(user_id)
-                liked = False
-            else:
-                tweet['likes'].append(user_id)
-                liked = True
-                # ✅ Ajouter notif si ce n'est pas son propre tweet
-                add_notification(tweet['user_id'], user_id, "like", tweet_id)
-            write_tweets(tweets)
-            return jsonify({"success": True, "liked": liked, "like_count": len(tweet['likes'])})
-    
-    return jsonify({"success": False, "message": "Tweet non trouvé"}), 404
+    with tweets_lock():
+        result, status = toggle_like(session['user_id'], tweet_id)
+    return jsonify(result), status
 
 # ------------------- TOGGLE FOLLOW -------------------
 @routes.route('/toggle_follow/<username>', methods=['POST'])
@@ -251,31 +461,32 @@ def toggle_follow(username):
     if 'user_id' not in session:
         return jsonify({'error': 'Non connecté'}), 401
 
-    users = read_users()
     current_user_id = session['user_id']
-    current_user = next((u for u in users if u['id'] == current_user_id), None)
-    target_user = next((u for u in users if u['username'] == username), None)
-
-    if not current_user or not target_user:
-        return jsonify({'error': 'Utilisateur introuvable'}), 404
-
-    current_user.setdefault('following', [])
-    target_user.setdefault('followers', [])
-
-    if target_user['id'] in current_user['following']:
-        current_user['following'].remove(target_user['id'])
-        if current_user['id'] in target_user['followers']:
-            target_user['followers'].remove(current_user['id'])
-        is_following = False
-    else:
-        current_user['following'].append(target_user['id'])
-        if current_user['id'] not in target_user['followers']:
-            target_user['followers'].append(current_user['id'])
-        is_following = True
-        # ✅ Ajouter notification de follow
-        add_notification(target_user['id'], current_user_id, "follow", None, None)
-
-    write_users(users)
+    with users_lock(), username_index.updating():
+        current_user = get_user(current_user_id)
+        target_user = get_user_by_username(username)
+
+        if not current_user or not target_user:
+            return jsonify({'error': 'Utilisateur introuvable'}), 404
+
+        if target_user['id'] in current_user.get('following', []):
+            if not unfollow_user(current_user_id, target_user['id']):
+                return jsonify({'error': 'Utilisateur introuvable'}), 404
+            timelines.unfollow(current_user_id, target_user['id'])
+            is_following = False
+        else:
+            if not follow_user(current_user_id, target_user['id']):
+                return jsonify({'error': 'Utilisateur introuvable'}), 404
+            timelines.follow(current_user_id, target_user['id'])
+            is_following = True
+            # ✅ Ajouter notification de follow
+            add_notification(target_user['id'], current_user_id, "follow", None, None)
+        # Le nombre d'abonnés départage les résultats de recherche
+        username_index.set_followers(target_user['id'], len(get_user(target_user['id'])['followers']))
+        versions.bump(f"user:{current_user_id}", 'users')
+
+    current_user = get_user(current_user_id)
+    target_user = get_user(target_user['id'])
     return jsonify({
         'is_following': is_following,
         'followers_count': len(target_user['followers']),
@@ -287,97 +498,72 @@ def profile(username):
     if 'user_id' not in session:
         return redirect(url_for('routes.login'))
 
-    users = read_users()
-    tweets = read_tweets()
-
-    profile_user = next((u for u in users if u['username'] == username), None)
+    profile_user = get_user_by_username(username)
     if not profile_user:
         flash("Utilisateur introuvable.", "error")
         return redirect(url_for('routes.feed'))
 
-    current_user = next((u for u in users if u['id'] == session.get('user_id')), None)
+    current_user = get_user(session.get('user_id'))
     is_current_user = current_user['id'] == profile_user['id']
     is_following = profile_user['id'] in current_user.get('following', []) if current_user else False
 
-    # ----------- Tweets normaux de l'utilisateur -----------
-    user_tweets = [t for t in tweets if t['user_id'] == profile_user['id']]
+    # ----------- Tweets normaux de l'utilisateur (index trié par auteur) -----------
+    user_tweets = partial(tweets_page, user_id=profile_user['id'])
 
-    # ----------- Retweets faits par l'utilisateur -----------
-    retweeted_tweets = []
-    for tweet in tweets:
-        retweets_list = tweet.get('retweets', [])
-    
-        # Check if this user has retweeted this tweet (supporting both old and new format)
-        has_retweeted = False
-        retweet_timestamp = None
-        
-        for retweet in retweets_list:
-            if isinstance(retweet, dict):
-                # New format: {"user_id": X, "retweeted_at": "timestamp"}
-                if retweet.get('user_id') == profile_user['id']:
-                    has_retweeted = True
-                    retweet_timestamp = retweet.get('retweeted_at')
-                    break
-            elif isinstance(retweet, int):
-                # Old format: just user_id
-                if retweet == profile_user['id']:
-                    has_retweeted = True
-                    # For old retweets, use the tweet's created_at as fallback
-                    retweet_timestamp = tweet.get('created_at')
-                    break
-        
-        if has_retweeted:
-            rt_copy = tweet.copy()
-            rt_copy['is_retweet'] = True
-            rt_copy['retweeted_by'] = profile_user['username']
-            rt_copy['retweeted_at'] = retweet_timestamp  # Store the retweet timestamp
-            retweeted_tweets.append(rt_copy)
-
-
-    # Fusion tweets + retweets
-    all_tweets = user_tweets + retweeted_tweets
-
-    # Tri par date (les retweets apparaissent aussi)
-    # Sort by retweet timestamp if it's a retweet, else by created_at
-    def get_sort_time(tweet):
-        if tweet.get('is_retweet') and tweet.get('retweeted_at'):
-            return tweet['retweeted_at']
-        return tweet.get('created_at', '')
+    # ----------- Retweets faits par l'utilisateur (index inverse des retweets) -----------
+    user_retweets = partial(retweets_page, profile_user['id'])
 
+    # Tri par date : date du retweet pour un retweet, sinon date de publication
     def get_sort_time(tweet):
         if tweet.get('is_retweet') and tweet.get('retweeted_at'):
             ts = tweet['retweeted_at']
         else:
             ts = tweet.get('created_at', '')
-        
-        if not ts:
-            return '1970-01-01T00:00:00Z'
-        return ts
-    
-    all_tweets.sort(key=get_sort_time, reverse=True)
+        return (ts or EPOCH, tweet['id'])
+
+    # Fusion des deux sources triées, une page à la fois
+    before, after, limit = page_params(request.args)
+    page = paginate(merged_fetcher([user_tweets, user_retweets], get_sort_time), get_sort_time, before, after, limit)
+    # Copies : les tweets de l'index sont partagés
+    all_tweets = [post if post.get('is_retweet') else post.copy() for post in page.items]
 
     # Ajout des infos manquantes
+    page_ids = [post['id'] for post in all_tweets]
+    liked = liked_tweet_ids(session['user_id'], page_ids)
+    retweeted = retweeted_tweet_ids(session['user_id'], page_ids)
     for post in all_tweets:
+        if post.get('is_retweet'):
+            post['retweeted_by'] = profile_user['username']
         post.setdefault('likes', [])
-        post['liked'] = session['user_id'] in post['likes']
+        post['liked'] = post['id'] in liked
+        post['retweeted'] = post['id'] in retweeted
 
-        # Récupération de l'auteur réel du tweet
-        tweet_user = next((u for u in users if u['id'] == post['user_id']), None)
-        if tweet_user:
-            post['username'] = tweet_user['username']
-            post['profile_pic_url'] = tweet_user.get('profile_pic_url') or url_for('static', filename='default-avatar.png')
-        else:
-            post['username'] = "Utilisateur"
-            post['profile_pic_url'] = url_for('static', filename='default-avatar.png')
+    # Récupération des auteurs réels des tweets, en une seule recherche
+    hydrate_users(all_tweets, AUTHOR_FIELDS, defaults=author_defaults())
+
+    next_url = url_for('routes.profile', username=username, before=page.older,
+                       limit=request.args.get('limit')) if page.older else None
+    newer_url = url_for('routes.profile', username=username, after=page.newer,
+                        limit=request.args.get('limit')) if page.newer else None
+
+    # Page suivante demandée par le défilement infini : seulement les tweets
+    if request.args.get('partial'):
+        return render_template('_profile_posts.html', user_tweets=all_tweets, next_url=next_url)
 
-    followers_list = [u for u in users if u['id'] in profile_user.get('followers', [])]
-    following_list = [u for u in users if u['id'] in profile_user.get('following', [])]
+    # Abonnés et abonnements résolus en une seule recherche
+    people = get_users(profile_user.get('followers', []) + profile_user.get('following', []))
+    followers_list = [people[uid] for uid in profile_user.get('followers', []) if uid in people]
+    following_list = [people[uid] for uid in profile_user.get('following', []) if uid in people]
 
     return render_template(
         'profile.html',
         profile_user=profile_user,
         user_tweets=all_tweets,
+        tweet_count=count_tweets(profile_user['id']) + count_retweets(profile_user['id']),
+        next_url=next_url,
+        newer_url=newer_url,
         is_current_user=is_current_user,
+        unread_notifications=unread_count(session['user_id']),
         is_following=is_following,
         followers_list=followers_list,
         following_list=following_list
@@ -393,10 +579,8 @@ def edit_profile():
         flash("Vous devez être connecté pour modifier un profil.", "error")
         return redirect(url_for('routes.login'))
 
-    users = read_users()
-    tweets = read_tweets()
     current_user_id = session['user_id']
-    user = next((u for u in users if u['id'] == current_user_id), None)
+    user = get_user(current_user_id)
 
     if not user:
         flash("Utilisateur introuvable.", "error")
@@ -405,49 +589,149 @@ def edit_profile():
     new_username = request.form.get('username', '').strip()
     new_bio = request.form.get('bio', '').strip()
 
-    if new_username != user['username'] and any(u['username'].lower() == new_username.lower() for u in users):
-        flash("Ce nom d'utilisateur est déjà pris.", "error")
+    file = request.files.get('profile_pic')
+    try:
+        pending = uploads.ingest([file], uploads.PROFILE_PICS) if file and allowed_file(file.filename) else []
+    except uploads.UploadTooLarge:
+        flash(upload_too_large_message(), "error")
         return redirect(url_for('routes.profile', username=user['username']))
 
-    if 'profile_pic' in request.files:
-        file = request.files['profile_pic']
-        if file and allowed_file(file.filename):
-            filename = secure_filename(f"{current_user_id}_{file.filename}")
-            file.save(os.path.join(UPLOAD_FOLDER, filename))
-            user['profile_pic_url'] = url_for('routes.uploaded_file', filename=filename)
-
-    if new_username != user['username']:
-        for t in tweets:
-            if t['user_id'] == current_user_id:
-                t['username'] = new_username
-        write_tweets(tweets)
-
-    user['username'] = new_username
-    user['bio'] = new_bio
-    write_users(users)
+    with users_lock(), username_index.updating():
+        if new_username != user['username'] and get_user_by_username(new_username, ignore_case=True):
+            uploads.discard(pending)
+            flash("Ce nom d'utilisateur est déjà pris.", "error")
+            return redirect(url_for('routes.profile', username=user['username']))
+
+        if pending:
+            referrer = f"user:{current_user_id}"
+            filename, = uploads.attach(pending, uploads.PROFILE_PICS, referrer)
+            old_path = uploads.url_path(get_user(current_user_id).get('profile_pic_url'), uploads.PROFILE_PICS)
+            update_user(current_user_id, {'profile_pic_url': url_for('routes.uploaded_file', filename=filename)})
+            # L'ancienne photo est supprimée si plus personne ne l'utilise
+            if old_path and old_path != f"{uploads.PROFILE_PICS}/{filename}":
+                uploads.release(old_path, referrer)
+
+        if new_username != user['username']:
+            rename_user_tweets(current_user_id, new_username)
+
+        update_user(current_user_id, {'username': new_username, 'bio': new_bio})
+        username_index.rename(current_user_id, new_username)
+        # Nom et photo apparaissent dans les commentaires et la recherche
+        versions.bump(f"user:{current_user_id}", 'profiles', 'users')
     session['username'] = new_username
 
     flash("Votre profil a été mis à jour !", "success")
     return redirect(url_for('routes.profile', username=new_username))
 
 # ------------------- UPLOADS -------------------
+def send_upload(kind, filename):
+    """
+    Sert une image envoyée. Nom de contenu : ETag = empreinte et cache
+    immutable d'un an ; anciens noms : revalidation à chaque fois (ETag de
+    mtime/taille). 304 et requêtes Range sont gérés ; en mode x-sendfile ou
+    x-accel (utils.uploads.SERVE_MODE) le proxy envoie lui-même les octets.
+    """
+    folder = os.path.join(uploads.UPLOAD_ROOT, kind)
+    etag = uploads.content_etag(filename)
+    max_age = uploads.IMMUTABLE_MAX_AGE if etag else None
+
+    if uploads.SERVE_MODE == 'x-accel':
+        path = safe_join(folder, filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        st = os.stat(path)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = f"{uploads.X_ACCEL_PREFIX}{kind}/{filename}"
+        response.set_etag(etag or f"{st.st_mtime}-{st.st_size}")
+        response.last_modified = st.st_mtime
+        if max_age:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+        else:
+            response.cache_control.no_cache = True
+        response = response.make_conditional(request)
+    else:
+        response = send_from_directory(folder, filename, etag=etag or True, max_age=max_age, conditional=True)
+
+    if etag:
+        response.cache_control.immutable = True
+    return response
+
+@routes.app_errorhandler(413)
+def request_too_large(error):
+    # Requête au-delà de MAX_CONTENT_LENGTH, refusée avant lecture des fichiers
+    flash(upload_too_large_message(), "error")
+    return redirect(request.referrer or url_for('routes.feed'))
+
 @routes.route('/uploads/profile_pics/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(UPLOAD_FOLDER, filename)
+    return send_upload(uploads.PROFILE_PICS, filename)
 
 @routes.route('/uploads/tweet_images/<filename>')
 def uploaded_tweet_image(filename):
-    return send_from_directory(TWEET_UPLOAD_FOLDER, filename)
+    return send_upload(uploads.TWEET_IMAGES, filename)
+
+# ------------------- RESSOURCES STATIQUES -------------------
+@routes.app_context_processor
+def inject_asset_url():
+    def asset_url(filename):
+        """URL versionnée d'un fichier de static/ (voir utils.assets)."""
+        name = assets.fingerprint(filename)
+        if name is None:
+            return url_for('static', filename=filename)
+        return url_for('routes.asset', filename=name)
+    return {'asset_url': asset_url}
+
+@routes.route('/assets/<path:filename>')
+def asset(filename):
+    resolved = assets.resolve(filename)
+    found = assets.get(resolved[0]) if resolved else None
+    if found is None:
+        abort(404)
+    if found.digest != resolved[1]:
+        # Ancienne version (page en cache d'avant un déploiement) : version courante, sans cache
+        return redirect(url_for('routes.asset', filename=assets.fingerprint(found.path)))
+
+    gzipped = found.gzipped is not None and 'gzip' in request.accept_encodings
+    response = Response(found.gzipped if gzipped else found.data, mimetype=found.mimetype)
+    if gzipped:
+        response.content_encoding = 'gzip'
+    if found.gzipped is not None:
+        response.vary.add('Accept-Encoding')
+    response.set_etag(found.digest + ('-gz' if gzipped else ''))
+    response.cache_control.public = True
+    response.cache_control.max_age = uploads.IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
+
+@routes.after_app_request
+def compress_response(response):
+    """Compresse (gzip) les pages HTML et réponses JSON si le client l'accepte."""
+    if (response.mimetype not in ('text/html', 'application/json')
+            or response.status_code not in (200, 304)
+            or response.direct_passthrough or response.is_streamed
+            or response.content_encoding):
+        return response
+    # Même réponse non compressée : un cache partagé ne doit pas servir cette
+    # variante à un client qui accepte gzip (ni la variante gzip aux autres)
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or 'gzip' not in request.accept_encodings:
+        return response
+    data = response.get_data()
+    if len(data) < assets.MIN_COMPRESS_SIZE:
+        return response
+    with metrics.phase('compress'):
+        response.set_data(assets.gzip_bytes(data))
+    response.content_encoding = 'gzip'
+    return response
 
 #-------------------comments ---------------------
 @routes.route('/comment/<int:tweet_id>', methods=['POST'])
 def comment_tweet(tweet_id):
     if 'user_id' not in session:
         return jsonify({"success": False, "message": "Non connecté"}), 401
-    tweets = read_tweets()
-    users = read_users()
     current_user_id = session['user_id']
-    current_user = next((u for u in users if u['id'] == current_user_id), None)
+    current_user = get_user(current_user_id)
     if not current_user:
         return jsonify({"success": False, "message": "Utilisateur introuvable"}), 404
     content = request.form.get('content', '').strip()
@@ -456,20 +740,23 @@ def comment_tweet(tweet_id):
     
 
     
-    for tweet in tweets:
-        if tweet['id'] == tweet_id:
-            tweet.setdefault('comments', [])
+    with tweets_lock():
+        tweet = get_tweet(tweet_id)
+        if tweet:
             new_comment = {
                 'user_id': current_user_id,
                 'username': current_user['username'],
                 'content': content,
                 'created_at': datetime.now().isoformat()
             }
-            tweet['comments'].append(new_comment)
+            index = len(tweet.get('comments', []))
+            tweet = apply_tweet_op({"op": "comment", "tweet_id": tweet_id,
+                                    "index": index, "comment": new_comment})
+            tweet_search.index_comment(tweet, index)
+            versions.bump(f"comments:{tweet_id}")
             # ✅ Ajouter notification si ce n'est pas son propre tweet
             add_notification(tweet['user_id'], current_user_id, "comment", tweet_id, content)
 
-            write_tweets(tweets)
             return jsonify({
                 "success": True,
                 "comment": new_comment,
@@ -479,128 +766,167 @@ def comment_tweet(tweet_id):
 
 @routes.route('/comments/<int:tweet_id>', methods=['GET'])
 def get_comments(tweet_id):
-    tweets = read_tweets()
-    users = read_users()
-    
-    tweet = next((t for t in tweets if t['id'] == tweet_id), None)
-    if not tweet or 'comments' not in tweet:
-        return jsonify({"success": False, "message": "Tweet ou commentaires introuvables"}), 404
-    
-    # Enhance comments with profile picture URLs
-    enhanced_comments = []
-    for comment in tweet['comments']:
-        # Find user for this comment
-        user = next((u for u in users if u['id'] == comment.get('user_id')), None)
-        
-        # Create enhanced comment
-        enhanced_comment = comment.copy()
-        enhanced_comment['profile_pic_url'] = user.get('profile_pic_url') if user else None
-        
-        # Also enhance replies
-        if 'replies' in comment:
-            enhanced_replies = []
-            for reply in comment['replies']:
-                reply_user = next((u for u in users if u['id'] == reply.get('user_id')), None)
-                enhanced_reply = reply.copy()
-                enhanced_reply['profile_pic_url'] = reply_user.get('profile_pic_url') if reply_user else None
-                enhanced_replies.append(enhanced_reply)
-            enhanced_comment['replies'] = enhanced_replies
-        
-        enhanced_comments.append(enhanced_comment)
-    
-    return jsonify({
-        "success": True, 
-        "comments": enhanced_comments
-    })
+    def build():
+        tweet = get_tweet(tweet_id)
+        if not tweet or 'comments' not in tweet:
+            return jsonify({"success": False, "message": "Tweet ou commentaires introuvables"}), 404
+
+        # Enhance comments (and replies) with profile picture URLs
+        enhanced_comments = [comment.copy() for comment in tweet['comments']]
+        enhanced_replies = []
+        for comment in enhanced_comments:
+            if 'replies' in comment:
+                comment['replies'] = [reply.copy() for reply in comment['replies']]
+                enhanced_replies.extend(comment['replies'])
+
+        # Tous les auteurs du fil de commentaires en une seule recherche
+        hydrate_users(enhanced_comments + enhanced_replies, {'profile_pic_url': 'profile_pic_url'})
 
-#------------------- like com----------------------------------
-@routes.route('/like_comment/<int:tweet_id>/<int:comment_index>', methods=['POST'])
-def like_comment(tweet_id, comment_index):
-    if 'user_id' not in session:
-        return jsonify({"success": False, "message": "Non connecté"}), 401
+        return jsonify({
+            "success": True,
+            "comments": enhanced_comments
+        })
 
-    tweets = read_tweets()
-    user_id = session['user_id']
+    # Le fil change avec ses commentaires, réponses et likes, et avec les photos de profil
+    return conditional_json(versions.etag(f"comments:{tweet_id}", 'profiles'), build)
 
-    tweet = next((t for t in tweets if t['id'] == tweet_id), None)
+#------------------- like com----------------------------------
+def toggle_comment_like(user_id, tweet_id, comment_index):
+    tweet = get_tweet(tweet_id)
     if not tweet:
-        return jsonify({"success": False, "message": "Tweet introuvable"}), 404
+        return {"success": False, "message": "Tweet introuvable"}, 404
 
     if 'comments' not in tweet or not tweet['comments']:
-        return jsonify({"success": False, "message": "Aucun commentaire trouvé pour ce tweet"}), 404
+        return {"success": False, "message": "Aucun commentaire trouvé pour ce tweet"}, 404
 
     if comment_index < 0 or comment_index >= len(tweet['comments']):
-        return jsonify({"success": False, "message": "Index de commentaire invalide"}), 404
+        return {"success": False, "message": "Index de commentaire invalide"}, 404
 
-    comment = tweet['comments'][comment_index]
-    comment.setdefault('likes', [])
-
-    if user_id in comment['likes']:
-        comment['likes'].remove(user_id)
+    if liked_comment(tweet_id, comment_index, user_id):
+        tweet = apply_tweet_op({"op": "unlike_comment", "tweet_id": tweet_id, "index": comment_index, "user_id": user_id})
         liked = False
     else:
-        comment['likes'].append(user_id)
+        tweet = apply_tweet_op({"op": "like_comment", "tweet_id": tweet_id, "index": comment_index, "user_id": user_id})
         liked = True
+    versions.bump(f"comments:{tweet_id}")
+    comment = tweet['comments'][comment_index]
 
-    write_tweets(tweets)
+    return {"success": True, "liked": liked, "like_count": len(comment['likes'])}, 200
 
-    return jsonify({
-        
-        "success": True,
-        "liked": liked,
-        "like_count": len(comment['likes'])
-    })
-#------------------- RETWEET ---------------------
-@routes.route('/retweet/<int:tweet_id>', methods=['POST'])
-def retweet(tweet_id):
+@routes.route('/like_comment/<int:tweet_id>/<int:comment_index>', methods=['POST'])
+def like_comment(tweet_id, comment_index):
     if 'user_id' not in session:
-        return jsonify({"success": False, "error": "Utilisateur non connecté"}), 403
-
-    user_id = session['user_id']
-    tweets = read_tweets()
+        return jsonify({"success": False, "message": "Non connecté"}), 401
 
+    with tweets_lock():
+        result, status = toggle_comment_like(session['user_id'], tweet_id, comment_index)
+    return jsonify(result), status
+#------------------- RETWEET ---------------------
+def toggle_retweet(user_id, followers, tweet_id):
     # Trouver tweet
-    tweet = next((t for t in tweets if t['id'] == tweet_id), None)
+    tweet = get_tweet(tweet_id)
     if not tweet:
-        return jsonify({"success": False, "error": "Tweet non trouvé"}), 404
+        return {"success": False, "error": "Tweet non trouvé"}, 404
+
+    # Chercher si l'utilisateur a déjà retweeté (ancien format compris)
+    existing_retweet = bool(retweeted_tweet_ids(user_id, [tweet_id]))
 
-    # Assurer que le champ existe avec la nouvelle structure
-    tweet.setdefault("retweets", [])
-    
-    # Convertir l'ancienne structure (liste d'IDs) vers la nouvelle structure (liste d'objets)
-    if tweet["retweets"] and isinstance(tweet["retweets"][0], int):
-        # Conversion avec un timestamp par défaut (date actuelle)
-        # [user_id1, user_id2] -> [{"user_id": user_id1, "retweeted_at": "timestamp"}, ...]
-        tweet["retweets"] = [{"user_id": uid, "retweeted_at": datetime.utcnow().isoformat()} for uid in tweet["retweets"]]
-
-    # Chercher si l'utilisateur a déjà retweeté
-    existing_retweet = next((rt for rt in tweet["retweets"] if rt["user_id"] == user_id), None)
-    
     if existing_retweet:
         # Supprimer le retweet
-        tweet["retweets"] = [rt for rt in tweet["retweets"] if rt["user_id"] != user_id]
+        tweet = apply_tweet_op({"op": "unretweet", "tweet_id": tweet_id, "user_id": user_id})
+        timelines.remove_retweet(user_id, followers, tweet_id)
         is_retweeted = False
     else:
         # Ajouter un nouveau retweet avec timestamp
-        from datetime import datetime
-        new_retweet = {
-            "user_id": user_id,
-            "retweeted_at": datetime.utcnow().isoformat()
-        }
-        tweet["retweets"].append(new_retweet)
+        retweeted_at = datetime.utcnow().isoformat()
+        tweet = apply_tweet_op({"op": "retweet", "tweet_id": tweet_id, "user_id": user_id,
+                                "retweeted_at": retweeted_at})
+        timelines.push_retweet(user_id, followers, tweet_id, retweeted_at)
         is_retweeted = True
         # ✅ Ajouter notification si ce n'est pas son propre tweet
         add_notification(tweet['user_id'], user_id, "retweet", tweet_id)
 
-    # Sauvegarder
-    write_tweets(tweets)
-
     # Réponse envoyée au front
-    return jsonify({
-        "success": True,
-        "is_retweeted": is_retweeted,
-        "retweet_count": len(tweet["retweets"])
-    })
+    return {"success": True, "is_retweeted": is_retweeted, "retweet_count": len(tweet["retweets"])}, 200
+
+@routes.route('/retweet/<int:tweet_id>', methods=['POST'])
+def retweet(tweet_id):
+    if 'user_id' not in session:
+        return jsonify({"success": False, "error": "Utilisateur non connecté"}), 403
+
+    user_id = session['user_id']
+    followers = (get_user(user_id) or {}).get('followers', [])
+
+    with tweets_lock():
+        result, status = toggle_retweet(user_id, followers, tweet_id)
+    return jsonify(result), status
+
+#------------------- INTERACTIONS GROUPÉES ---------------------
+# Au-delà, le client découpe ses envois
+BATCH_MAX_OPS = 100
+
+@routes.route('/api/batch', methods=['POST'])
+def batch_interactions():
+    """
+    Applique une liste d'interactions en une seule transaction :
+    {"ops": [{"op": "like", "tweet_id": 4}, {"op": "retweet", "tweet_id": 7},
+             {"op": "like_comment", "tweet_id": 4, "index": 0}]}
+    Chaque opération bascule l'état comme la route correspondante ;
+    "results" donne, dans l'ordre, la réponse qu'aurait faite cette route.
+    """
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Non connecté"}), 401
+
+    ops = (request.get_json(silent=True) or {}).get('ops')
+    if not isinstance(ops, list) or not ops:
+        return jsonify({"success": False, "message": "Liste d'opérations manquante"}), 400
+    if len(ops) > BATCH_MAX_OPS:
+        return jsonify({"success": False, "message": f"{BATCH_MAX_OPS} opérations au maximum"}), 400
+
+    user_id = session['user_id']
+    followers = (get_user(user_id) or {}).get('followers', [])
+    results = []
+    with tweets_lock(), tweets_transaction():
+        for op in ops:
+            if not isinstance(op, dict) or not isinstance(op.get('tweet_id'), int):
+                result = {"success": False, "message": "Opération invalide"}
+            elif op.get('op') == 'like':
+                result, _ = toggle_like(user_id, op['tweet_id'])
+            elif op.get('op') == 'retweet':
+                result, _ = toggle_retweet(user_id, followers, op['tweet_id'])
+            elif op.get('op') == 'like_comment' and isinstance(op.get('index'), int):
+                result, _ = toggle_comment_like(user_id, op['tweet_id'], op['index'])
+            else:
+                result = {"success": False, "message": "Opération invalide"}
+            results.append(result)
+
+    return jsonify({"success": True, "results": results})
+
+@routes.route('/api/counts')
+def tweet_counts():
+    """
+    Compteurs des tweets affichés, pour les rafraîchir en une requête :
+    /api/counts?ids=4,7,12 -> {"counts": {"4": {"likes", "retweets",
+    "comments", "liked", "retweeted"}, ...}} (tweets inconnus omis).
+    """
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Non connecté"}), 401
+
+    try:
+        tweet_ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({"success": False, "message": "Identifiants invalides"}), 400
+    tweet_ids = tweet_ids[:BATCH_MAX_OPS]
+
+    user_id = session['user_id']
+    counts = interaction_counts(tweet_ids)
+    liked = liked_tweet_ids(user_id, counts)
+    retweeted = retweeted_tweet_ids(user_id, counts)
+    for tweet_id, count in counts.items():
+        count['liked'] = tweet_id in liked
+        count['retweeted'] = tweet_id in retweeted
+
+    return jsonify({"success": True, "counts": counts})
 #-------------------com de comment----------------------------------
 # Répondre à un commentaire
 @routes.route('/reply_comment/<int:tweet_id>/<int:comment_index>', methods=['POST'])
@@ -608,14 +934,12 @@ def reply_comment(tweet_id, comment_index):
     if 'user_id' not in session:
         return jsonify({"success": False, "message": "Non connecté"}), 401
 
-    tweets = read_tweets()
     user_id = session['user_id']
-    users = read_users()
-    user = next((u for u in users if u['id'] == user_id), None)
+    user = get_user(user_id)
     if not user:
         return jsonify({"success": False, "message": "Utilisateur introuvable"}), 404
 
-    tweet = next((t for t in tweets if t['id'] == tweet_id), None)
+    tweet = get_tweet(tweet_id)
     if not tweet or 'comments' not in tweet or comment_index >= len(tweet['comments']):
         return jsonify({"success": False, "message": "Commentaire introuvable"}), 404
 
@@ -627,17 +951,24 @@ def reply_comment(tweet_id, comment_index):
     if not content:
         return jsonify({"success": False, "message": "Le contenu est vide"}), 400
 
-    # Ensure replies list exists
-    if 'replies' not in tweet['comments'][comment_index]:
-        tweet['comments'][comment_index]['replies'] = []
-    
-    # Add the reply
-    tweet['comments'][comment_index]['replies'].append({
-        'user_id': user_id,
-        'username': user['username'],
-        'content': content,
-        'created_at': datetime.now().isoformat()
-    })
+    # Add the reply (position relue sous verrou : un autre worker a pu répondre entre-temps)
+    with tweets_lock():
+        tweet = get_tweet(tweet_id)
+        reply_index = len(tweet['comments'][comment_index].get('replies', []))
+        tweet = apply_tweet_op({
+            "op": "reply",
+            "tweet_id": tweet_id,
+            "index": comment_index,
+            "reply_index": reply_index,
+            "reply": {
+                'user_id': user_id,
+                'username': user['username'],
+                'content': content,
+                'created_at': datetime.now().isoformat()
+            }
+        })
+        tweet_search.index_reply(tweet, comment_index, reply_index)
+        versions.bump(f"comments:{tweet_id}")
     
     # ✅ NOTIFICATION 1: Notify the TWEET AUTHOR
     tweet_author_id = tweet['user_id']
@@ -675,7 +1006,6 @@ def reply_comment(tweet_id, comment_index):
         
         add_notification(original_comment_author_id, user_id, "reply", tweet_id, notification_content)
     
-    write_tweets(tweets)
     return jsonify({"success": True, "message": "Réponse ajoutée"})
 
 # ------------------- NOTIFICATIONS -------------------
@@ -685,70 +1015,79 @@ def notifications():
         return redirect(url_for('routes.login'))
 
     user_id = session['user_id']
-    notifications = read_notifications()
-    # Filtrer celles destinées à l'utilisateur
-    user_notifs = [n for n in notifications if n['to_user_id'] == user_id]
+    before, after, limit = page_params(request.args)
+    # Seule la boîte de l'utilisateur est lue, déjà triée par date (copies : le store est partagé)
+    page = paginate(partial(notifications_page, user_id), notification_sort_key, before, after, limit)
+    page = page._replace(items=[dict(n) for n in page.items])
 
     # Ajouter le username de l'auteur de chaque notif
-    users = read_users()
-    for n in user_notifs:
-        from_user = next((u for u in users if u['id'] == n['from_user_id']), None)
-        n['from_user_username'] = from_user['username'] if from_user else "Utilisateur inconnu"
-    # Tu peux les trier par date décroissante
-    user_notifs.sort(key=lambda x: x['created_at'], reverse=True)
-    users = read_users()
-    current_user = next((u for u in users if u['id'] == session['user_id']), None)
+    hydrate_users(page.items, {'from_user_username': 'username'}, key='from_user_id',
+                  defaults={'from_user_username': "Utilisateur inconnu"})
+
+    # Les notifications affichées (et les plus anciennes) sont désormais lues
+    if page.items:
+        mark_notifications_seen(user_id, up_to=max(n['id'] for n in page.items))
+
+    next_url = url_for('routes.notifications', before=page.older,
+                       limit=request.args.get('limit')) if page.older else None
+    newer_url = url_for('routes.notifications', after=page.newer,
+                        limit=request.args.get('limit')) if page.newer else None
+    # Page suivante demandée par le défilement infini : seulement les notifications
+    if request.args.get('partial'):
+        return render_template("_notifications.html", notifications=page.items, next_url=next_url)
+
+    current_user = get_user(session['user_id'])
     if not current_user:
         return redirect(url_for('routes.login'))
 
-    return render_template("notifications.html", notifications=user_notifs, current_user=current_user)
+    return render_template("notifications.html", notifications=page.items, next_url=next_url,
+                           newer_url=newer_url, current_user=current_user)
+
+@routes.route('/events')
+def live_events():
+    """Flux SSE : notifications de l'utilisateur et nouveaux tweets de ses abonnements."""
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Non connecté"}), 401
+
+    user = get_user(session['user_id'])
+    if not user:
+        return jsonify({"success": False, "message": "Utilisateur introuvable"}), 404
+    channels = [events.user_channel(user['id'])] + [events.author_channel(uid) for uid in user.get('following', [])]
+    # Reprise après une coupure : le navigateur renvoie le dernier id reçu
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    return Response(stream_with_context(events.stream(channels, last_event_id)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@routes.route('/notifications/seen', methods=['POST'])
+def notifications_seen():
+    """Marque lues toutes les notifications (ou celles d'id <= up_to) en une opération."""
+    if 'user_id' not in session:
+        return jsonify({"success": False, "message": "Non connecté"}), 401
+
+    user_id = session['user_id']
+    up_to = request.form.get('up_to', type=int)
+    mark_notifications_seen(user_id, up_to=up_to)
+    return jsonify({"success": True, "unread": unread_count(user_id)})
 
 @routes.route('/api/current_user')
 def get_current_user():
     if 'user_id' not in session:
         return jsonify({}), 401
-    
-    users = read_users()
-    user = next((u for u in users if u['id'] == session['user_id']), None)
-    
-    if user:
-        return jsonify({
-            'id': user['id'],
-            'username': user['username'],
-            'following': user.get('following', [])
-        })
-    
-    return jsonify({}), 404
 
-# ------------------- MIGRATE RETWEETS (one-time) -------------------
-@routes.route('/migrate-retweets')
-def migrate_retweets():
-    """Migrate all old retweets (list of IDs) to new format (list of objects with timestamp)"""
-    if 'user_id' not in session:
-        return redirect(url_for('routes.login'))
-    
-    tweets = read_tweets()
-    updated_count = 0
-    
-    for tweet in tweets:
-        retweets = tweet.get('retweets', [])
-        if retweets and isinstance(retweets[0], int):
-            # Convert old format to new format
-            # Use the tweet's created_at as the retweet timestamp (best guess)
-            tweet['retweets'] = [
-                {
-                    "user_id": uid, 
-                    "retweeted_at": tweet.get('created_at', datetime.utcnow().isoformat())
-                } 
-                for uid in retweets
-            ]
-            updated_count += 1
-    
-    if updated_count > 0:
-        write_tweets(tweets)
-        return f"Migrated {updated_count} tweets with old retweet format to new format."
-    else:
-        return "No tweets needed migration."
+    user_id = session['user_id']
+
+    def build():
+        user = get_user(user_id)
+        if user:
+            return jsonify({
+                'id': user['id'],
+                'username': user['username'],
+                'following': user.get('following', [])
+            })
+        return jsonify({}), 404
+
+    return conditional_json(f"{user_id}-{versions.etag(f'user:{user_id}')}", build)
 
 
 
@@ -0,0 +1,3 @@
+"""
+Benchmarks sur données synthétiques (voir bench/run.py).
+"""
@@ -0,0 +1,185 @@
+"""
+Jeu de données synthétique et déterministe pour les benchmarks.
+
+generate() construit, à partir d'une graine, des utilisateurs, tweets
+(likes, commentaires, réponses, retweets, images), abonnements et
+notifications au format courant des fichiers de data/ : même graine et mêmes
+paramètres donnent exactement les mêmes données. Les abonnements et les
+auteurs suivent une loi de puissance (quelques comptes très suivis et très
+actifs, comme sur un vrai réseau).
+
+install() écrit ce jeu dans le stockage configuré (TIGERS_DATA_DIR,
+TIGERS_STORAGE) puis recalcule les données dérivées ; à n'utiliser que sur un
+dossier de données jetable.
+"""
+import hashlib
+import random
+from datetime import datetime, timedelta
+
+# Paramètres par échelle : nombres d'utilisateurs et de tweets, puis moyennes
+# d'abonnements par utilisateur, de likes et commentaires par tweet et de
+# notifications par utilisateur
+SCALES = {
+    'small': {'users': 100, 'tweets': 1000, 'follows': 20, 'likes': 5,
+              'comments': 2, 'notifications': 20},
+    'medium': {'users': 1000, 'tweets': 10000, 'follows': 50, 'likes': 10,
+               'comments': 3, 'notifications': 50},
+    'large': {'users': 5000, 'tweets': 50000, 'follows': 100, 'likes': 20,
+              'comments': 5, 'notifications': 100},
+}
+
+# Mot de passe de tous les utilisateurs générés
+PASSWORD = 'benchmark'
+
+# Image (GIF 1x1) référencée par une partie des tweets, nommée par son contenu
+IMAGE_BYTES = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00'
+               b'\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+IMAGE_NAME = hashlib.sha256(IMAGE_BYTES).hexdigest() + '.gif'
+IMAGE_EVERY = 10
+
+# Date du premier tweet ; les suivants s'étalent sur une minute en moyenne
+START = datetime(2025, 1, 1)
+
+WORDS = ('tigre', 'match', 'soleil', 'projet', 'examen', 'café', 'musique', 'film',
+         'python', 'flask', 'données', 'campus', 'week-end', 'voyage', 'chat', 'pizza',
+         'concert', 'livre', 'course', 'pluie', 'train', 'photo', 'code', 'bug')
+
+
+def _date(offset):
+    return (START + timedelta(seconds=offset)).isoformat()
+
+
+def _count(rng, mean, limit):
+    """Nombre aléatoire de moyenne `mean` (uniforme sur [0, 2*mean]), borné par `limit`."""
+    return min(rng.randint(0, 2 * mean), limit)
+
+
+def _sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def generate(users, tweets, follows, likes, comments, notifications, seed=0, password_hash=None):
+    """
+    Jeu de données {'users', 'tweets', 'notifications'} (listes au format de
+    data/). `password_hash` est le hash stocké pour tous les utilisateurs
+    (celui de PASSWORD pour pouvoir se connecter).
+    """
+    rng = random.Random(seed)
+    user_ids = list(range(1, users + 1))
+    # Poids en 1/rang : l'utilisateur 1 est le plus suivi et le plus actif
+    weights = [1 / rank for rank in user_ids]
+
+    user_list = [{
+        'id': user_id,
+        'username': f'user{user_id}',
+        'email': f'user{user_id}@bench.test',
+        'password': password_hash,
+        'following': [],
+        'followers': [],
+        'profile_pic_url': None,
+        'bio': _sentence(rng, 5),
+    } for user_id in user_ids]
+    for user in user_list:
+        followed = set(rng.choices(user_ids, weights, k=_count(rng, follows, users - 1)))
+        followed.discard(user['id'])
+        user['following'] = sorted(followed)
+        for followed_id in user['following']:
+            user_list[followed_id - 1]['followers'].append(user['id'])
+
+    tweet_list = []
+    offset = 0
+    for tweet_id in range(1, tweets + 1):
+        offset += rng.randint(1, 120)
+        author = rng.choices(user_ids, weights)[0]
+        tweet = {
+            'id': tweet_id,
+            'user_id': author,
+            'username': f'user{author}',
+            'content': _sentence(rng, rng.randint(3, 20)),
+            'image_urls': [f'/uploads/tweet_images/{IMAGE_NAME}'] if tweet_id % IMAGE_EVERY == 0 else [],
+            'likes': sorted(rng.sample(user_ids, _count(rng, likes, users))),
+            'created_at': _date(offset) + 'Z',
+            'comments': [],
+            'retweets': [],
+        }
+        for index in range(_count(rng, comments, 50)):
+            commenter = rng.choice(user_ids)
+            tweet['comments'].append({
+                'user_id': commenter,
+                'username': f'user{commenter}',
+                'content': _sentence(rng, rng.randint(2, 12)),
+                'created_at': _date(offset + 60 * (index + 1)),
+                'likes': sorted(rng.sample(user_ids, _count(rng, 1, users))),
+                'replies': [{
+                    'user_id': replier,
+                    'username': f'user{replier}',
+                    'content': _sentence(rng, rng.randint(2, 8)),
+                    'created_at': _date(offset + 60 * (index + 1) + 30),
+                } for replier in rng.sample(user_ids, _count(rng, 1, users))],
+            })
+        tweet['retweets'] = [{'user_id': user_id, 'retweeted_at': _date(offset + 90)}
+                             for user_id in sorted(rng.sample(user_ids, _count(rng, 1, users)))]
+        tweet_list.append(tweet)
+
+    notification_list = []
+    if tweet_list:
+        for user_id in user_ids:
+            count = _count(rng, notifications, 10 * notifications)
+            for n in range(count):
+                tweet = rng.choice(tweet_list)
+                kind = rng.choice(('like', 'comment'))
+                notification_list.append({
+                    'to_user_id': user_id,
+                    'from_user_id': rng.choice(user_ids),
+                    'type': kind,
+                    'tweet_id': tweet['id'],
+                    'content': _sentence(rng, 4) if kind == 'comment' else None,
+                    # Les plus anciennes sont lues
+                    'seen': n < count // 2,
+                    'created_at': _date(offset * n // count),
+                })
+
+    return {'users': user_list, 'tweets': tweet_list, 'notifications': notification_list}
+
+
+def summary(dataset):
+    """Effectifs d'un jeu de données (reportés avec les résultats)."""
+    tweets = dataset['tweets']
+    return {
+        'users': len(dataset['users']),
+        'tweets': len(tweets),
+        'follows': sum(len(u['following']) for u in dataset['users']),
+        'likes': sum(len(t['likes']) for t in tweets),
+        'comments': sum(len(t['comments']) for t in tweets),
+        'replies': sum(len(c['replies']) for t in tweets for c in t['comments']),
+        'retweets': sum(len(t['retweets']) for t in tweets),
+        'notifications': len(dataset['notifications']),
+    }
+
+
+def install(dataset):
+    """
+    Remplace toutes les données du stockage configuré par `dataset`, note la
+    version courante du format et recalcule timelines, index de recherche,
+    références des images et versions (ETag).
+    """
+    import os
+
+    from utils import data_manager as dm
+    from utils import migrations, timelines, tweet_search, uploads, versions
+
+    dm.init_files()
+    dm.write_users(dataset['users'])
+    dm.write_tweets(dataset['tweets'])
+    dm.write_notifications(dataset['notifications'])
+    dm.atomic_write_json(migrations.SCHEMA_FILE, {'version': len(migrations.MIGRATIONS)}, indent=4)
+
+    directory = os.path.join(uploads.UPLOAD_ROOT, uploads.TWEET_IMAGES)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, IMAGE_NAME), 'wb') as f:
+        f.write(IMAGE_BYTES)
+
+    timelines.rebuild(dataset['users'], dataset['tweets'])
+    tweet_search.rebuild(dataset['tweets'])
+    uploads.rebuild(dataset['users'], dataset['tweets'])
+    versions.reset()
@@ -0,0 +1,434 @@
+"""
+Benchmark de toutes les routes et des opérations de utils.data_manager sur
+des données synthétiques (bench/dataset.py), à plusieurs échelles.
+
+Pour chaque échelle, un dossier temporaire (TIGERS_DATA_DIR, et dossier
+courant pour backend/data et backend/uploads) reçoit le jeu de données
+généré, puis un processus neuf démarre l'application comme app.py et appelle
+chaque route avec le client de test Flask, et chaque opération de
+data_manager, --iterations fois. Mesures :
+- par appel : latence p50/p99 (et premier appel, à froid), octets lus et
+  écrits (rchar/wchar de /proc/self/io, Linux uniquement), taille de la
+  réponse et croissance du pic de mémoire pendant la série ;
+- par échelle : pic de RSS du processus, durée du démarrage, taille des données.
+
+    python -m bench.run                                  # small et medium, backend JSON
+    python -m bench.run --scales small,large --storage sqlite
+    python -m bench.run --set tweets=20000 --set likes=50
+    python -m bench.run --compare bench/baseline.json    # écarts avec une référence
+    python -m bench.run --diff old.json new.json         # compare deux résultats déjà écrits
+
+Les résultats sont écrits en JSON (--output) ; en copier un en
+bench/baseline.json pour en faire la référence des comparaisons.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from itertools import count
+from time import perf_counter
+
+from bench.dataset import IMAGE_NAME, PASSWORD, SCALES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_SCALES = ('small', 'medium')
+DEFAULT_OUTPUT = os.path.join(ROOT, 'bench', 'results.json')
+ITERATIONS = 20
+# Écart (rapport nouveau / ancien) à partir duquel --compare signale une régression
+REGRESSION_RATIO = 1.2
+# ... et d'au moins cet écart absolu (bruit de mesure des appels très courts)
+REGRESSION_MIN_DELTA = {'p50_ms': 0.5, 'read_bytes': 1024, 'written_bytes': 1024}
+
+
+# ------------------- MESURES -------------------
+def io_counters():
+    """(octets lus, octets écrits) par le processus depuis son démarrage, ou None hors Linux."""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines())
+    except OSError:
+        return None
+    return int(fields['rchar']), int(fields['wchar'])
+
+
+def io_overhead():
+    """Octets lus par io_counters() lui-même, retirés des mesures."""
+    start, end = io_counters() or (0, 0), io_counters() or (0, 0)
+    return end[0] - start[0]
+
+
+def peak_rss_kb():
+    """Pic de mémoire résidente du processus (ko)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS donne des octets, Linux des ko
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def percentile(samples, p):
+    """Percentile `p` (rang le plus proche) d'une liste triée."""
+    return samples[max(0, math.ceil(p / 100 * len(samples)) - 1)]
+
+
+def measure(call, iterations, reset=None):
+    """
+    Appelle call(i) `iterations` fois après un premier appel à froid et
+    retourne les statistiques. Si call retourne une réponse (routes), son
+    statut et sa taille sont notés ; reset() est appelé après chaque appel,
+    hors mesure.
+    """
+    timings, read, written, sizes = [], 0, 0, 0
+    statuses = Counter()
+    rss_before = peak_rss_kb()
+    overhead = io_overhead()
+    first_ms = None
+    for i in range(iterations + 1):
+        io_start = io_counters()
+        start = perf_counter()
+        try:
+            response = call(i)
+        except Exception as exc:
+            response = None
+            statuses[type(exc).__name__] += 1
+        elapsed = (perf_counter() - start) * 1000
+        io_end = io_counters()
+        if reset:
+            reset()
+        if i == 0:
+            first_ms = elapsed
+            continue
+        timings.append(elapsed)
+        if io_start and io_end:
+            read += io_end[0] - io_start[0] - overhead
+            written += io_end[1] - io_start[1]
+        if hasattr(response, 'status_code'):
+            statuses[str(response.status_code)] += 1
+            sizes += len(response.data)
+    timings.sort()
+    stats = {
+        'first_ms': round(first_ms, 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'read_bytes': read // iterations if io_start else None,
+        'written_bytes': written // iterations if io_start else None,
+        'rss_growth_kb': peak_rss_kb() - rss_before,
+    }
+    if statuses:
+        stats['statuses'] = dict(sorted(statuses.items()))
+    if sizes:
+        stats['response_bytes'] = sizes // iterations
+    return stats
+
+
+# ------------------- ROUTES -------------------
+def login(client, ctx):
+    with client.session_transaction() as session:
+        session['user_id'] = ctx['me']['id']
+        session['username'] = ctx['me']['username']
+
+
+def first_event(client, ctx, i):
+    """Flux SSE : seulement le temps jusqu'au premier message (le flux ne se termine pas)."""
+    response = client.get('/events', buffered=False)
+    next(iter(response.response))
+    response.close()
+    response.data = b''
+    return response
+
+
+def signup(client, ctx, i):
+    number = next(ctx['signups'])
+    return client.post('/signup', data={'username': f"bench{number}", 'email': f"bench{number}@bench.test",
+                                        'password': PASSWORD})
+
+
+def batch_ops(ctx):
+    return [{'op': 'like', 'tweet_id': tweet_id} for tweet_id in ctx['page_ids'][:10]]
+
+
+# (nom, appel(client, ctx, i)) ; i numérote les appels (noms uniques des inscriptions...)
+ROUTES = [
+    ('GET /', lambda c, ctx, i: c.get('/')),
+    ('GET /signup', lambda c, ctx, i: c.get('/signup')),
+    ('POST /signup', signup),
+    ('GET /login', lambda c, ctx, i: c.get('/login')),
+    ('POST /login', lambda c, ctx, i: c.post('/login', data={
+        'email': ctx['me']['email'], 'password': PASSWORD})),
+    ('GET /search', lambda c, ctx, i: c.get('/search?q=user1')),
+    ('GET /search_live', lambda c, ctx, i: c.get('/search_live?q=user')),
+    ('GET /search/tweets', lambda c, ctx, i: c.get('/search/tweets?q=tigre')),
+    ('GET /search/tweets?sort=recent', lambda c, ctx, i: c.get('/search/tweets?q=tigre&sort=recent')),
+    ('GET /feed', lambda c, ctx, i: c.get('/feed')),
+    ('GET /feed?view=recommended', lambda c, ctx, i: c.get('/feed?view=recommended')),
+    ('GET /feed?partial', lambda c, ctx, i: c.get('/feed?partial=1')),
+    ('POST /feed', lambda c, ctx, i: c.post('/feed', data={'content': f"tigre benchmark {i}"})),
+    ('GET /api/feed', lambda c, ctx, i: c.get('/api/feed')),
+    ('GET /api/feed?fields', lambda c, ctx, i: c.get('/api/feed?fields=content,counts')),
+    ('POST /like', lambda c, ctx, i: c.post(f"/like/{ctx['tweet_id']}")),
+    ('POST /toggle_follow', lambda c, ctx, i: c.post(f"/toggle_follow/{ctx['other']['username']}")),
+    ('GET /profile (own)', lambda c, ctx, i: c.get(f"/profile/{ctx['me']['username']}")),
+    ('GET /profile (other)', lambda c, ctx, i: c.get(f"/profile/{ctx['other']['username']}")),
+    ('POST /profile/edit', lambda c, ctx, i: c.post('/profile/edit', data={
+        'username': ctx['me']['username'], 'bio': f"bio {i}"})),
+    ('GET /uploads/tweet_images', lambda c, ctx, i: c.get(f"/uploads/tweet_images/{IMAGE_NAME}")),
+    ('GET /assets', lambda c, ctx, i: c.get(ctx['asset_url'])),
+    ('POST /comment', lambda c, ctx, i: c.post(f"/comment/{ctx['tweet_id']}", data={'content': f"commentaire {i}"})),
+    ('GET /comments', lambda c, ctx, i: c.get(f"/comments/{ctx['tweet_id']}")),
+    ('POST /like_comment', lambda c, ctx, i: c.post(f"/like_comment/{ctx['tweet_id']}/0")),
+    ('POST /reply_comment', lambda c, ctx, i: c.post(f"/reply_comment/{ctx['tweet_id']}/0",
+                                                      json={'content': f"réponse {i}"})),
+    ('POST /retweet', lambda c, ctx, i: c.post(f"/retweet/{ctx['tweet_id']}")),
+    ('POST /api/batch', lambda c, ctx, i: c.post('/api/batch', json={'ops': batch_ops(ctx)})),
+    ('GET /api/counts', lambda c, ctx, i: c.get('/api/counts?ids=' + ','.join(map(str, ctx['page_ids'])))),
+    ('GET /notifications', lambda c, ctx, i: c.get('/notifications')),
+    ('POST /notifications/seen', lambda c, ctx, i: c.post('/notifications/seen')),
+    ('GET /events', first_event),
+    ('GET /api/current_user', lambda c, ctx, i: c.get('/api/current_user')),
+    ('GET /metrics', lambda c, ctx, i: c.get('/metrics')),
+    ('GET /logout', lambda c, ctx, i: c.get('/logout')),
+]
+
+
+# ------------------- OPÉRATIONS DE DATA_MANAGER -------------------
+def operations(dm, ctx):
+    """(nom, appel(i)) des opérations de data_manager, sur les mêmes données que les routes."""
+    me, other, tweet_id, ids = ctx['me']['id'], ctx['other']['id'], ctx['tweet_id'], ctx['page_ids']
+    return [
+        ('read_users', lambda i: dm.read_users()),
+        ('read_tweets', lambda i: dm.read_tweets()),
+        ('get_user', lambda i: dm.get_user(me)),
+        ('get_users', lambda i: dm.get_users(ctx['following'])),
+        ('get_user_by_username', lambda i: dm.get_user_by_username(ctx['other']['username'], ignore_case=True)),
+        ('get_user_by_email', lambda i: dm.get_user_by_email(ctx['me']['email'])),
+        ('users_version', lambda i: dm.users_version()),
+        ('get_tweet', lambda i: dm.get_tweet(tweet_id)),
+        ('get_tweets', lambda i: dm.get_tweets(ids)),
+        ('tweets_page', lambda i: dm.tweets_page(limit=20)),
+        ('tweets_page (user)', lambda i: dm.tweets_page(limit=20, user_id=me)),
+        ('count_tweets', lambda i: dm.count_tweets(me)),
+        ('retweets_page', lambda i: dm.retweets_page(me, limit=20)),
+        ('count_retweets', lambda i: dm.count_retweets(me)),
+        ('liked_tweet_ids', lambda i: dm.liked_tweet_ids(me, ids)),
+        ('retweeted_tweet_ids', lambda i: dm.retweeted_tweet_ids(me, ids)),
+        ('interaction_counts', lambda i: dm.interaction_counts(ids)),
+        ('apply_tweet_op (like/unlike)', lambda i: dm.apply_tweet_op(
+            {'op': 'unlike' if i % 2 else 'like', 'tweet_id': tweet_id, 'user_id': other})),
+        ('follow_user/unfollow_user', lambda i: (dm.unfollow_user if i % 2 else dm.follow_user)(other, me)),
+        ('add_notification', lambda i: dm.add_notification(other, me, 'like', tweet_id)),
+        ('notifications_page', lambda i: dm.notifications_page(me, limit=20)),
+        ('unread_count', lambda i: dm.unread_count(me)),
+        ('mark_notifications_seen', lambda i: dm.mark_notifications_seen(other)),
+    ]
+
+
+def context(dm, assets):
+    """Utilisateurs, tweet et identifiants utilisés par les appels (les plus sollicités du jeu)."""
+    me, other = dm.get_user(1), dm.get_user(2)
+    page = dm.tweets_page(limit=50)
+    commented = [t for t in page if t.get('comments')]
+    return {
+        'me': me,
+        'other': other,
+        'following': me.get('following', [])[:20],
+        'tweet_id': (commented or page)[0]['id'],
+        'page_ids': [t['id'] for t in page[:20]],
+        'asset_url': '/assets/' + assets.fingerprint('style.css'),
+        'signups': count(1),
+    }
+
+
+# ------------------- PROCESSUS D'UNE ÉCHELLE -------------------
+def prepare(params, seed):
+    """Génère et installe le jeu de données (processus à part : son pic de mémoire n'est pas compté)."""
+    from werkzeug.security import generate_password_hash
+
+    from bench import dataset
+    from utils.passwords import HASH_METHOD
+
+    start = perf_counter()
+    data = dataset.generate(seed=seed, password_hash=generate_password_hash(PASSWORD, HASH_METHOD), **params)
+    dataset.install(data)
+    return {'dataset': dataset.summary(data), 'setup_s': round(perf_counter() - start, 3)}
+
+
+def serve(iterations):
+    """Démarre l'application et mesure toutes les routes puis les opérations de data_manager."""
+    start = perf_counter()
+    from app import app
+    startup_s = perf_counter() - start
+    startup_rss = peak_rss_kb()
+
+    from utils import assets
+    from utils import data_manager as dm
+
+    ctx = context(dm, assets)
+    client = app.test_client()
+    login(client, ctx)
+    routes = {}
+    for name, call in ROUTES:
+        routes[name] = measure(lambda i: call(client, ctx, i), iterations, reset=lambda: login(client, ctx))
+    ops = {name: measure(call, iterations) for name, call in operations(dm, ctx)}
+    return {
+        'startup_s': round(startup_s, 3),
+        'startup_rss_kb': startup_rss,
+        'peak_rss_kb': peak_rss_kb(),
+        'routes': routes,
+        'operations': ops,
+    }
+
+
+def _directory_size(path):
+    return sum(os.path.getsize(os.path.join(d, name)) for d, _, names in os.walk(path) for name in names)
+
+
+def _child(directory, env, *args):
+    """Lance `python -m bench.run --child ...` dans `directory` ; retourne son résultat JSON."""
+    result_path = os.path.join(directory, 'result.json')
+    done = subprocess.run([sys.executable, '-m', 'bench.run', '--child', *args, '--result', result_path],
+                          cwd=directory, env=env, capture_output=True, text=True)
+    if done.returncode != 0:
+        sys.stderr.write(done.stdout + done.stderr)
+        raise SystemExit(f"Échec du processus de benchmark ({args[0]}) dans {directory}")
+    with open(result_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_scale(name, params, storage, seed, iterations):
+    """Résultats d'une échelle, mesurés dans un dossier de données temporaire."""
+    with tempfile.TemporaryDirectory(prefix=f'tigers-bench-{name}-') as directory:
+        env = dict(os.environ, TIGERS_DATA_DIR=os.path.join(directory, 'data'), TIGERS_STORAGE=storage,
+                   PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        env.pop('TIGERS_SQLITE_PATH', None)
+        os.makedirs(env['TIGERS_DATA_DIR'])
+        result = {'params': params}
+        result.update(_child(directory, env, 'prepare', '--params', json.dumps(params), '--seed', str(seed)))
+        result['data_bytes'] = _directory_size(directory)
+        result.update(_child(directory, env, 'serve', '--iterations', str(iterations)))
+    return result
+
+
+def run(scales, storage='json', seed=0, iterations=ITERATIONS, overrides=None):
+    results = {
+        'meta': {'storage': storage, 'seed': seed, 'iterations': iterations,
+                 'python': platform.python_version(), 'platform': platform.platform()},
+        'scales': {},
+    }
+    for name in scales:
+        params = dict(SCALES[name], **(overrides or {}))
+        print(f"Échelle {name} : {params}", file=sys.stderr)
+        results['scales'][name] = run_scale(name, params, storage, seed, iterations)
+    return results
+
+
+# ------------------- COMPARAISON -------------------
+def _ratio(old, new):
+    if not old or new is None:
+        return None
+    return new / old
+
+
+def compare(old, new, threshold=REGRESSION_RATIO):
+    """
+    Lignes de comparaison de deux résultats (p50, p99, octets lus/écrits par
+    appel, pic de RSS) ; retourne (lignes, nombre de régressions).
+    """
+    lines, regressions = [], 0
+    for scale, new_scale in new['scales'].items():
+        old_scale = old['scales'].get(scale)
+        if old_scale is None:
+            lines.append(f"[{scale}] absente de la référence")
+            continue
+        lines.append(f"[{scale}] pic RSS {old_scale['peak_rss_kb']} → {new_scale['peak_rss_kb']} ko")
+        for group in ('routes', 'operations'):
+            for name, stats in new_scale[group].items():
+                before = old_scale[group].get(name)
+                if before is None:
+                    lines.append(f"  {name:<36} nouveau")
+                    continue
+                cells = []
+                flagged = False
+                for key in ('p50_ms', 'p99_ms', 'read_bytes', 'written_bytes'):
+                    ratio = _ratio(before[key], stats[key])
+                    mark = ''
+                    if (key in REGRESSION_MIN_DELTA and ratio is not None and ratio >= threshold
+                            and stats[key] - before[key] >= REGRESSION_MIN_DELTA[key]):
+                        mark, flagged = '!', True
+                    cells.append(f"{key} {before[key]} → {stats[key]}"
+                                 + (f" (x{ratio:.2f}){mark}" if ratio is not None else ''))
+                regressions += flagged
+                lines.append(f"  {name:<36} " + ' | '.join(cells))
+    return lines, regressions
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.run', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--scales', default=','.join(DEFAULT_SCALES),
+                        help=f"échelles séparées par des virgules parmi {', '.join(SCALES)}")
+    parser.add_argument('--storage', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--iterations', type=int, default=ITERATIONS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--set', action='append', default=[], metavar='PARAM=N',
+                        help="remplace un paramètre du jeu de données à toutes les échelles")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', metavar='BASELINE', help="résultat de référence à comparer")
+    parser.add_argument('--diff', nargs=2, metavar=('OLD', 'NEW'), help="compare deux résultats sans rien mesurer")
+    # Processus d'une échelle (lancés par run_scale)
+    parser.add_argument('--child', choices=('prepare', 'serve'), help=argparse.SUPPRESS)
+    parser.add_argument('--params', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        if args.child == 'prepare':
+            result = prepare(json.loads(args.params), args.seed)
+        else:
+            result = serve(args.iterations)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return 0
+
+    if args.diff:
+        old, new = _load(args.diff[0]), _load(args.diff[1])
+    else:
+        scales = [s for s in args.scales.split(',') if s]
+        unknown = [s for s in scales if s not in SCALES]
+        overrides = {}
+        for item in args.set:
+            key, _, value = item.partition('=')
+            if key not in SCALES['small'] or not value.isdigit():
+                parser.error(f"paramètre invalide : {item}")
+            overrides[key] = int(value)
+        if unknown:
+            parser.error(f"échelles inconnues : {', '.join(unknown)}")
+        new = run(scales, args.storage, args.seed, args.iterations, overrides)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(new, f, indent=2, ensure_ascii=False)
+        print(f"Résultats écrits dans {args.output}", file=sys.stderr)
+        if not args.compare:
+            for scale, result in new['scales'].items():
+                print(f"[{scale}] {result['dataset']} — pic RSS {result['peak_rss_kb']} ko")
+                for group in ('routes', 'operations'):
+                    for name, stats in result[group].items():
+                        print(f"  {name:<36} p50 {stats['p50_ms']:>9.3f} ms  p99 {stats['p99_ms']:>9.3f} ms  "
+                              f"lu {stats['read_bytes']} o  écrit {stats['written_bytes']} o")
+            return 0
+        old = _load(args.compare)
+
+    lines, regressions = compare(old, new)
+    print('\n'.join(lines))
+    print(f"{regressions} régressions (x{REGRESSION_RATIO} ou plus sur p50 ou octets lus/écrits, marquées !)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,42 @@
+/* DÉFILEMENT INFINI
+ * Le lien .load-more en bas d'une liste pointe vers la page suivante
+ * (?before=<curseur>). Quand il approche de l'écran, la page est chargée en
+ * fragment (?partial=1) et insérée à sa place ; onLoaded(node) est appelé sur
+ * chaque nouvel élément pour brancher ses boutons. Sans JavaScript, le lien
+ * reste une pagination classique.
+ */
+function setupInfiniteScroll(container, onLoaded) {
+  if (!container || !('IntersectionObserver' in window)) return;
+
+  const observer = new IntersectionObserver(entries => {
+    entries.forEach(entry => {
+      if (entry.isIntersecting) loadMore(entry.target);
+    });
+  }, { rootMargin: '400px' });
+
+  async function loadMore(link) {
+    observer.unobserve(link);
+    const url = new URL(link.href, window.location.href);
+    url.searchParams.set('partial', '1');
+    try {
+      const res = await fetch(url);
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      const tpl = document.createElement('template');
+      tpl.innerHTML = await res.text();
+      const nodes = Array.from(tpl.content.children);
+      link.replaceWith(tpl.content);
+      if (onLoaded) nodes.forEach(node => onLoaded(node));
+      watch();
+    } catch (err) {
+      // Le lien reste cliquable : chargement classique de la page suivante
+      console.error('Défilement infini :', err);
+    }
+  }
+
+  function watch() {
+    const next = container.querySelector('.load-more');
+    if (next) observer.observe(next);
+  }
+
+  watch();
+}
@@ -0,0 +1,95 @@
+/* INTERACTIONS GROUPÉES
+ * queueInteraction({op: 'like' | 'retweet' | 'like_comment', tweet_id, index})
+ * met l'opération en file et retourne une promesse du résultat (même réponse
+ * que /like, /retweet ou /like_comment). Les clics rapprochés partent ensemble
+ * vers /api/batch : une seule écriture côté serveur pour toute la rafale.
+ *
+ * setupCountsRefresh() rafraîchit périodiquement, en une requête
+ * (/api/counts), les compteurs des tweets visibles à l'écran.
+ */
+const INTERACTION_DELAY = 150;    // ms d'attente pour regrouper les clics
+const BATCH_MAX_OPS = 100;        // même limite que le serveur
+const COUNTS_REFRESH_DELAY = 30000;
+
+const pendingInteractions = [];
+let interactionTimer = null;
+
+function queueInteraction(op) {
+  return new Promise((resolve, reject) => {
+    pendingInteractions.push({ op, resolve, reject });
+    if (pendingInteractions.length >= BATCH_MAX_OPS) {
+      flushInteractions();
+    } else if (!interactionTimer) {
+      interactionTimer = setTimeout(flushInteractions, INTERACTION_DELAY);
+    }
+  });
+}
+
+async function flushInteractions() {
+  clearTimeout(interactionTimer);
+  interactionTimer = null;
+  const batch = pendingInteractions.splice(0, BATCH_MAX_OPS);
+  if (!batch.length) return;
+  try {
+    const res = await fetch('/api/batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ ops: batch.map(item => item.op) })
+    });
+    const data = await res.json();
+    if (!data.success) throw new Error(data.message || 'Erreur');
+    batch.forEach((item, i) => item.resolve(data.results[i]));
+  } catch (err) {
+    batch.forEach(item => item.reject(err));
+  }
+  if (pendingInteractions.length) flushInteractions();
+}
+
+// Clics encore en attente quand on quitte la page
+window.addEventListener('pagehide', () => {
+  if (!pendingInteractions.length) return;
+  const ops = pendingInteractions.splice(0).map(item => item.op);
+  navigator.sendBeacon('/api/batch', new Blob([JSON.stringify({ ops })], { type: 'application/json' }));
+});
+
+/* COMPTEURS DES TWEETS VISIBLES */
+function visibleTweetIds() {
+  const ids = new Set();
+  document.querySelectorAll('.like-btn[data-tweet-id]').forEach(btn => {
+    const rect = btn.getBoundingClientRect();
+    if (rect.bottom > 0 && rect.top < window.innerHeight) ids.add(btn.dataset.tweetId);
+  });
+  return Array.from(ids).slice(0, BATCH_MAX_OPS);
+}
+
+function updateCount(selector, tweetId, count, stateClass, state) {
+  document.querySelectorAll(`${selector}[data-tweet-id="${tweetId}"]`).forEach(btn => {
+    // Un clic en cours fera sa propre mise à jour
+    if (btn.disabled) return;
+    btn.querySelector('span').textContent = count;
+    if (stateClass) btn.classList.toggle(stateClass, state);
+  });
+}
+
+async function refreshCounts() {
+  if (document.hidden) return;
+  const ids = visibleTweetIds();
+  if (!ids.length) return;
+  try {
+    const res = await fetch(`/api/counts?ids=${ids.join(',')}`);
+    const data = await res.json();
+    if (!data.success) return;
+    Object.entries(data.counts).forEach(([tweetId, c]) => {
+      updateCount('.like-btn', tweetId, c.likes, 'liked', c.liked);
+      updateCount('.retweet-btn', tweetId, c.retweets, 'retweeted', c.retweeted);
+      updateCount('.view-comments-btn', tweetId, c.comments);
+    });
+  } catch (err) {
+    console.error('Rafraîchissement des compteurs :', err);
+  }
+}
+
+function setupCountsRefresh() {
+  setInterval(refreshCounts, COUNTS_REFRESH_DELAY);
+  document.addEventListener('visibilitychange', refreshCounts);
+}
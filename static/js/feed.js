@@ -0,0 +1,817 @@
+/* LIKE AJAX */
+function bindLikeButtons(root) {
+  root.querySelectorAll('.like-btn').forEach(btn => {
+    btn.addEventListener('click', async (e) => {
+      e.stopPropagation();
+      const tweetId = btn.dataset.tweetId;
+      const countEl = btn.querySelector('.like-count');
+      btn.disabled = true;
+      try {
+        const data = await queueInteraction({ op: 'like', tweet_id: Number(tweetId) });
+        if(data.success){
+          countEl.textContent = data.like_count;
+          btn.classList.toggle('liked', data.liked);
+        }
+      } finally {
+        btn.disabled = false;
+      }
+    });
+  });
+}
+document.addEventListener('DOMContentLoaded', () => bindLikeButtons(document));
+
+/* ENHANCED LIVE SEARCH WITH MODAL */
+let currentFollowing = new Set(); // Store followed users
+
+// Load current user's following list
+async function loadFollowing() {
+  try {
+    const res = await fetch('/api/current_user');
+    if (res.ok) {
+      const user = await res.json();
+      currentFollowing = new Set(user.following || []);
+    }
+  } catch (error) {
+    console.error('Error loading following:', error);
+  }
+}
+
+// Initialize
+document.addEventListener('DOMContentLoaded', loadFollowing);
+
+// Search input handler
+document.getElementById("live-search").addEventListener("input", async function () {
+  const q = this.value.trim();
+  const modal = document.getElementById("search-results-modal");
+  const resultsList = document.getElementById("search-results-list");
+
+  if (!q) {
+    modal.style.display = "none";
+    return;
+  }
+
+  try {
+    const res = await fetch(`/search_live?q=${encodeURIComponent(q)}`);
+    const users = await res.json();
+
+    if (!users.length) {
+      resultsList.innerHTML = '<div class="no-results">Aucun utilisateur trouvé</div>';
+      modal.style.display = "block";
+      return;
+    }
+
+    // Render search results
+    resultsList.innerHTML = users.map(user => `
+      <div class="search-result-item" data-user-id="${user.id}">
+        <img src="${user.profile_pic_url || '/static/default-avatar.png'}" 
+             alt="${user.username}"
+             onclick="window.location.href='/profile/${user.username}'">
+        <div class="search-result-info" onclick="window.location.href='/profile/${user.username}'">
+          <div class="search-result-username">@${user.username}</div>
+        </div>
+        <button class="search-result-follow ${currentFollowing.has(user.id) ? 'following' : ''}"
+                data-user-id="${user.id}"
+                data-username="${user.username}">
+          ${currentFollowing.has(user.id) ? 'Suivi' : 'Suivre'}
+        </button>
+      </div>
+    `).join('');
+
+    modal.style.display = "block";
+
+    // Add follow/unfollow handlers
+    document.querySelectorAll('.search-result-follow').forEach(btn => {
+      btn.addEventListener('click', async (e) => {
+        e.stopPropagation();
+        const username = btn.dataset.username;
+        const userId = btn.dataset.userId;
+        
+        const res = await fetch(`/toggle_follow/${username}`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' }
+        });
+        
+        if (res.ok) {
+          const data = await res.json();
+          if (data.is_following) {
+            currentFollowing.add(parseInt(userId));
+            btn.textContent = 'Suivi';
+            btn.classList.add('following');
+          } else {
+            currentFollowing.delete(parseInt(userId));
+            btn.textContent = 'Suivre';
+            btn.classList.remove('following');
+          }
+        }
+      });
+    });
+
+  } catch (error) {
+    console.error('Search error:', error);
+    resultsList.innerHTML = '<div class="no-results">Erreur de recherche</div>';
+    modal.style.display = "block";
+  }
+});
+
+// Close modal when clicking outside
+document.addEventListener("click", (e) => {
+  const modal = document.getElementById("search-results-modal");
+  const searchInput = document.getElementById("live-search");
+  
+  if (!modal.contains(e.target) && e.target !== searchInput) {
+    modal.style.display = "none";
+  }
+});
+
+// Keep modal open when clicking inside it
+document.getElementById("search-results-modal").addEventListener("click", (e) => {
+  e.stopPropagation();
+});
+
+document.addEventListener("click", (e) => {
+  const box = document.getElementById("search-suggestions");
+  if (!box.contains(e.target) && e.target.id !== "live-search") {
+    box.style.display = "none";
+  }
+});
+
+function openImageModal(src) {
+  document.getElementById("modalImage").src = src;
+  document.getElementById("imgModal").style.display = "flex";
+}
+
+function closeImageModal() {
+  document.getElementById("imgModal").style.display = "none";
+}
+
+  /* AJAX COMMENT SUBMISSION */
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('.comment-form').forEach(form => {
+    form.addEventListener('submit', async (e) => {
+      e.preventDefault();
+      const formData = new FormData(form);
+      const response = await fetch(form.action, {
+        method: 'POST',
+        body: formData
+      });
+      const result = await response.json();
+      if (result.success) {
+        // Recharge la page pour afficher le nouveau commentaire
+        window.location.reload();
+      } else {
+        alert(result.message);
+      }
+    });
+  });
+});
+
+document.addEventListener('DOMContentLoaded', () => {
+    // Gestion des likes sur les commentaires
+    document.querySelectorAll('.like-comment-btn').forEach(btn => {
+        btn.addEventListener('click', async (e) => {
+            e.preventDefault();
+            const tweetId = btn.dataset.tweetId;
+            const commentIndex = btn.dataset.commentIndex;
+            const countEl = btn.querySelector('.like-count');
+
+            btn.disabled = true;
+
+            try {
+                const data = await queueInteraction({
+                    op: 'like_comment', tweet_id: Number(tweetId), index: Number(commentIndex)
+                });
+
+                if (data.success) {
+                    // Met à jour le nombre de likes
+                    countEl.textContent = data.like_count;
+                    // Met à jour l'état visuel du bouton
+                    btn.classList.toggle('liked', data.liked);
+                } else {
+                    alert(data.message);
+                }
+            } catch (error) {
+                console.error('Erreur:', error);
+                alert('Une erreur est survenue');
+            } finally {
+                btn.disabled = false;
+            }
+        });
+    });
+});
+
+
+
+/* AJAX RETWEET SUBMISSION */
+function bindRetweetButtons(root) {
+  root.querySelectorAll(".retweet-btn").forEach(btn => {
+    btn.addEventListener("click", async () => {
+      const tweetId = btn.dataset.tweetId;
+      const countEl = btn.querySelector(".retweet-count");
+      
+      btn.disabled = true;
+      
+      try {
+        const data = await queueInteraction({ op: "retweet", tweet_id: Number(tweetId) });
+
+        if (!data.success) throw new Error(data.error || "Erreur");
+
+        // Get current state BEFORE updating
+        const wasRetweeted = btn.classList.contains("retweeted");
+        const isNowRetweeted = data.is_retweeted;
+        
+        // Change visual state
+        btn.classList.toggle("retweeted", isNowRetweeted);
+        
+        // Update counter
+        countEl.textContent = data.retweet_count;
+        
+        // ONLY trigger confetti if we just ADDED a retweet
+        if (!wasRetweeted && isNowRetweeted) {
+          // Trigger confetti effect - ONLY ONCE
+          triggerRetweetEffect(btn);
+        }
+
+      } catch (err) {
+        console.error(err);
+        alert("Erreur retweet : " + err.message);
+      } finally {
+        btn.disabled = false;
+      }
+    });
+  });
+}
+document.addEventListener("DOMContentLoaded", () => bindRetweetButtons(document));
+
+/* AJAX MODAL COMMENTAIRES - Updated to match profile */
+let currentTweetId = null;
+
+// Ouvrir modal avec commentaires
+function bindCommentButtons(root) {
+  root.querySelectorAll('.view-comments-btn').forEach(btn => {
+    btn.addEventListener('click', async (e) => {
+      e.stopPropagation();
+      currentTweetId = btn.dataset.tweetId;
+      document.getElementById('commentsModal').style.display = 'flex';
+      await loadComments(currentTweetId);
+    });
+  });
+}
+bindCommentButtons(document);
+
+// Close modal with X button or clicking outside
+function closeCommentModal() {
+  document.getElementById('commentsModal').style.display = 'none';
+  document.getElementById('commentsList').innerHTML = '';
+  currentTweetId = null;
+}
+
+// Close when clicking outside modal
+document.addEventListener('click', (e) => {
+  const modal = document.getElementById('commentsModal');
+  if (modal.style.display === 'flex' && e.target === modal) {
+    closeCommentModal();
+  }
+});
+
+// Charger les commentaires (updated with profile pictures)
+async function loadComments(tweetId) {
+  try {
+    const res = await fetch(`/comments/${tweetId}`);
+    const data = await res.json();
+    const container = document.getElementById('commentsList');
+    container.innerHTML = '';
+
+    if (data.success && data.comments && data.comments.length > 0) {
+      data.comments.forEach((comment, idx) => {
+        const commentDiv = document.createElement('div');
+        commentDiv.classList.add('comment-item');
+        
+        // Créer HTML du commentaire principal AVEC PHOTO DE PROFIL
+        let commentHtml = `
+          <div class="comment-header">
+            <img src="${comment.profile_pic_url || '/static/default-avatar.png'}" 
+                class="comment-profile-pic" 
+                alt="${comment.username}"
+                onclick="window.location.href='/profile/${comment.username}'"
+                style="cursor:pointer;">
+            <strong class="comment-username" 
+                    onclick="window.location.href='/profile/${comment.username}'"
+                    style="cursor:pointer;">
+              ${comment.username}
+            </strong>
+          </div>
+          <div class="comment-content">${comment.content}</div>
+          <button class="reply-btn" data-index="${idx}">Répondre</button>
+        `;
+        
+        // Ajouter les réponses si elles existent AVEC PHOTOS DE PROFIL
+        if (comment.replies && comment.replies.length > 0) {
+          commentHtml += '<div class="comment-replies" style="margin-top: 8px;">';
+          comment.replies.forEach(reply => {
+          commentHtml += `
+            <div class="comment-reply">
+              <div class="comment-header">
+                <img src="${reply.profile_pic_url || '/static/default-avatar.png'}" 
+                    class="comment-profile-pic" 
+                    alt="${reply.username}"
+                    onclick="window.location.href='/profile/${reply.username}'"
+                    style="width: 24px; height: 24px; cursor:pointer;">
+                <strong class="comment-username" 
+                        onclick="window.location.href='/profile/${reply.username}'"
+                        style="cursor:pointer;">
+                  ${reply.username}
+                </strong>
+              </div>
+              <div class="comment-content">${reply.content}</div>
+            </div>
+          `;
+        });
+          commentHtml += '</div>';
+        }
+        
+        commentDiv.innerHTML = commentHtml;
+        container.appendChild(commentDiv);
+
+        // Ajouter l'événement pour répondre
+        const replyBtn = commentDiv.querySelector('.reply-btn');
+        replyBtn.addEventListener('click', (e) => {
+          e.stopPropagation();
+          
+          // Supprimer tout formulaire de réponse existant
+          const existingForm = commentDiv.querySelector('.reply-form');
+          if (existingForm) existingForm.remove();
+          
+          // Créer le formulaire de réponse
+          const replyForm = document.createElement('form');
+          replyForm.classList.add('reply-form');
+          replyForm.style.marginTop = '8px';
+          replyForm.innerHTML = `
+            <textarea name="replyContent" placeholder="Répondre à ${comment.username}..." required 
+                      style="width: 100%; padding: 8px; border-radius: 6px; border: 1px solid rgba(255,255,255,0.1); 
+                             background: rgba(255,255,255,0.05); color: #e6eef8; font-size: 13px;"></textarea>
+            <div style="display: flex; gap: 8px; margin-top: 6px;">
+              <button type="submit" style="padding: 6px 12px; background: linear-gradient(90deg,#06b6d4,#7c3aed); 
+                     border: none; border-radius: 6px; color: #021024; font-size: 13px; cursor: pointer;">
+                Envoyer
+              </button>
+              <button type="button" class="cancel-reply" style="padding: 6px 12px; background: rgba(255,255,255,0.1); 
+                     border: none; border-radius: 6px; color: var(--muted); font-size: 13px; cursor: pointer;">
+                Annuler
+              </button>
+            </div>
+          `;
+          
+          commentDiv.appendChild(replyForm);
+          
+          // Annuler la réponse
+          replyForm.querySelector('.cancel-reply').addEventListener('click', () => {
+            replyForm.remove();
+          });
+          
+          // Envoyer la réponse
+          replyForm.addEventListener('submit', async (submitEvent) => {
+            submitEvent.preventDefault();
+            const content = replyForm.replyContent.value.trim();
+            if (!content) return;
+            
+            try {
+              const res = await fetch(`/reply_comment/${tweetId}/${idx}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ content })
+              });
+              
+              const result = await res.json();
+              if (result.success) {
+                await loadComments(tweetId); // Recharger les commentaires
+              } else {
+                alert(result.message);
+              }
+            } catch (error) {
+              console.error('Error replying:', error);
+              alert('Erreur lors de l\'envoi de la réponse');
+            }
+          });
+        });
+      });
+    } else {
+      container.innerHTML = '<p style="text-align:center; color:var(--muted); padding: 20px;">Aucun commentaire pour le moment.</p>';
+    }
+  } catch (error) {
+    console.error('Error loading comments:', error);
+    container.innerHTML = '<p style="color:#f87171; text-align:center; padding: 20px;">Erreur de chargement des commentaires</p>';
+  }
+}
+
+// Ajouter un nouveau commentaire
+document.getElementById('newCommentForm').addEventListener('submit', async (e) => {
+  e.preventDefault();
+  const content = e.target.content.value.trim();
+  if (!content || !currentTweetId) return;
+
+  const formData = new FormData();
+  formData.append('content', content);
+
+  try {
+    const res = await fetch(`/comment/${currentTweetId}`, {
+      method: 'POST',
+      body: formData
+    });
+    const data = await res.json();
+    if (data.success) {
+      e.target.content.value = '';
+      await loadComments(currentTweetId);
+    } else {
+      alert(data.message);
+    }
+  } catch (error) {
+    console.error('Error adding comment:', error);
+    alert('Erreur lors de l\'ajout du commentaire');
+  }
+});
+
+/* AUTO-HIDE FLASH MESSAGES */
+document.addEventListener('DOMContentLoaded', () => {
+  const flashMessages = document.querySelectorAll('.flash-message');
+  
+  flashMessages.forEach(message => {
+    const delay = message.dataset.delay || 3000; // Default 3 seconds
+    
+    // Auto-remove after delay
+    setTimeout(() => {
+      message.style.animation = 'fadeOut 0.3s ease-out forwards';
+      setTimeout(() => message.remove(), 300); // Wait for animation
+    }, delay);
+    
+    // Remove on click (optional)
+    message.addEventListener('click', (e) => {
+      if (!e.target.classList.contains('flash-close')) {
+        message.style.animation = 'fadeOut 0.3s ease-out forwards';
+        setTimeout(() => message.remove(), 300);
+      }
+    });
+  });
+});
+
+/* Perfect localized button confetti */
+function triggerRetweetEffect(button) {
+  const rect = button.getBoundingClientRect();
+  const buttonX = rect.left + rect.width / 2;
+  const buttonY = rect.top + rect.height / 2;
+  
+  // Calculate button boundaries
+  const buttonWidth = rect.width;
+  const buttonHeight = rect.height;
+  
+  // Confetti that stays within button area
+  confetti({
+    particleCount: 25,
+    angle: 90,
+    spread: 40,
+    startVelocity: 18, // Slow enough to stay near
+    origin: { 
+      x: buttonX / window.innerWidth, 
+      y: buttonY / window.innerHeight 
+    },
+    colors: ['#5eead4', '#06b6d4'],
+    gravity: 1.0, // Balanced gravity
+    scalar: 0.5, // Small particles
+    ticks: 70,
+    decay: 0.9,
+    drift: 0.3,
+    shapes: ['circle'],
+    
+    // Custom positioning to keep near button
+    disableForReducedMotion: true
+  });
+  
+  // Button visual feedback
+  const originalBorder = button.style.borderColor;
+  const originalBg = button.style.background;
+  
+  button.style.borderColor = '#5eead4';
+  button.style.boxShadow = '0 0 10px rgba(94, 234, 212, 0.5)';
+  
+  setTimeout(() => {
+    button.style.borderColor = originalBorder;
+    button.style.boxShadow = '';
+  }, 300);
+}
+
+/* ====================
+   SECRET TIGER ROAR EASTER EGG
+   Click logo 3 times quickly to trigger
+   ==================== */
+document.addEventListener('DOMContentLoaded', function() {
+  const logo = document.querySelector('.logo');
+  const roarSound = document.getElementById('tigerRoar');
+  
+  if (!logo || !roarSound) return; // Exit if elements not found
+  
+  let clickCount = 0;
+  let clickTimer;
+  const CLICK_TIMEOUT = 1000; // 1 second to click 3 times
+  
+  // Handle logo clicks
+  logo.addEventListener('click', function(e) {
+    e.stopPropagation();
+    
+    // Increment click counter
+    clickCount++;
+    
+    // Clear previous timer
+    clearTimeout(clickTimer);
+    
+    // Set new timer to reset counter
+    clickTimer = setTimeout(() => {
+      clickCount = 0;
+      console.log('Click counter reset');
+    }, CLICK_TIMEOUT);
+    
+    // Visual feedback for each click
+    logo.style.transition = 'transform 0.1s';
+    logo.style.transform = 'scale(0.95)';
+    setTimeout(() => {
+      logo.style.transform = 'scale(1)';
+    }, 100);
+    
+    console.log(`Click ${clickCount}/3`);
+    
+    // Check if 3 clicks reached
+    if (clickCount === 3) {
+      console.log('🎯 Triple click detected! Playing tiger roar...');
+      clickCount = 0; // Reset immediately
+      clearTimeout(clickTimer);
+      
+      // PLAY THE ROAR
+      playTigerRoar();
+    }
+  });
+  
+  // Function to play the roar
+  function playTigerRoar() {
+    // Reset audio to start
+    roarSound.currentTime = 0;
+    
+    // Set volume (0.0 to 1.0)
+    roarSound.volume = 0.6;
+    
+    // Play the sound
+    roarSound.play()
+      .then(() => {
+        console.log('✅ Tiger roar playing!');
+        showRoarEffect();
+      })
+      .catch(error => {
+        console.error('❌ Audio error:', error);
+        // Fallback: Show visual effect anyway
+        showRoarEffect();
+        showFallbackMessage();
+      });
+  }
+  
+  // Visual effect when roar plays
+  function showRoarEffect() {
+    // 1. Logo animation
+    logo.style.animation = 'tigerRoarAnimation 1s ease-in-out';
+    
+    // 2. Page shake effect
+    document.body.style.animation = 'pageShake 0.5s ease-in-out';
+    
+    // 3. Remove animations after they complete
+    setTimeout(() => {
+      logo.style.animation = '';
+      document.body.style.animation = '';
+    }, 1000);
+    
+    // 4. Show notification
+    showRoarNotification();
+  }
+  
+  // Show a cool notification
+  function showRoarNotification() {
+    // Remove any existing notification
+    const oldNote = document.getElementById('roarNotification');
+    if (oldNote) oldNote.remove();
+    
+    // Create new notification
+    const notification = document.createElement('div');
+    notification.id = 'roarNotification';
+    notification.innerHTML = `
+      <div style="display: flex; align-items: center; gap: 10px;">
+        <span style="font-size: 24px;">🐯</span>
+        <div>
+          <strong style="color: #fbbf24;">TIGER ROAR!</strong>
+          <div style="font-size: 12px; opacity: 0.8;">Easter egg unlocked!</div>
+        </div>
+        <span style="font-size: 24px;">🐅</span>
+      </div>
+    `;
+    
+    // Style the notification
+    notification.style.cssText = `
+      position: fixed;
+      top: 20px;
+      left: 50%;
+      transform: translateX(-50%);
+      background: rgba(15, 23, 36, 0.95);
+      color: #fbbf24;
+      padding: 15px 25px;
+      border-radius: 12px;
+      border: 2px solid #f59e0b;
+      box-shadow: 0 0 30px rgba(245, 158, 11, 0.4);
+      z-index: 99999;
+      animation: slideInDown 0.5s ease-out, fadeOutUp 0.5s ease-in 2.5s forwards;
+      backdrop-filter: blur(10px);
+      min-width: 250px;
+      text-align: center;
+    `;
+    
+    document.body.appendChild(notification);
+    
+    // Auto-remove after 3 seconds
+    setTimeout(() => {
+      if (notification.parentNode) {
+        notification.remove();
+      }
+    }, 3000);
+  }
+  
+  // Fallback if audio doesn't play
+  function showFallbackMessage() {
+    const fallback = document.createElement('div');
+    fallback.textContent = '🐯 ROAR! 🐯';
+    fallback.style.cssText = `
+      position: fixed;
+      top: 50%;
+      left: 50%;
+      transform: translate(-50%, -50%);
+      font-size: 48px;
+      font-weight: bold;
+      color: #f59e0b;
+      z-index: 99998;
+      animation: pulse 1s ease-in-out;
+      text-shadow: 0 0 20px rgba(245, 158, 11, 0.8);
+    `;
+    
+    document.body.appendChild(fallback);
+    setTimeout(() => fallback.remove(), 1000);
+  }
+  
+  // Add CSS animations
+  const style = document.createElement('style');
+  style.textContent = `
+    /* Tiger roar logo animation */
+    @keyframes tigerRoarAnimation {
+      0% { transform: scale(1) rotate(0deg); filter: brightness(1); }
+      20% { transform: scale(1.3) rotate(-5deg); filter: brightness(1.8) drop-shadow(0 0 15px #f59e0b); }
+      40% { transform: scale(1.2) rotate(5deg); filter: brightness(2) drop-shadow(0 0 25px #fbbf24); }
+      60% { transform: scale(1.25) rotate(-3deg); filter: brightness(1.9) drop-shadow(0 0 20px #f59e0b); }
+      80% { transform: scale(1.15) rotate(2deg); filter: brightness(1.5) drop-shadow(0 0 10px #fbbf24); }
+      100% { transform: scale(1) rotate(0deg); filter: brightness(1); }
+    }
+    
+    /* Page shake effect */
+    @keyframes pageShake {
+      0%, 100% { transform: translateX(0); }
+      10%, 30%, 50%, 70%, 90% { transform: translateX(-5px); }
+      20%, 40%, 60%, 80% { transform: translateX(5px); }
+    }
+    
+    /* Notification animations */
+    @keyframes slideInDown {
+      from { top: -100px; opacity: 0; }
+      to { top: 20px; opacity: 1; }
+    }
+    
+    @keyframes fadeOutUp {
+      from { top: 20px; opacity: 1; }
+      to { top: -100px; opacity: 0; }
+    }
+    
+    /* Fallback pulse */
+    @keyframes pulse {
+      0% { transform: translate(-50%, -50%) scale(1); opacity: 1; }
+      50% { transform: translate(-50%, -50%) scale(1.3); opacity: 0.8; }
+      100% { transform: translate(-50%, -50%) scale(1); opacity: 0; }
+    }
+    
+    /* Make logo clickable */
+    .logo {
+      cursor: pointer;
+      transition: transform 0.2s ease;
+    }
+    
+    .logo:hover {
+      transform: scale(1.05);
+      filter: drop-shadow(0 0 8px rgba(94, 234, 212, 0.3));
+    }
+  `;
+  
+  document.head.appendChild(style);
+  
+  // Debug helper
+  console.log('🐯 Tiger roar easter egg loaded! Click logo 3 times quickly.');
+});
+
+// Helper to check if audio can play
+function canPlayAudio() {
+  const audio = document.createElement('audio');
+  return !!(audio.canPlayType && audio.canPlayType('audio/wav; codecs="1"'));
+}
+
+// Check on page load
+document.addEventListener('DOMContentLoaded', () => {
+  if (!canPlayAudio()) {
+    console.warn('⚠️ Browser may not support WAV audio');
+  }
+});
+
+/* NOUVEAUX TWEETS RENDUS CÔTÉ CLIENT
+ * Le lien « nouveaux tweets » porte data-latest-url (/api/feed?after=...) :
+ * au clic, seuls les tweets publiés depuis sont demandés en JSON et insérés
+ * en tête, sans recharger la page. Sans cette URL (ou en cas d'erreur),
+ * le lien recharge le fil normalement.
+ */
+function escapeHtml(text) {
+  const div = document.createElement('div');
+  div.textContent = text == null ? '' : String(text);
+  return div.innerHTML;
+}
+
+// Même structure que templates/_feed_posts.html
+function renderPost(tweet, author) {
+  const profileUrl = `/profile/${encodeURIComponent(author.username)}`;
+  const images = tweet.image_urls.length ? `
+        <div class="tweet-grid">
+          ${tweet.image_urls.map(img => `<img src="${escapeHtml(img)}" class="tweet-img" data-src="${escapeHtml(img)}">`).join('')}
+        </div>` : '';
+  const tpl = document.createElement('template');
+  tpl.innerHTML = `
+  <div class="post" id="post-${tweet.id}" data-post-id="${tweet.id}">
+    <div style="display:flex; align-items:flex-start; gap:12px;">
+      <img src="${escapeHtml(author.profile_pic_url)}" alt="Profil" data-href="${profileUrl}" style="cursor:pointer;">
+      <div style="flex:1;">
+        <strong style="cursor:pointer;" data-href="${profileUrl}">${escapeHtml(author.username)}</strong>
+        <p>${escapeHtml(tweet.content)}</p>${images}
+      </div>
+    </div>
+  <div class="post-buttons">
+    <button class="retweet-btn ${tweet.retweeted ? 'retweeted' : ''}" data-tweet-id="${tweet.id}">
+      🔄 <span class="retweet-count">${tweet.counts.retweets}</span>
+    </button>
+    <button class="like-btn ${tweet.liked ? 'liked' : ''}" data-tweet-id="${tweet.id}">
+      ❤️ <span class="like-count">${tweet.counts.likes}</span>
+    </button>
+    <button class="view-comments-btn" data-tweet-id="${tweet.id}">
+      💬 <span class="comment-count">${tweet.counts.comments}</span>
+    </button>
+  </div>
+  </div>`;
+  const node = tpl.content.firstElementChild;
+  node.querySelectorAll('[data-href]').forEach(el => {
+    el.addEventListener('click', () => { window.location.href = el.dataset.href; });
+  });
+  node.querySelectorAll('.tweet-img').forEach(img => {
+    img.addEventListener('click', () => openImageModal(img.dataset.src));
+  });
+  return node;
+}
+
+async function loadLatestTweets(link) {
+  let url = link.dataset.latestUrl;
+  const posts = [];
+  const defaults = { username: 'Utilisateur', profile_pic_url: '/static/default-avatar.png' };
+  // Les pages de nouveautés arrivent de la plus ancienne à la plus récente
+  for (let pages = 0; url && pages < 5; pages++) {
+    const res = await fetch(url);
+    const data = await res.json();
+    if (!data.success) throw new Error(data.message || 'Erreur');
+    if (!data.tweets.length) break;
+    posts.unshift(...data.tweets.map(tweet => renderPost(tweet, data.authors[tweet.author] || defaults)));
+    link.dataset.latestUrl = data.newer_url;
+    url = data.newer_url;
+  }
+  // Du plus récent au plus ancien : chaque insertion se fait juste sous le lien, en partant du bas
+  posts.reverse().forEach(node => {
+    link.after(node);
+    bindLikeButtons(node);
+    bindRetweetButtons(node);
+    bindCommentButtons(node);
+  });
+  link.hidden = true;
+}
+
+function setupLatestTweets(link, onLoaded) {
+  if (!link || !link.dataset.latestUrl) return;
+  link.addEventListener('click', async e => {
+    e.preventDefault();
+    try {
+      await loadLatestTweets(link);
+      if (onLoaded) onLoaded();
+    } catch (err) {
+      console.error(err);
+      window.location.href = link.href;
+    }
+  });
+}
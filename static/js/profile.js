@@ -0,0 +1,408 @@
+// LIKE AJAX
+function bindLikeButtons(root) {
+  root.querySelectorAll('.like-btn').forEach(btn => {
+    btn.addEventListener('click', async (e) => {
+      e.stopPropagation();
+      const tweetId = btn.dataset.tweetId;
+      const countEl = btn.querySelector('.like-count');
+      btn.disabled = true;
+      try {
+        const data = await queueInteraction({ op: 'like', tweet_id: Number(tweetId) });
+        if(data.success){
+          countEl.textContent = data.like_count;
+          btn.classList.toggle('liked', data.liked);
+        }
+      } finally {
+        btn.disabled = false;
+      }
+    });
+  });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+
+  const overlay = document.getElementById('overlay');
+  const followersPopup = document.getElementById('followers-popup');
+  const followingPopup = document.getElementById('following-popup');
+  const editBtn = document.getElementById('open-edit-profile');
+  const editModal = document.getElementById('edit-profile-modal');
+  const closeEdit = document.getElementById('close-edit');
+  const editForm = document.getElementById('edit-profile-form');
+  const profileImg = document.getElementById('profilePictureDisplay');
+  const usernameDisplay = document.getElementById('usernameDisplay');
+
+  function openPopup(popup) {
+    overlay.style.display = 'block';
+    popup.style.display = 'block';
+  }
+
+  function closePopup() {
+    overlay.style.display = 'none';
+    followersPopup.style.display = 'none';
+    followingPopup.style.display = 'none';
+    if(editModal) editModal.style.display = 'none';
+  }
+
+  document.getElementById('show-followers').addEventListener('click', e => {
+    e.preventDefault(); openPopup(followersPopup);
+  });
+
+  document.getElementById('show-following').addEventListener('click', e => {
+    e.preventDefault(); openPopup(followingPopup);
+  });
+
+  overlay.addEventListener('click', closePopup);
+
+ // LIKE AJAX
+  bindLikeButtons(document);
+
+  // EDIT PROFILE POPUP
+  if(editBtn && editModal){
+    editBtn.addEventListener('click', e => {
+      e.preventDefault();
+      overlay.style.display = 'block';
+      editModal.style.display = 'block';
+      return false;
+    });
+  }
+
+  if(closeEdit){
+    closeEdit.addEventListener('click', closePopup);
+  }
+
+  // Submit du formulaire de modification
+  if(editForm){
+    editForm.addEventListener('submit', async e => {
+      e.preventDefault();
+      const formData = new FormData(editForm);
+      const res = await fetch('/profile/edit', {
+        method: 'POST',
+        body: formData
+      });
+      if(res.redirected){
+        window.location.href = res.url;
+      } else {
+        const data = await res.json().catch(()=>{});
+        alert(data?.error || "Erreur lors de la modification.");
+      }
+    });
+  }
+
+  // FOLLOW / UNFOLLOW AJAX
+  const followBtn = document.getElementById('follow-btn');
+  if(followBtn){
+    followBtn.addEventListener('click', async () => {
+      const username = followBtn.dataset.username;
+      let isFollowing = followBtn.dataset.following === 'true';
+      followBtn.disabled = true;
+      try {
+        const res = await fetch(`/toggle_follow/${username}`, { method: 'POST' });
+        if(!res.ok) throw new Error('Erreur réseau');
+        const data = await res.json();
+        if(data.is_following){
+          followBtn.textContent = "Se désabonner";
+          followBtn.dataset.following = 'true';
+        } else {
+          followBtn.textContent = "Suivre";
+          followBtn.dataset.following = 'false';
+        }
+        // Met à jour le compteur d'abonnés
+        const followersCountEl = document.getElementById('followers-count');
+        if(followersCountEl){
+          followersCountEl.textContent = data.followers_count;
+        }
+      } catch(err){
+        console.error(err);
+        alert('Erreur : ' + err.message);
+      } finally {
+        followBtn.disabled = false;
+      }
+    });
+  }
+
+});
+
+// AJAX RETWEET - Update this function in profile.html
+function bindRetweetButtons(root) {
+  root.querySelectorAll(".retweet-btn").forEach(btn => {
+    btn.addEventListener("click", async () => {
+      const tweetId = btn.dataset.tweetId;
+      const countEl = btn.querySelector(".retweet-count");
+      
+      btn.disabled = true;
+      
+      try {
+        const data = await queueInteraction({ op: "retweet", tweet_id: Number(tweetId) });
+
+        if (!data.success) throw new Error(data.error || "Erreur");
+
+        // Get current state BEFORE updating
+        const wasRetweeted = btn.classList.contains("retweeted");
+        const isNowRetweeted = data.is_retweeted;
+        
+        // Change visual state
+        btn.classList.toggle("retweeted", isNowRetweeted);
+        
+        // Update counter
+        countEl.textContent = data.retweet_count;
+        
+        // ONLY trigger confetti if we just ADDED a retweet
+        if (!wasRetweeted && isNowRetweeted) {
+          // Trigger confetti effect - ONLY ONCE
+          triggerRetweetEffect(btn);
+        }
+
+      } catch (err) {
+        console.error(err);
+        alert("Erreur retweet : " + err.message);
+      } finally {
+        btn.disabled = false;
+      }
+    });
+  });
+}
+document.addEventListener("DOMContentLoaded", () => bindRetweetButtons(document));
+
+// Prévisualisation photo
+function previewPicture(event) {
+  const output = document.getElementById('previewImg');
+  const headerImg = document.getElementById('profilePictureDisplay');
+  const file = event.target.files[0];
+  if (!file) return;
+  const url = URL.createObjectURL(file);
+  output.src = url;
+  headerImg.src = url;
+}
+
+function openImageModal(src) {
+  const modal = document.getElementById("imgModal");
+  const modalImg = document.getElementById("modalImage");
+  modalImg.src = src;
+  modal.style.display = "flex";
+}
+
+function closeImageModal() {
+  document.getElementById("imgModal").style.display = "none";
+}
+
+/*AJAX MODAL COMMENTAIRES */
+let currentTweetId = null;
+
+// Ouvrir modal avec commentaires
+function bindCommentButtons(root) {
+  root.querySelectorAll('.view-comments-btn').forEach(btn => {
+    btn.addEventListener('click', async (e) => {
+      e.stopPropagation(); // Prevent event from bubbling up
+      currentTweetId = btn.dataset.tweetId;
+      document.getElementById('commentsModal').style.display = 'flex';
+      await loadComments(currentTweetId);
+    });
+  });
+}
+bindCommentButtons(document);
+
+// Close modal with X button or clicking outside
+function closeCommentModal() {
+  document.getElementById('commentsModal').style.display = 'none';
+  document.getElementById('commentsList').innerHTML = '';
+  currentTweetId = null;
+}
+
+// Close when clicking outside modal
+document.addEventListener('click', (e) => {
+  const modal = document.getElementById('commentsModal');
+  if (modal.style.display === 'flex' && e.target === modal) {
+    closeCommentModal();
+  }
+});
+
+// Charger les commentaires (updated with profile pictures)
+async function loadComments(tweetId) {
+  try {
+    const res = await fetch(`/comments/${tweetId}`);
+    const data = await res.json();
+    const container = document.getElementById('commentsList');
+    container.innerHTML = '';
+
+    if (data.success && data.comments && data.comments.length > 0) {
+      data.comments.forEach((comment, idx) => {
+        const commentDiv = document.createElement('div');
+        commentDiv.classList.add('comment-item');
+        
+        // Créer HTML du commentaire principal AVEC PHOTO DE PROFIL
+        let commentHtml = `
+          <div class="comment-header">
+            <img src="${comment.profile_pic_url || '/static/default-avatar.png'}" 
+                class="comment-profile-pic" 
+                alt="${comment.username}"
+                onclick="window.location.href='/profile/${comment.username}'"
+                style="cursor:pointer;">
+            <strong class="comment-username" 
+                    onclick="window.location.href='/profile/${comment.username}'"
+                    style="cursor:pointer;">
+              ${comment.username}
+            </strong>
+          </div>
+          <div class="comment-content">${comment.content}</div>
+          <button class="reply-btn" data-index="${idx}">Répondre</button>
+        `;
+        
+        // Ajouter les réponses si elles existent AVEC PHOTOS DE PROFIL
+        if (comment.replies && comment.replies.length > 0) {
+          commentHtml += '<div class="comment-replies" style="margin-top: 8px;">';
+          comment.replies.forEach(reply => {
+          commentHtml += `
+            <div class="comment-reply">
+              <div class="comment-header">
+                <img src="${reply.profile_pic_url || '/static/default-avatar.png'}" 
+                    class="comment-profile-pic" 
+                    alt="${reply.username}"
+                    onclick="window.location.href='/profile/${reply.username}'"
+                    style="width: 24px; height: 24px; cursor:pointer;">
+                <strong class="comment-username" 
+                        onclick="window.location.href='/profile/${reply.username}'"
+                        style="cursor:pointer;">
+                  ${reply.username}
+                </strong>
+              </div>
+              <div class="comment-content">${reply.content}</div>
+            </div>
+          `;
+        });
+          commentHtml += '</div>';
+        }
+        
+        commentDiv.innerHTML = commentHtml;
+        container.appendChild(commentDiv);
+
+        // Ajouter l'événement pour répondre
+        const replyBtn = commentDiv.querySelector('.reply-btn');
+        replyBtn.addEventListener('click', (e) => {
+          e.stopPropagation();
+          
+          // Supprimer tout formulaire de réponse existant
+          const existingForm = commentDiv.querySelector('.reply-form');
+          if (existingForm) existingForm.remove();
+          
+          // Créer le formulaire de réponse
+          const replyForm = document.createElement('form');
+          replyForm.classList.add('reply-form');
+          replyForm.style.marginTop = '8px';
+          replyForm.innerHTML = `
+            <textarea name="replyContent" placeholder="Répondre à ${comment.username}..." required 
+                      style="width: 100%; padding: 8px; border-radius: 6px; border: 1px solid rgba(255,255,255,0.1); 
+                             background: rgba(255,255,255,0.05); color: #e6eef8; font-size: 13px;"></textarea>
+            <div style="display: flex; gap: 8px; margin-top: 6px;">
+              <button type="submit" style="padding: 6px 12px; background: linear-gradient(90deg,#06b6d4,#7c3aed); 
+                     border: none; border-radius: 6px; color: #021024; font-size: 13px; cursor: pointer;">
+                Envoyer
+              </button>
+              <button type="button" class="cancel-reply" style="padding: 6px 12px; background: rgba(255,255,255,0.1); 
+                     border: none; border-radius: 6px; color: var(--muted); font-size: 13px; cursor: pointer;">
+                Annuler
+              </button>
+            </div>
+          `;
+          
+          commentDiv.appendChild(replyForm);
+          
+          // Annuler la réponse
+          replyForm.querySelector('.cancel-reply').addEventListener('click', () => {
+            replyForm.remove();
+          });
+          
+          // Envoyer la réponse
+          replyForm.addEventListener('submit', async (submitEvent) => {
+            submitEvent.preventDefault();
+            const content = replyForm.replyContent.value.trim();
+            if (!content) return;
+            
+            try {
+              const res = await fetch(`/reply_comment/${tweetId}/${idx}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({ content })
+              });
+              
+              const result = await res.json();
+              if (result.success) {
+                await loadComments(tweetId); // Recharger les commentaires
+              } else {
+                alert(result.message);
+              }
+            } catch (error) {
+              console.error('Error replying:', error);
+              alert('Erreur lors de l\'envoi de la réponse');
+            }
+          });
+        });
+      });
+    } else {
+      container.innerHTML = '<p style="text-align:center; color:var(--muted); padding: 20px;">Aucun commentaire pour le moment.</p>';
+    }
+  } catch (error) {
+    console.error('Error loading comments:', error);
+    container.innerHTML = '<p style="color:#f87171; text-align:center; padding: 20px;">Erreur de chargement des commentaires</p>';
+  }
+}
+
+// Ajouter un nouveau commentaire
+document.getElementById('newCommentForm').addEventListener('submit', async (e) => {
+  e.preventDefault();
+  const content = e.target.content.value.trim();
+  if(!content || !currentTweetId) return;
+
+  const formData = new FormData();
+  formData.append('content', content);
+
+  try {
+    const res = await fetch(`/comment/${currentTweetId}`, {
+      method: 'POST',
+      body: formData
+    });
+    const data = await res.json();
+    if(data.success){
+      e.target.content.value = '';
+      await loadComments(currentTweetId);
+    } else {
+      alert(data.message);
+    }
+  } catch (error) {
+    console.error('Error adding comment:', error);
+    alert('Erreur lors de l\'ajout du commentaire');
+  }
+});
+
+/* Perfect localized button confetti - Same as feed */
+function triggerRetweetEffect(button) {
+  const rect = button.getBoundingClientRect();
+  const buttonX = rect.left + rect.width / 2;
+  const buttonY = rect.top + rect.height / 2;
+  
+  // Confetti that stays within button area
+  confetti({
+    particleCount: 25,
+    angle: 90,
+    spread: 40,
+    startVelocity: 18,
+    origin: { 
+      x: buttonX / window.innerWidth, 
+      y: buttonY / window.innerHeight 
+    },
+    colors: ['#5eead4', '#06b6d4'],
+    gravity: 1.0,
+    scalar: 0.5,
+    ticks: 70,
+    decay: 0.9,
+    drift: 0.3,
+    shapes: ['circle'],
+    disableForReducedMotion: true
+  });
+  
+  // Button visual feedback
+  button.style.boxShadow = '0 0 10px rgba(94, 234, 212, 0.5)';
+  
+  setTimeout(() => {
+    button.style.boxShadow = '';
+  }, 300);
+}
@@ -0,0 +1,30 @@
+/* ÉVÉNEMENTS EN DIRECT
+ * Flux Server-Sent Events de /events : nouvelles notifications et nouveaux
+ * tweets des abonnements, sans recharger la page. Après une coupure, le
+ * navigateur se reconnecte seul en envoyant Last-Event-ID et reçoit ce
+ * qu'il a manqué ; "resync" signale que ce n'était plus possible.
+ * handlers : { notification(data), tweet(data), resync() }.
+ */
+function setupLiveEvents(handlers) {
+  if (!('EventSource' in window)) return null;
+  const source = new EventSource('/events');
+  Object.keys(handlers).forEach(type => {
+    source.addEventListener(type, e => handlers[type](e.data ? JSON.parse(e.data) : {}));
+  });
+  return source;
+}
+
+/* Pastille du nombre de notifications non lues */
+function updateNotifBadge(unread) {
+  const badge = document.querySelector('.notif-badge');
+  if (!badge) return;
+  badge.textContent = unread;
+  badge.hidden = !unread;
+}
+
+/* Lien « nouveaux tweets » en haut d'une liste (rechargement de la première page) */
+function showNewTweets(link, count) {
+  if (!link) return;
+  link.textContent = count === 1 ? '1 nouveau tweet' : `${count} nouveaux tweets`;
+  link.hidden = false;
+}
@@ -21,12 +21,19 @@ case "$1" in
         echo "  ↳ Pulling tweets.json and users.json..."
         scp -i $KEY $VM:$VM_DATA/tweets.json $LOCAL_DATA/
         scp -i $KEY $VM:$VM_DATA/users.json $LOCAL_DATA/
+        # Version du format des données (voir utils/migrations.py), toujours avec les fichiers
+        scp -i $KEY $VM:$VM_DATA/schema.json $LOCAL_DATA/ 2>/dev/null || rm -f $LOCAL_DATA/schema.json
+        # Journal des mutations de tweets (rejoué par-dessus tweets.json)
+        scp -i $KEY $VM:$VM_DATA/tweets.json.log $LOCAL_DATA/ 2>/dev/null || : > $LOCAL_DATA/tweets.json.log
         
-        # 2. Pull notifications.json (backend/data/)
-        echo "  ↳ Pulling notifications.json..."
+        # 2. Pull des boîtes de notifications (backend/data/notifications/, une par utilisateur)
+        echo "  ↳ Pulling notifications..."
         # Créer le dossier local s'il n'existe pas
         mkdir -p $LOCAL_BACKEND_DATA
-        scp -i $KEY $VM:$VM_BACKEND_DATA/notifications.json $LOCAL_BACKEND_DATA/
+        rsync -az --delete -e "ssh -i $KEY" $VM:$VM_BACKEND_DATA/notifications/ $LOCAL_BACKEND_DATA/notifications/
+        
+        # Timelines d'accueil, index de recherche, références des images et versions (ETag) : données dérivées, recalculées sur place
+        (cd $LOCAL_DIR && python3 -m utils.timelines && python3 -m utils.tweet_search && python3 -m utils.uploads && python3 -m utils.versions)
         
         # 3. Pull uploaded images (optional - can be large)
         read -p "  Download uploaded images too? (y/n): " -n 1 -r
@@ -53,12 +60,19 @@ case "$1" in
             # 1. Push fichiers principaux (data/)
             scp -i $KEY $LOCAL_DATA/tweets.json $VM:$VM_DATA/
             scp -i $KEY $LOCAL_DATA/users.json $VM:$VM_DATA/
+            scp -i $KEY $LOCAL_DATA/schema.json $VM:$VM_DATA/
+            # Le journal doit toujours accompagner son snapshot
+            touch $LOCAL_DATA/tweets.json.log
+            scp -i $KEY $LOCAL_DATA/tweets.json.log $VM:$VM_DATA/
             
-            # 2. Push notifications.json (backend/data/)
-            echo "  ↳ Pushing notifications.json..."
+            # 2. Push des boîtes de notifications (backend/data/notifications/)
+            echo "  ↳ Pushing notifications..."
             # Créer le dossier sur la VM si besoin
             ssh -i $KEY $VM "mkdir -p $VM_BACKEND_DATA"
-            scp -i $KEY $LOCAL_BACKEND_DATA/notifications.json $VM:$VM_BACKEND_DATA/
+            rsync -az --delete -e "ssh -i $KEY" $LOCAL_BACKEND_DATA/notifications/ $VM:$VM_BACKEND_DATA/notifications/
+            
+            # Timelines d'accueil, index de recherche, références des images et versions (ETag) : données dérivées, recalculées sur la VM
+            ssh -i $KEY $VM "cd $VM_DIR && python3 -m utils.timelines && python3 -m utils.tweet_search && python3 -m utils.uploads && python3 -m utils.versions"
             
             echo "✅ Data pushed to VM"
         fi
@@ -115,10 +129,12 @@ case "$1" in
         echo "  ↳ Backing up tweets.json and users.json..."
         scp -i $KEY $VM:$VM_DATA/tweets.json $BACKUP_DIR/ 2>/dev/null || echo "  ⚠️  tweets.json not found"
         scp -i $KEY $VM:$VM_DATA/users.json $BACKUP_DIR/ 2>/dev/null || echo "  ⚠️  users.json not found"
+        scp -i $KEY $VM:$VM_DATA/tweets.json.log $BACKUP_DIR/ 2>/dev/null || echo "  ⚠️  tweets.json.log not found"
+        scp -i $KEY $VM:$VM_DATA/schema.json $BACKUP_DIR/ 2>/dev/null || echo "  ⚠️  schema.json not found"
         
-        # Backup notifications.json
-        echo "  ↳ Backing up notifications.json..."
-        scp -i $KEY $VM:$VM_BACKEND_DATA/notifications.json $BACKUP_BACKEND_DIR/ 2>/dev/null || echo "  ⚠️  notifications.json not found"
+        # Backup des boîtes de notifications
+        echo "  ↳ Backing up notifications..."
+        scp -r -i $KEY $VM:$VM_BACKEND_DATA/notifications $BACKUP_BACKEND_DIR/ 2>/dev/null || echo "  ⚠️  notifications not found"
         
         echo "✅ VM data backed up to: $BACKUP_DIR"
         ;;
@@ -130,7 +146,7 @@ case "$1" in
             echo '=== DATA STATUS ===' && \
             echo 'Tweets: \$(python3 -c \"import json, os; f=\\\"data/tweets.json\\\"; print(len(json.load(open(f))) if os.path.exists(f) else \\\"N/A\\\")\" 2>/dev/null || echo 'N/A')' && \
             echo 'Users: \$(python3 -c \"import json, os; f=\\\"data/users.json\\\"; print(len(json.load(open(f))) if os.path.exists(f) else \\\"N/A\\\")\" 2>/dev/null || echo 'N/A')' && \
-            echo 'Notifications: \$(python3 -c \"import json, os; f=\\\"backend/data/notifications.json\\\"; print(len(json.load(open(f))) if os.path.exists(f) else \\\"N/A\\\")\" 2>/dev/null || echo 'N/A')' && \
+            echo 'Unread notifications: \$(python3 -c \"import json, os; f=\\\"backend/data/notifications/unread.json\\\"; print(sum(c[\\\"unread\\\"] for c in json.load(open(f))) if os.path.exists(f) else \\\"N/A\\\")\" 2>/dev/null || echo 'N/A')' && \
             echo '' && \
             echo '=== APP STATUS ===' && \
             echo 'App running: \$(pgrep -f python3 | wc -l) processes' && \
@@ -144,7 +160,7 @@ case "$1" in
         # Pull ONLY notifications
         echo "📥 Pulling notifications only..."
         mkdir -p $LOCAL_BACKEND_DATA
-        scp -i $KEY $VM:$VM_BACKEND_DATA/notifications.json $LOCAL_BACKEND_DATA/
+        rsync -az --delete -e "ssh -i $KEY" $VM:$VM_BACKEND_DATA/notifications/ $LOCAL_BACKEND_DATA/notifications/
         echo "✅ Notifications pulled from VM"
         ;;
         
@@ -152,7 +168,7 @@ case "$1" in
         # Push ONLY notifications
         echo "📤 Pushing notifications only..."
         ssh -i $KEY $VM "mkdir -p $VM_BACKEND_DATA"
-        scp -i $KEY $LOCAL_BACKEND_DATA/notifications.json $VM:$VM_BACKEND_DATA/
+        rsync -az --delete -e "ssh -i $KEY" $LOCAL_BACKEND_DATA/notifications/ $VM:$VM_BACKEND_DATA/notifications/
         echo "✅ Notifications pushed to VM"
         ;;
         
@@ -165,8 +181,8 @@ case "$1" in
         echo "  full-deploy         - Deploy code + data (overwrites!)"
         echo "  backup-vm           - Backup VM data to local backups/"
         echo "  status              - Check VM status"
-        echo "  pull-notifications  - Pull only notifications.json"
-        echo "  push-notifications  - Push only notifications.json"
+        echo "  pull-notifications  - Pull only notifications"
+        echo "  push-notifications  - Push only notifications"
         echo ""
         echo "📌 Recommended workflow:"
         echo "  1. ./sync.sh pull              # Get latest VM data"
@@ -0,0 +1,136 @@
+"""
+Fixtures communes aux tests.
+
+Clients de l'application : `client` (anonyme) et `authed_client` (connecté
+en tant que nlkris, l'utilisateur 3 des données du dépôt).
+
+Budgets d'accès au stockage, pour repérer les accès N+1 et les relectures
+complètes ajoutées par mégarde dans une route. La fixture `storage_budget` compte, pendant un bloc, les accès à chaque
+JsonStore de utils.data_manager (désignés par leur nom : "tweets.json",
+"users.json", "notifications/inbox"...) :
+- lectures : read, get, get_many, members, max_value, page, count ;
+- écritures : réécritures du fichier et ajouts au journal (un lot
+  batch() compte pour une) ;
+- enregistrements parcourus : tout le fichier pour read, les trouvés pour
+  get / get_many / members, les examinés pour page.
+
+    def test_feed(authed_client, storage_budget):
+        with storage_budget(reads={"tweets.json": 1}, writes=0, scanned=50):
+            authed_client.get("/feed")
+
+Un budget par store (dict) ou global (nombre) ; un store absent d'un dict
+n'est pas limité. Le bloc échoue avec le détail des accès s'il est dépassé.
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from utils.data_manager import JsonStore
+
+READ_METHODS = ('read', 'get', 'get_many', 'members', 'max_value', 'page', 'count')
+WRITE_METHODS = ('write', '_write_log')
+
+
+@pytest.fixture
+def client():
+    from app import app
+    return app.test_client()
+
+
+@pytest.fixture
+def authed_client(client):
+    with client.session_transaction() as session:
+        session["user_id"] = 3
+        session["username"] = "nlkris"
+    return client
+
+
+class StorageCalls:
+    def __init__(self):
+        self.reads = {}
+        self.writes = {}
+        self.scanned = {}
+        self.calls = []
+        self.depth = 0
+
+    def record(self, store, method, scanned):
+        counts = self.writes if method in WRITE_METHODS else self.reads
+        counts[store] = counts.get(store, 0) + 1
+        self.scanned[store] = self.scanned.get(store, 0) + scanned
+        self.calls.append(f"{store}.{method} ({scanned} enregistrements)")
+
+    def total(self, counts):
+        return sum(counts.values())
+
+    def check(self, kind, counts, budget):
+        if budget is None:
+            return []
+        if isinstance(budget, dict):
+            return [f"{kind} {store} : {counts.get(store, 0)} > {limit}"
+                    for store, limit in budget.items() if counts.get(store, 0) > limit]
+        return [f"{kind} : {self.total(counts)} > {budget}"] if self.total(counts) > budget else []
+
+
+def _scanned(method, args, result, examined):
+    if method == 'read':
+        return len(result)
+    if method == 'get':
+        return int(result is not None)
+    if method in ('get_many', 'members'):
+        return len(result)
+    if method == 'page':
+        return examined if examined is not None else len(result)
+    if method == 'write':
+        return len(args[0])
+    return 0
+
+
+@pytest.fixture
+def storage_budget(monkeypatch):
+    calls = StorageCalls()
+    active = []
+
+    def instrument(method):
+        original = getattr(JsonStore, method)
+
+        def wrapper(self, *args, **kwargs):
+            if not active or calls.depth:
+                return original(self, *args, **kwargs)
+            examined = None
+            if method == 'page' and kwargs.get('where') is not None:
+                # Enregistrements examinés, retenus ou non par le filtre
+                where, examined = kwargs['where'], 0
+
+                def counting(record):
+                    nonlocal examined
+                    examined += 1
+                    return where(record)
+                kwargs['where'] = counting
+            # Les appels internes (compact -> write, ...) ne comptent qu'une fois
+            calls.depth += 1
+            try:
+                result = original(self, *args, **kwargs)
+            finally:
+                calls.depth -= 1
+            calls.record(self.name, method, _scanned(method, args, result, examined))
+            return result
+        monkeypatch.setattr(JsonStore, method, wrapper)
+
+    for method in READ_METHODS + WRITE_METHODS:
+        instrument(method)
+
+    @contextmanager
+    def budget(reads=None, writes=None, scanned=None):
+        calls.__init__()
+        active.append(True)
+        try:
+            yield calls
+        finally:
+            active.pop()
+        errors = (calls.check('lectures', calls.reads, reads) + calls.check('écritures', calls.writes, writes)
+                  + calls.check('enregistrements parcourus', calls.scanned, scanned))
+        if errors:
+            pytest.fail("Budget de stockage dépassé : " + ' ; '.join(errors)
+                        + "\nAccès :\n  " + "\n  ".join(calls.calls), pytrace=False)
+
+    return budget
@@ -0,0 +1,29 @@
+from backend.routes import TWEET_API_FIELDS
+
+
+# -------------------------------------------------------------
+# Tests (lecture seule des données du dépôt)
+# -------------------------------------------------------------
+
+def test_feed_json_pages_and_authors(authed_client):
+    first = authed_client.get("/api/feed?view=recommended&limit=2").get_json()
+    assert first["success"] and first["view"] == "recommended"
+    assert len(first["tweets"]) == 2
+    assert set(first["tweets"][0]) == {"id", *TWEET_API_FIELDS}
+    # Chaque auteur est donné une seule fois, à part
+    assert {str(t["author"]) for t in first["tweets"]} == set(first["authors"])
+
+    second = authed_client.get(first["next_url"]).get_json()
+    assert not {t["id"] for t in first["tweets"]} & {t["id"] for t in second["tweets"]}
+
+    # Rien de plus récent que la tête du fil
+    assert authed_client.get(first["newer_url"]).get_json()["tweets"] == []
+
+
+def test_feed_json_field_projection(authed_client):
+    data = authed_client.get("/api/feed?view=recommended&limit=3&fields=content,counts").get_json()
+    assert all(set(t) == {"id", "content", "counts"} for t in data["tweets"])
+    assert data["authors"] == {}
+    assert "fields=content,counts" in data["next_url"]
+
+    assert authed_client.get("/api/feed?fields=content,password").status_code == 400
@@ -0,0 +1,68 @@
+import gzip
+
+import pytest
+
+import utils.assets as assets
+
+
+# -------------------------------------------------------------
+# Dossier static/ temporaire
+# -------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def static(tmp_path, monkeypatch):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "site.css").write_text("body { color: red; }\n" * 50)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG...")
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(assets, "_assets", {})
+    return tmp_path
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_fingerprint_follows_content(static):
+    name = assets.fingerprint("css/site.css")
+    assert name.startswith("css/site.") and name.endswith(".css")
+    assert assets.resolve(name) == ("css/site.css", assets.get("css/site.css").digest)
+
+    (static / "css" / "site.css").write_text("body { color: blue; }\n")
+    assert assets.fingerprint("css/site.css") != name
+    assert assets.fingerprint("absent.css") is None
+    assert assets.get("../secret.txt") is None
+    # Seuls les types texte sont compressés
+    assert assets.get("logo.png").gzipped is None
+
+
+def test_asset_route_caches_and_compresses(client):
+    url = "/assets/" + assets.fingerprint("css/site.css")
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == assets.get("css/site.css").data
+    assert "immutable" in response.headers["Cache-Control"]
+    # Les variantes compressée et brute ont chacune leur ETag
+    assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 200
+    assert client.get(url, headers={"Accept-Encoding": "gzip",
+                                    "If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    plain = client.get(url)
+    assert plain.data == assets.get("css/site.css").data and "Content-Encoding" not in plain.headers
+
+    # Ancienne empreinte : redirection vers la version courante
+    stale = client.get("/assets/css/site.000000000000.css")
+    assert stale.status_code == 302 and stale.headers["Location"].endswith(url)
+    assert client.get("/assets/css/site.css").status_code == 404
+
+
+def test_html_pages_are_gzipped(client):
+    page = client.get("/login", headers={"Accept-Encoding": "gzip"})
+    assert page.headers["Content-Encoding"] == "gzip"
+    assert b"Connexion" in gzip.decompress(page.data)
+    assert "Accept-Encoding" in page.headers["Vary"]
+
+    # La variante brute varie aussi selon Accept-Encoding (caches partagés)
+    plain = client.get("/login")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
@@ -0,0 +1,62 @@
+from bench import dataset
+from bench.run import compare, percentile
+
+PARAMS = {"users": 30, "tweets": 200, "follows": 5, "likes": 3, "comments": 2, "notifications": 4}
+
+
+# -------------------------------------------------------------
+# Jeu de données synthétique
+# -------------------------------------------------------------
+
+def test_generate_is_deterministic():
+    first = dataset.generate(seed=7, **PARAMS)
+    assert first == dataset.generate(seed=7, **PARAMS)
+    assert first != dataset.generate(seed=8, **PARAMS)
+
+
+def test_generate_is_consistent():
+    data = dataset.generate(seed=1, password_hash="hash", **PARAMS)
+    users = {u["id"]: u for u in data["users"]}
+    summary = dataset.summary(data)
+    assert summary["users"] == 30 and summary["tweets"] == 200
+
+    # Abonnements dans les deux sens, jamais à soi-même
+    for user in users.values():
+        assert user["id"] not in user["following"]
+        for followed_id in user["following"]:
+            assert user["id"] in users[followed_id]["followers"]
+    assert summary["follows"] == sum(len(u["followers"]) for u in users.values())
+
+    # Tweets triés par date, références vers des utilisateurs existants
+    dates = [t["created_at"] for t in data["tweets"]]
+    assert dates == sorted(dates) and all(d.endswith("Z") for d in dates)
+    assert all(set(t["likes"]) <= set(users) for t in data["tweets"])
+    assert all(n["to_user_id"] in users and n["from_user_id"] in users for n in data["notifications"])
+
+
+# -------------------------------------------------------------
+# Mesures et comparaison
+# -------------------------------------------------------------
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 101))
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert percentile([3.0], 99) == 3.0
+
+
+def _result(p50, written):
+    stats = {"p50_ms": p50, "p99_ms": p50, "read_bytes": 0, "written_bytes": written}
+    return {"scales": {"small": {"peak_rss_kb": 1000, "routes": {"GET /feed": stats}, "operations": {}}}}
+
+
+def test_compare_flags_regressions_above_noise():
+    lines, regressions = compare(_result(10.0, 1000), _result(10.5, 900))
+    assert regressions == 0
+
+    lines, regressions = compare(_result(10.0, 1000), _result(20.0, 900))
+    assert regressions == 1
+    assert any("GET /feed" in line and "!" in line for line in lines)
+
+    # Petit écart absolu sur un appel très court : du bruit
+    assert compare(_result(0.1, 0), _result(0.3, 0))[1] == 0
@@ -0,0 +1,278 @@
+import json
+import os
+
+import pytest
+
+import utils.data_manager as dm
+from utils.data_manager import JsonStore
+
+
+# -------------------------------------------------------------
+# Store résident sur un fichier temporaire
+# -------------------------------------------------------------
+@pytest.fixture
+def users_file(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps([
+        {"id": 1, "username": "alice", "email": "alice@example.com"},
+        {"id": 2, "username": "Bob", "email": "bob@example.com"},
+    ]))
+    return str(path)
+
+
+@pytest.fixture
+def store(users_file):
+    return JsonStore(users_file, indexes={
+        "id": lambda u: u["id"],
+        "email": lambda u: u["email"],
+    })
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_index_lookup(store):
+    assert store.get("id", 2)["username"] == "Bob"
+    assert store.get("email", "alice@example.com")["id"] == 1
+    assert store.get("id", 42) is None
+
+
+def test_read_is_cached_until_file_changes(store, users_file):
+    first = store.read()
+    assert store.read() is first
+
+    # Un autre processus réécrit le fichier
+    with open(users_file, "w") as f:
+        json.dump([{"id": 3, "username": "charlie", "email": "c@example.com"}], f)
+    st = os.stat(users_file)
+    os.utime(users_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert [u["id"] for u in store.read()] == [3]
+    assert store.get("id", 1) is None
+
+
+def test_write_through_updates_indexes(store, users_file):
+    users = store.read()
+    users.append({"id": 3, "username": "charlie", "email": "c@example.com"})
+    store.write(users)
+
+    assert store.get("email", "c@example.com")["id"] == 3
+    with open(users_file) as f:
+        assert len(json.load(f)) == 3
+
+
+# -------------------------------------------------------------
+# Journal des mutations
+# -------------------------------------------------------------
+@pytest.fixture
+def tweets_file(tmp_path):
+    path = tmp_path / "tweets.json"
+    path.write_text(json.dumps([
+        {"id": 1, "user_id": 1, "content": "hello", "likes": [], "comments": [], "retweets": [2]},
+    ]))
+    return str(path)
+
+
+def test_append_only_touches_the_log(tweets_file):
+    store = dm._make_tweets_store(tweets_file)
+    snapshot = open(tweets_file).read()
+
+    store.append({"op": "like", "tweet_id": 1, "user_id": 2})
+    store.append({"op": "retweet", "tweet_id": 1, "user_id": 3, "retweeted_at": "2025-12-01T00:00:00"})
+
+    assert open(tweets_file).read() == snapshot
+    assert store.get("id", 1)["likes"] == [2]
+    # L'ancien format de retweets est converti au passage
+    assert [rt["user_id"] for rt in store.get("id", 1)["retweets"]] == [2, 3]
+
+    # Un autre processus rejoue le journal au chargement
+    other = dm._make_tweets_store(tweets_file)
+    assert other.get("id", 1)["likes"] == [2]
+
+    # ... puis seulement les nouvelles lignes
+    store.append({"op": "comment", "tweet_id": 1, "index": 0, "comment": {"user_id": 2, "content": "yo"}})
+    assert other.get("id", 1)["comments"][0]["content"] == "yo"
+
+
+def test_compaction_and_idempotent_replay(tweets_file):
+    store = dm._make_tweets_store(tweets_file, compact_threshold=2)
+    store.append({"op": "add_tweet", "tweet": {"id": 2, "user_id": 1, "content": "new", "likes": []}})
+    store.append({"op": "like", "tweet_id": 2, "user_id": 1})
+
+    # Seuil atteint : le snapshot contient tout, le journal est vide
+    assert os.path.getsize(tweets_file + ".log") == 0
+    with open(tweets_file) as f:
+        assert [t["id"] for t in json.load(f)] == [1, 2]
+
+    # Rejouer des opérations déjà présentes dans le snapshot ne change rien
+    with open(tweets_file + ".log", "w") as f:
+        f.write(json.dumps({"op": "add_tweet", "tweet": {"id": 2, "user_id": 1, "content": "new", "likes": []}}) + "\n")
+        f.write(json.dumps({"op": "like", "tweet_id": 2, "user_id": 1}) + "\n")
+    fresh = dm._make_tweets_store(tweets_file)
+    assert len(fresh.read()) == 2
+    assert fresh.get("id", 2)["likes"] == [1]
+
+
+def test_reader_between_snapshot_and_log_rotation_keeps_up(tweets_file, monkeypatch):
+    store = dm._make_tweets_store(tweets_file)
+    other = dm._make_tweets_store(tweets_file)
+    store.append({"op": "like", "tweet_id": 1, "user_id": 5})
+    store.append({"op": "like", "tweet_id": 1, "user_id": 6})
+
+    # L'autre processus relit le nouveau snapshot avant que le journal ne soit remplacé
+    atomic_write_json = dm.atomic_write_json
+
+    def write_then_read(path, data, **kwargs):
+        atomic_write_json(path, data, **kwargs)
+        other.read()
+    monkeypatch.setattr(dm, "atomic_write_json", write_then_read)
+    store.compact()
+    monkeypatch.undo()
+
+    # Le nouveau journal dépasse l'ancienne position de l'autre processus
+    for user_id in (7, 8, 9):
+        store.append({"op": "like", "tweet_id": 1, "user_id": user_id})
+    assert other.get("id", 1)["likes"] == [5, 6, 7, 8, 9]
+
+
+def test_max_value_follows_log_ops(tweets_file):
+    store = dm._make_tweets_store(tweets_file)
+    other = dm._make_tweets_store(tweets_file)
+    assert store.max_value("id") == 1
+
+    # Identifiants non contigus : le suivant dépasse le plus grand, pas le nombre de tweets
+    store.append({"op": "add_tweet", "tweet": {"id": 5, "user_id": 1, "content": "cinq", "likes": []}})
+    assert store.max_value("id") == 5
+    assert other.max_value("id") == 5
+
+
+def test_retweet_index_follows_log_ops(tweets_file):
+    store = dm._make_tweets_store(tweets_file)
+    # Ancien format : date du tweet (absente ici, donc EPOCH)
+    assert store.count("retweeted_by", 2) == 1
+
+    store.append({"op": "add_tweet", "tweet": {"id": 2, "user_id": 1, "content": "new",
+                                               "created_at": "2025-12-01T00:00:00", "retweets": []}})
+    store.append({"op": "retweet", "tweet_id": 2, "user_id": 2, "retweeted_at": "2025-12-02T00:00:00"})
+    store.append({"op": "retweet", "tweet_id": 2, "user_id": 3, "retweeted_at": "2025-12-03T00:00:00"})
+    assert [t["id"] for t in store.page("retweeted_by", group=2)] == [2, 1]
+    assert [t["id"] for t in store.page("retweeted_by", group=2, before=("2025-12-02T00:00:00", 2))] == [1]
+
+    store.append({"op": "unretweet", "tweet_id": 2, "user_id": 2})
+    assert [t["id"] for t in store.page("retweeted_by", group=2)] == [1]
+    assert store.count("retweeted_by", 3) == 1
+
+    # Un autre processus reconstruit le même index en rejouant le journal
+    other = dm._make_tweets_store(tweets_file)
+    assert [t["id"] for t in other.page("retweeted_by", group=2)] == [1]
+    assert [t["id"] for t in other.page("retweeted_by", group=3)] == [2]
+
+
+def test_interaction_sets_follow_log_ops(tweets_file):
+    store = dm._make_tweets_store(tweets_file)
+    assert store.members("retweets", [(1, 2), (1, 3)]) == {(1, 2)}
+
+    store.append({"op": "like", "tweet_id": 1, "user_id": 5})
+    store.append({"op": "like", "tweet_id": 1, "user_id": 5})
+    store.append({"op": "like_comment", "tweet_id": 1, "index": 0, "user_id": 5})
+    store.append({"op": "comment", "tweet_id": 1, "index": 0, "comment": {"user_id": 2, "content": "yo"}})
+    store.append({"op": "like_comment", "tweet_id": 1, "index": 0, "user_id": 5})
+    assert store.get("id", 1)["likes"] == [5]
+    assert store.members("comment_likes", [(1, 0, 5)]) == {(1, 0, 5)}
+
+    store.append({"op": "unlike", "tweet_id": 1, "user_id": 5})
+    store.append({"op": "unretweet", "tweet_id": 1, "user_id": 2})
+    assert store.get("id", 1)["likes"] == [] and store.get("id", 1)["retweets"] == []
+    assert store.members("likes", [(1, 5)]) == set() and store.members("retweets", [(1, 2)]) == set()
+
+    # Les ensembles reconstruits depuis le fichier et le journal sont identiques
+    other = dm._make_tweets_store(tweets_file)
+    other.read()
+    assert other.sets == store.sets
+
+
+def test_batch_writes_the_log_once(tweets_file):
+    store = dm._make_tweets_store(tweets_file)
+    other = dm._make_tweets_store(tweets_file)
+
+    with store.batch():
+        store.append({"op": "like", "tweet_id": 1, "user_id": 5})
+        store.append({"op": "like", "tweet_id": 1, "user_id": 6})
+        # Appliqué en mémoire, pas encore écrit
+        assert store.get("id", 1)["likes"] == [5, 6]
+        assert not os.path.exists(tweets_file + ".log")
+    assert len(open(tweets_file + ".log").readlines()) == 2
+    assert other.get("id", 1)["likes"] == [5, 6]
+
+    # Après une erreur, les opérations déjà appliquées sont tout de même journalisées
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.append({"op": "unlike", "tweet_id": 1, "user_id": 5})
+            raise RuntimeError
+    assert other.get("id", 1)["likes"] == [6]
+
+
+# -------------------------------------------------------------
+# Écritures atomiques et verrous
+# -------------------------------------------------------------
+
+def test_atomic_write_leaves_no_temp_file(tmp_path):
+    path = str(tmp_path / "tweets.json")
+    dm.atomic_write_json(path, [{"id": 1}])
+    dm.atomic_write_json(path, [{"id": 1}, {"id": 2}], indent=4)
+
+    with open(path) as f:
+        assert len(json.load(f)) == 2
+    assert os.listdir(tmp_path) == ["tweets.json"]
+
+
+def test_atomic_write_uses_the_umask_mode(tmp_path):
+    path = str(tmp_path / "tweets.json")
+    dm.atomic_write_json(path, [{"id": 1}])
+    # Pas les 0600 du fichier temporaire : lisible comme un fichier créé par open()
+    assert os.stat(path).st_mode & 0o777 == dm.FILE_MODE
+
+
+def test_atomic_write_keeps_old_file_on_error(tmp_path):
+    path = str(tmp_path / "tweets.json")
+    dm.atomic_write_json(path, [{"id": 1}])
+
+    with pytest.raises(TypeError):
+        dm.atomic_write_json(path, [{"id": object()}])
+
+    with open(path) as f:
+        assert json.load(f) == [{"id": 1}]
+    assert os.listdir(tmp_path) == ["tweets.json"]
+
+
+def test_file_lock_is_reentrant(tmp_path):
+    path = str(tmp_path / "users.json")
+    lock = dm.file_lock(path)
+    assert dm.file_lock(path) is lock
+
+    with lock:
+        with lock:
+            assert lock.depth == 2
+        assert lock.fd is not None
+    assert lock.fd is None
+    assert os.path.exists(path + ".lock")
+
+
+# -------------------------------------------------------------
+# Hydratation des auteurs
+# -------------------------------------------------------------
+
+def test_hydrate_users_resolves_authors_in_one_batch(store, monkeypatch):
+    monkeypatch.setattr(dm, "_users_store", store)
+    calls = []
+    original = store.get_many
+    monkeypatch.setattr(store, "get_many", lambda index, values: calls.append(values) or original(index, values))
+
+    posts = [{"user_id": 2}, {"user_id": 1}, {"user_id": 2}, {"user_id": 99}]
+    dm.hydrate_users(posts, {"username": "username", "avatar": "profile_pic_url"},
+                     defaults={"avatar": "default.png", "username": "Utilisateur"})
+
+    assert calls == [{1, 2, 99}]
+    assert [p["username"] for p in posts] == ["Bob", "alice", "Bob", "Utilisateur"]
+    assert {p["avatar"] for p in posts} == {"default.png"}
@@ -0,0 +1,104 @@
+import os
+import threading
+
+import pytest
+
+import utils.events as ev
+from utils.data_manager import FILE_MODE
+
+
+# -------------------------------------------------------------
+# Broker en mémoire
+# -------------------------------------------------------------
+
+def test_wait_filters_channels_and_resumes():
+    broker = ev.MemoryBroker()
+    broker.publish("user:1", "notification", {"n": 1})
+    broker.publish("user:2", "notification", {"n": 2})
+    broker.publish("author:3", "tweet", {"n": 3})
+
+    found, latest = broker.wait(0, {"user:1", "author:3"}, timeout=0)
+    assert [e.data["n"] for e in found] == [1, 3] and latest == 3
+    # Reprise après l'id 1 (Last-Event-ID)
+    found, _ = broker.wait(1, {"user:1", "author:3"}, timeout=0)
+    assert [e.data["n"] for e in found] == [3]
+
+
+def test_resume_outside_buffer_requires_resync():
+    broker = ev.MemoryBroker(replay_size=2)
+    for n in range(5):
+        broker.publish("user:1", "notification", {"n": n})
+    assert broker.wait(1, {"user:1"}, timeout=0)[0] is None
+    assert broker.wait(42, {"user:1"}, timeout=0) == (None, 5)
+    assert len(broker.wait(3, {"user:1"}, timeout=0)[0]) == 2
+
+
+def test_wait_wakes_up_on_publish():
+    broker = ev.MemoryBroker()
+    timer = threading.Timer(0.05, broker.publish, ("user:1", "notification", {}))
+    timer.start()
+    found, latest = broker.wait(0, {"user:1"}, timeout=5)
+    timer.join()
+    assert latest == 1 and len(found) == 1
+
+
+# -------------------------------------------------------------
+# Flux SSE
+# -------------------------------------------------------------
+
+def test_stream_formats_events_and_advances_id(monkeypatch):
+    broker = ev.MemoryBroker()
+    monkeypatch.setattr(ev, "broker", broker)
+    broker.publish("user:1", "notification", {"unread": 1})
+    broker.publish("user:2", "notification", {"unread": 7})
+
+    chunks = list(ev.stream({"user:1"}, last_event_id=0, duration=0.05, heartbeat=0.01))
+    assert chunks[0] == f"retry: {ev.RETRY_MS}\n\n"
+    assert chunks[1] == 'id: 1\nevent: notification\ndata: {"unread": 1}\n\n'
+    # L'événement d'un autre canal n'est pas transmis mais fait avancer Last-Event-ID
+    assert chunks[2] == "id: 2\n\n"
+    assert set(chunks[3:]) == {": keepalive\n\n"}
+
+
+def test_stream_without_last_event_id_starts_now(monkeypatch):
+    broker = ev.MemoryBroker()
+    monkeypatch.setattr(ev, "broker", broker)
+    broker.publish("user:1", "notification", {})
+    chunks = list(ev.stream({"user:1"}, duration=0.02, heartbeat=0.01))
+    assert not any(chunk.startswith("id:") for chunk in chunks)
+
+
+# -------------------------------------------------------------
+# Broker partagé par fichier (plusieurs workers)
+# -------------------------------------------------------------
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / "events.log")
+
+
+def test_file_broker_shares_events_between_workers(log_path):
+    worker_a = ev.FileBroker(log_path)
+    worker_b = ev.FileBroker(log_path)
+    assert worker_a.publish("user:1", "notification", {"from": "a"}) == 1
+    assert worker_b.publish("user:1", "notification", {"from": "b"}) == 2
+
+    found, latest = worker_a.wait(0, {"user:1"}, timeout=1)
+    assert [e.data["from"] for e in found] == ["a", "b"] and latest == 2
+    # Un worker démarré plus tard peut reprendre depuis un id déjà émis
+    found, _ = ev.FileBroker(log_path).wait(1, {"user:1"}, timeout=1)
+    assert [e.data["from"] for e in found] == ["b"]
+
+
+def test_file_broker_truncates_its_log(log_path, monkeypatch):
+    monkeypatch.setattr(ev, "EVENTS_LOG_MAX", 5)
+    worker_a = ev.FileBroker(log_path, replay_size=3)
+    worker_b = ev.FileBroker(log_path, replay_size=3)
+    for n in range(12):
+        (worker_a if n % 2 else worker_b).publish("user:1", "notification", {"n": n})
+
+    with open(log_path) as f:
+        assert len(f.readlines()) <= 5
+    assert os.stat(log_path).st_mode & 0o777 == FILE_MODE
+    found, latest = worker_b.wait(9, {"user:1"}, timeout=1)
+    assert [e.data["n"] for e in found] == [9, 10, 11] and latest == 12
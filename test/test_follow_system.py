@@ -1,6 +1,7 @@
 import pytest
 import utils.data_manager as dm
    # adapte si ton fichier s’appelle différemment
+import utils.migrations as migrations
 
 
 # -------------------------------------------------------------
@@ -19,18 +20,15 @@ def fake_users():
 
 
 @pytest.fixture
-def mock_read_write(monkeypatch, fake_users):
+def mock_read_write(tmp_path, monkeypatch, fake_users):
     """
-    Remplace read_users() et write_users() par notre base en mémoire.
+    Remplace le store des utilisateurs par un fichier temporaire contenant
+    notre base ; retourne la liste résidente (mise à jour en place).
     """
-
-    # read_users → renvoie la fake DB
-    monkeypatch.setattr(dm, "read_users", lambda: fake_users)
-
-    # write_users → met à jour la fake DB directement
-    monkeypatch.setattr(dm, "write_users", lambda users: None)
-
-    return fake_users
+    store = dm._make_users_store(str(tmp_path / "users.json"))
+    store.write(fake_users)
+    monkeypatch.setattr(dm, "_users_store", store)
+    return store.read()
 
 
 # -------------------------------------------------------------
@@ -50,6 +48,8 @@ def test_follow_user(mock_read_write):
 
     assert 2 in alice["following"]
     assert 1 in bob["followers"]
+    # ... et sur disque
+    assert dm._make_users_store(dm._users_store.path).get("id", 2)["followers"] == [1]
 
 
 def test_unfollow_user(mock_read_write):
@@ -69,21 +69,26 @@ def test_unfollow_user(mock_read_write):
     assert 1 not in bob["followers"]
 
 
-def test_ensure_follow_fields(monkeypatch):
-    # Fake DB sans les champs
-    users = [
-        {"id": 1, "username": "alice"},
-        {"id": 2, "username": "bob"},
-    ]
+def test_follow_unknown_user(mock_read_write):
+    assert dm.follow_user(1, 99) is False
+    assert dm.unfollow_user(99, 1) is False
+    assert all(u["following"] == [] for u in mock_read_write)
+
 
-    # Mock
-    monkeypatch.setattr(dm, "read_users", lambda: users)
-    monkeypatch.setattr(dm, "write_users", lambda u: None)
+def test_follow_fields_migration(tmp_path, monkeypatch):
+    # Fichier d'utilisateurs sans les champs
+    store = dm.JsonStore(str(tmp_path / "users.json"), indexes={"id": lambda u: u["id"]})
+    store.write([
+        {"id": 1, "username": "alice"},
+        {"id": 2, "username": "bob", "following": [1]},
+    ])
+    monkeypatch.setattr(dm, "_users_store", store)
 
-    dm.ensure_follow_fields()
+    assert migrations._follow_fields() == 2
 
-    for u in users:
+    for u in store.read():
         assert "followers" in u
         assert "following" in u
         assert isinstance(u["followers"], list)
         assert isinstance(u["following"], list)
+    assert store.get("id", 2)["following"] == [1]
@@ -0,0 +1,92 @@
+import logging
+
+import pytest
+
+import backend.routes as routes
+from utils import metrics
+from utils.data_manager import JsonStore
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+# -------------------------------------------------------------
+# Phases et E/S d'une requête
+# -------------------------------------------------------------
+
+def test_nested_phases_are_counted_once():
+    metrics.start_request()
+    with metrics.phase("storage"):
+        with metrics.phase("storage"):
+            pass
+    with metrics.phase("render"):
+        pass
+    duration, phases, io = metrics.end_request("routes.feed", "GET", 200)
+
+    assert set(phases) == {"storage", "render", "handler"}
+    assert sum(phases.values()) == pytest.approx(duration)
+    # Hors requête : sans effet
+    with metrics.phase("storage"):
+        pass
+
+
+def test_store_reads_and_writes_are_counted(tmp_path):
+    store = JsonStore(str(tmp_path / "items.json"), log_path=str(tmp_path / "items.json.log"),
+                      apply_op=lambda s, op: s.add(op["item"]))
+    store.write([{"id": 1}])
+
+    metrics.start_request()
+    store.invalidate()
+    store.read()
+    store.append({"item": {"id": 2}})
+    duration, phases, io = metrics.end_request("routes.feed", "GET", 200)
+
+    size = (tmp_path / "items.json").stat().st_size
+    assert io[("items.json", "read")] == [1, size]
+    assert io[("items.json", "log_append")][0] == 1
+    assert "storage" in phases
+
+    text = metrics.render()
+    assert f'tigers_storage_io_bytes_total{{store="items.json",operation="read"}} {size}' in text
+    assert 'tigers_storage_io_total{store="items.json",operation="write"} 1' in text
+
+
+# -------------------------------------------------------------
+# Endpoint /metrics et journal des requêtes lentes
+# -------------------------------------------------------------
+
+def test_metrics_endpoint_exposes_request_histograms(client):
+    client.get("/login")
+    client.get("/login")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    text = response.get_data(as_text=True)
+    assert 'tigers_request_duration_seconds_count{endpoint="routes.login",method="GET"} 2' in text
+    assert 'tigers_request_duration_seconds_bucket{endpoint="routes.login",method="GET",le="+Inf"} 2' in text
+    assert 'tigers_requests_total{endpoint="routes.login",method="GET",status="200"} 2' in text
+    assert 'tigers_request_phase_seconds_total{endpoint="routes.login",phase="render"}' in text
+
+
+def test_metrics_endpoint_token(client, monkeypatch):
+    monkeypatch.setattr(routes, "METRICS_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+def test_slow_requests_are_logged_with_phases(client, monkeypatch, caplog):
+    monkeypatch.setattr(routes, "SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING):
+        client.get("/login")
+    assert any("Requête lente GET /login" in r.getMessage() and "render" in r.getMessage()
+               for r in caplog.records)
+
+    caplog.clear()
+    monkeypatch.setattr(routes, "SLOW_REQUEST_MS", 60000)
+    client.get("/login")
+    assert not [r for r in caplog.records if "Requête lente" in r.getMessage()]
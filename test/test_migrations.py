@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import utils.data_manager as dm
+import utils.migrations as migrations
+
+
+# -------------------------------------------------------------
+# Données à l'ancien format sur des fichiers temporaires
+# -------------------------------------------------------------
+@pytest.fixture
+def data(tmp_path, monkeypatch):
+    users = dm._make_users_store(str(tmp_path / "users.json"))
+    users.write([{"id": 1, "username": "alice"}, {"id": 2, "username": "bob", "followers": [], "following": []}])
+    tweets = dm._make_tweets_store(str(tmp_path / "tweets.json"))
+    tweets.write([
+        {"id": 1, "user_id": 2, "content": "ancien", "created_at": "2025-12-01T10:00:00", "retweets": [1]},
+        {"id": 2, "user_id": 1, "content": "récent", "created_at": "2025-12-02T10:00:00Z",
+         "likes": [], "comments": [{"content": "yo"}], "retweets": []},
+        {"id": 3, "user_id": 1, "content": "sans date", "likes": [], "comments": [], "retweets": []},
+    ])
+    monkeypatch.setattr(dm, "_users_store", users)
+    monkeypatch.setattr(dm, "_tweets_store", tweets)
+    monkeypatch.setattr(dm, "STORAGE_BACKEND", "sqlite")  # pas de recalcul des timelines réelles
+    monkeypatch.setattr(migrations, "SCHEMA_FILE", str(tmp_path / "schema.json"))
+    return users, tweets
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_migrations_bring_old_data_to_current_format(data):
+    users, tweets = data
+    assert migrations.current_version() == 0
+
+    assert migrations.migrate() == len(migrations.MIGRATIONS)
+    assert migrations.current_version() == len(migrations.MIGRATIONS)
+
+    assert users.get("id", 1)["following"] == []
+    old = tweets.get("id", 1)
+    assert old["likes"] == [] and old["comments"] == []
+    # Retweet à l'ancien format : date du tweet (ancien /migrate-retweets)
+    assert old["retweets"] == [{"user_id": 1, "retweeted_at": "2025-12-01T10:00:00"}]
+    assert old["created_at"] == "2025-12-01T10:00:00Z"
+    assert tweets.get("id", 2)["comments"][0]["likes"] == []
+    assert tweets.get("id", 3)["created_at"] == dm.EPOCH
+
+
+def test_current_data_is_not_rewritten(data, tmp_path):
+    users, tweets = data
+    migrations.migrate()
+    snapshot = (tmp_path / "tweets.json").read_text()
+    signature = users.signature
+
+    # Données à jour : seule la version est lue
+    assert migrations.migrate() == 0
+    assert (tmp_path / "tweets.json").read_text() == snapshot and users.signature == signature
+
+    # Une nouvelle migration ne s'applique qu'une fois
+    calls = []
+    migrations.MIGRATIONS.append(lambda: calls.append(1) or 0)
+    try:
+        assert migrations.migrate() == 1 and migrations.migrate() == 0
+    finally:
+        migrations.MIGRATIONS.pop()
+    assert calls == [1]
+    assert json.loads((tmp_path / "schema.json").read_text())["version"] == len(migrations.MIGRATIONS) + 1
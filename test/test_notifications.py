@@ -0,0 +1,84 @@
+import pytest
+
+import utils.data_manager as dm
+
+
+# -------------------------------------------------------------
+# Boîtes de notifications dans un dossier temporaire
+# -------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def inboxes(tmp_path, monkeypatch):
+    notif_dir = tmp_path / "notifications"
+    unread_file = str(notif_dir / "unread.json")
+    monkeypatch.setattr(dm, "NOTIF_FILE", str(tmp_path / "notifications.json"))
+    monkeypatch.setattr(dm, "NOTIF_DIR", str(notif_dir))
+    monkeypatch.setattr(dm, "NOTIF_UNREAD_FILE", unread_file)
+    monkeypatch.setattr(dm, "_inboxes", {})
+    monkeypatch.setattr(dm, "_unread_store", dm._make_unread_store(unread_file))
+    return notif_dir
+
+
+def contents(user_id, **kwargs):
+    return [n["content"] for n in dm.notifications_page(user_id, **kwargs)]
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_legacy_file_is_partitioned_once(tmp_path):
+    legacy = [
+        {"to_user_id": 1, "from_user_id": 2, "type": "like", "tweet_id": 1, "content": "a",
+         "seen": False, "created_at": "2025-12-01T10:00:00"},
+        {"to_user_id": 2, "from_user_id": 1, "type": "like", "tweet_id": 2, "content": "b",
+         "seen": True, "created_at": "2025-12-01T11:00:00"},
+        {"to_user_id": 1, "from_user_id": 3, "type": "follow", "tweet_id": None, "content": "c",
+         "seen": False, "created_at": "2025-12-01T12:00:00"},
+    ]
+    dm.atomic_write_json(dm.NOTIF_FILE, legacy)
+    dm.ensure_notification_inboxes()
+    dm.add_notification(1, 2, "comment", 1, "d")
+    dm.ensure_notification_inboxes()  # déjà fait : ne réécrit pas les boîtes
+
+    assert contents(1) == ["d", "c", "a"]
+    assert contents(2) == ["b"]
+    assert (dm.unread_count(1), dm.unread_count(2), dm.unread_count(3)) == (3, 0, 0)
+    assert len(dm.read_notifications()) == 4
+
+
+def test_add_only_touches_the_recipient_inbox(inboxes):
+    dm.add_notification(1, 2, "like", 1, "a")
+    dm.add_notification(1, 3, "like", 1, "b")
+    # Pas de snapshot réécrit : seuls les journaux de la boîte et des compteurs grandissent
+    assert sorted(p.name for p in inboxes.glob("*.json*") if not p.name.endswith(".lock")) == \
+        ["1.json.log", "unread.json.log"]
+    assert dm.unread_count(1) == 2
+    assert [n["id"] for n in dm.notifications_page(1)] == [2, 1]
+
+
+def test_mark_seen_in_one_operation():
+    for content in "abc":
+        dm.add_notification(1, 2, "like", 1, content)
+    dm.mark_notifications_seen(1, up_to=2)
+    assert dm.unread_count(1) == 1
+    assert [n["seen"] for n in dm.notifications_page(1)] == [False, True, True]
+    dm.mark_notifications_seen(1)
+    assert dm.unread_count(1) == 0
+
+    # Un autre processus relit la boîte (snapshot + journal)
+    dm._inboxes.clear()
+    assert [n["seen"] for n in dm.notifications_page(1)] == [True, True, True]
+
+
+def test_retention_keeps_unread_notifications(monkeypatch):
+    monkeypatch.setattr(dm, "NOTIF_INBOX_MAX", 2)
+    for content in "abcde":
+        dm.add_notification(1, 2, "like", 1, content)
+    dm.mark_notifications_seen(1, up_to=4)
+    old = {"id": 99, "to_user_id": 1, "content": "vieille", "seen": True, "created_at": "2020-01-01T00:00:00"}
+    dm._inbox(1).append({"op": "add", "notification": old})
+
+    dm.compact_notifications()
+    # « e » non lue, puis les deux lues les plus récentes ; la vieille notification a expiré
+    assert contents(1) == ["e", "d", "c"]
+    assert dm.unread_count(1) == 1
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from utils.data_manager import JsonStore, tweet_sort_key
+from utils.pagination import (decode_cursor, encode_cursor, merged_fetcher, page_params, paginate,
+                              sorted_fetcher)
+
+
+# -------------------------------------------------------------
+# Curseurs
+# -------------------------------------------------------------
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(("2025-12-01T10:00:00Z", 42))
+    assert decode_cursor(cursor) == ("2025-12-01T10:00:00Z", 42)
+    assert "=" not in cursor
+
+
+@pytest.mark.parametrize("cursor", [None, "", "pas-un-curseur", encode_cursor(["date", "id"])])
+def test_invalid_cursor_is_ignored(cursor):
+    assert decode_cursor(cursor) is None
+
+
+def test_page_params_clamps_limit():
+    assert page_params({"limit": "500"})[2] == 100
+    assert page_params({"limit": "abc"})[2] == 20
+    assert page_params({})[:2] == (None, None)
+
+
+# -------------------------------------------------------------
+# Pages sur une liste triée
+# -------------------------------------------------------------
+ITEMS = [{"created_at": f"2025-12-{day:02d}T10:00:00Z", "id": day} for day in range(10, 0, -1)]
+
+
+def walk(fetch, limit):
+    pages = [paginate(fetch, tweet_sort_key, limit=limit)]
+    while pages[-1].older:
+        pages.append(paginate(fetch, tweet_sort_key, before=decode_cursor(pages[-1].older), limit=limit))
+    return pages
+
+
+def test_pages_cover_the_list_once():
+    pages = walk(sorted_fetcher(ITEMS, tweet_sort_key), limit=3)
+    assert [len(p.items) for p in pages] == [3, 3, 3, 1]
+    assert [t["id"] for p in pages for t in p.items] == list(range(10, 0, -1))
+    assert pages[0].newer is None and pages[1].newer is not None
+
+
+def test_after_cursor_returns_previous_page():
+    fetch = sorted_fetcher(ITEMS, tweet_sort_key)
+    second = walk(fetch, limit=3)[1]
+    previous = paginate(fetch, tweet_sort_key, after=decode_cursor(second.newer), limit=3)
+    assert [t["id"] for t in previous.items] == [10, 9, 8]
+    assert previous.newer is None
+    assert decode_cursor(previous.older) == ("2025-12-08T10:00:00Z", 8)
+
+
+def test_merged_sources():
+    evens = sorted_fetcher([t for t in ITEMS if t["id"] % 2 == 0], tweet_sort_key)
+    odds = sorted_fetcher([t for t in ITEMS if t["id"] % 2], tweet_sort_key)
+    pages = walk(merged_fetcher([evens, odds], tweet_sort_key), limit=4)
+    assert [t["id"] for p in pages for t in p.items] == list(range(10, 0, -1))
+
+
+# -------------------------------------------------------------
+# Index trié du JsonStore
+# -------------------------------------------------------------
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "tweets.json"
+    path.write_text(json.dumps([dict(t, user_id=t["id"] % 2) for t in ITEMS]))
+    return JsonStore(str(path), sorted_indexes={
+        "created_at": (None, tweet_sort_key),
+        "user_created_at": (lambda t: t["user_id"], tweet_sort_key),
+    })
+
+
+def test_store_page_by_group_and_filter(store):
+    assert [t["id"] for t in store.page("created_at", limit=3)] == [10, 9, 8]
+    assert [t["id"] for t in store.page("user_created_at", group=1, limit=3)] == [9, 7, 5]
+    assert [t["id"] for t in store.page("created_at", before=("2025-12-05T10:00:00Z", 5), limit=2,
+                                        where=lambda t: t["id"] != 4)] == [3, 2]
+    assert [t["id"] for t in store.page("created_at", after=("2025-12-05T10:00:00Z", 5), limit=2)] == [7, 6]
+    assert store.count("user_created_at", 0) == 5
+
+
+def test_store_add_keeps_sorted_index(store):
+    store.read()
+    store.add({"id": 11, "user_id": 1, "created_at": "2025-12-05T12:00:00Z"})
+    assert [t["id"] for t in store.page("user_created_at", group=1, limit=4)] == [9, 7, 11, 5]
@@ -0,0 +1,132 @@
+import shutil
+import threading
+import time
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+import utils.data_manager as dm
+from utils import passwords
+
+FAST = "pbkdf2:sha256:1000"
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    monkeypatch.setattr(passwords, "HASH_METHOD", FAST)
+    monkeypatch.setattr(passwords, "HASH_WORKERS", 2)
+    yield
+    passwords.shutdown()
+
+
+@pytest.fixture
+def users_copy(tmp_path, monkeypatch):
+    """Utilisateurs du dépôt copiés dans un dossier temporaire, avec un compte de test."""
+    path = str(tmp_path / "users.json")
+    shutil.copy(dm._users_store.path, path)
+    copy = dm._make_users_store(path)
+    monkeypatch.setattr(dm, "_users_store", copy)
+    users = copy.read()
+    user = {"id": len(users) + 1, "username": "hashtest", "email": "hash@test.fr",
+            "password": generate_password_hash("secret1", "pbkdf2:sha256:500"),
+            "following": [], "followers": [], "profile_pic_url": None, "bio": ""}
+    copy.write(users + [user])
+    return copy
+
+
+# -------------------------------------------------------------
+# Pool de hachage
+# -------------------------------------------------------------
+
+def test_hash_and_verify_in_the_pool():
+    stored = passwords.hash_password("secret1")
+    assert stored.startswith(FAST + "$")
+    assert passwords.verify_password(stored, "secret1") == (True, None)
+    assert passwords.verify_password(stored, "wrong") == (False, None)
+
+
+def test_changed_parameters_give_a_new_hash():
+    stored = generate_password_hash("secret1", "pbkdf2:sha256:500")
+    assert passwords.needs_rehash(stored)
+    valid, new_hash = passwords.verify_password(stored, "secret1")
+    assert valid and new_hash.startswith(FAST + "$")
+    assert check_password_hash(new_hash, "secret1")
+    # Mot de passe faux : rien à re-hacher
+    assert passwords.verify_password(stored, "wrong") == (False, None)
+
+
+def test_full_queue_fails_fast(monkeypatch):
+    monkeypatch.setattr(passwords, "HASH_QUEUE", 0)
+    with pytest.raises(passwords.HashingBusy):
+        passwords.hash_password("secret1")
+
+
+def test_slow_hash_times_out(monkeypatch):
+    monkeypatch.setattr(passwords, "HASH_METHOD", "pbkdf2:sha256:5000000")
+    monkeypatch.setattr(passwords, "HASH_TIMEOUT", 0.01)
+    with pytest.raises(passwords.HashingBusy):
+        passwords.hash_password("secret1")
+
+
+def test_shutdown_cancels_queued_hashes(monkeypatch):
+    monkeypatch.setattr(passwords, "HASH_WORKERS", 1)
+    monkeypatch.setattr(passwords, "HASH_METHOD", "pbkdf2:sha256:5000000")
+    monkeypatch.setattr(passwords, "HASH_TIMEOUT", 1)
+    errors = []
+
+    def login():
+        try:
+            passwords.hash_password("secret1")
+        except passwords.HashingBusy as exc:
+            errors.append(str(exc))
+    threads = [threading.Thread(target=login) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while passwords._pending < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    passwords.shutdown()
+    for thread in threads:
+        thread.join()
+
+    # En file : annulés ; déjà transmis au processus : délai dépassé
+    assert len(errors) == 4
+    assert "Pool de hachage arrêté" in errors
+
+
+def test_without_workers_hashes_inline(monkeypatch):
+    monkeypatch.setattr(passwords, "HASH_WORKERS", 0)
+    assert passwords.verify_password(passwords.hash_password("secret1"), "secret1") == (True, None)
+
+
+# -------------------------------------------------------------
+# Connexion et inscription
+# -------------------------------------------------------------
+
+def test_login_rehashes_old_parameters(client, users_copy):
+    response = client.post("/login", data={"email": "hash@test.fr", "password": "secret1"})
+    assert response.status_code == 302 and response.location.endswith("/feed")
+    stored = dm.get_user_by_email("hash@test.fr")["password"]
+    assert stored.startswith(FAST + "$") and check_password_hash(stored, "secret1")
+
+    client.post("/login", data={"email": "hash@test.fr", "password": "secret1"})
+    assert dm.get_user_by_email("hash@test.fr")["password"] == stored
+
+
+def test_wrong_password_keeps_the_hash(client, users_copy):
+    before = dm.get_user_by_email("hash@test.fr")["password"]
+    response = client.post("/login", data={"email": "hash@test.fr", "password": "wrong"})
+    assert response.location.endswith("/login")
+    assert dm.get_user_by_email("hash@test.fr")["password"] == before
+
+
+def test_busy_pool_answers_503(client, users_copy, monkeypatch):
+    monkeypatch.setattr(passwords, "HASH_QUEUE", 0)
+    response = client.post("/login", data={"email": "hash@test.fr", "password": "secret1"})
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+    assert "Serveur occupé" in response.get_data(as_text=True)
+
+    response = client.post("/signup", data={"username": "other", "email": "other@test.fr",
+                                            "password": "secret1"})
+    assert response.status_code == 503
+    assert dm.get_user_by_email("other@test.fr") is None
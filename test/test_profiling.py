@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from utils import profiling
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    from app import app
+    monkeypatch.setitem(app.config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setitem(app.config, "PROFILE_SAMPLE_RATE", 0.0)
+    monkeypatch.setitem(app.config, "PROFILE_TOKEN", "secret")
+    monkeypatch.setitem(app.config, "PROFILE_MAX_FILES", 3)
+    return app
+
+
+# -------------------------------------------------------------
+# Échantillonnage et en-tête
+# -------------------------------------------------------------
+
+def test_requests_are_not_profiled_by_default(app, tmp_path):
+    app.test_client().get("/login")
+    assert os.listdir(tmp_path) == []
+
+
+def test_sampled_requests_are_profiled_by_endpoint(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "PROFILE_SAMPLE_RATE", 1.0)
+    client = app.test_client()
+    client.get("/login")
+    client.get("/signup")
+
+    assert [profiling.endpoint_of(p) for p in profiling.profiles(str(tmp_path))] == ["routes.login", "routes.signup"]
+    assert len(profiling.profiles(str(tmp_path), "routes.login")) == 1
+
+
+def test_header_forces_profiling_only_with_the_token(app, tmp_path):
+    client = app.test_client()
+    client.get("/login", headers={"X-Profile": "wrong"})
+    assert profiling.profiles(str(tmp_path)) == []
+
+    client.get("/login", headers={"X-Profile": "secret"})
+    assert len(profiling.profiles(str(tmp_path))) == 1
+
+
+def test_profile_directory_is_bounded(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, "PROFILE_SAMPLE_RATE", 1.0)
+    client = app.test_client()
+    for _ in range(5):
+        client.get("/login")
+    client.get("/signup")
+
+    paths = profiling.profiles(str(tmp_path))
+    assert len(paths) == 3
+    # Les plus anciens sont supprimés
+    assert profiling.endpoint_of(paths[-1]) == "routes.signup"
+
+
+# -------------------------------------------------------------
+# Rapport agrégé
+# -------------------------------------------------------------
+
+def test_report_lists_hot_functions(app, tmp_path):
+    client = app.test_client()
+    client.get("/login", headers={"X-Profile": "secret"})
+    client.get("/login", headers={"X-Profile": "secret"})
+
+    assert client.get("/debug/profiles").status_code == 404
+    response = client.get("/debug/profiles?endpoint=routes.login&limit=5",
+                          headers={"X-Profile-Token": "secret"})
+    data = response.get_json()
+    assert data["success"] and data["profiles"] == 2
+    assert data["endpoints"] == {"routes.login": 2}
+    assert len(data["functions"]) == 5
+    cumtimes = [f["cumtime"] for f in data["functions"]]
+    assert cumtimes == sorted(cumtimes, reverse=True)
+
+    assert client.get("/debug/profiles?sort=bogus", headers={"X-Profile-Token": "secret"}).status_code == 400
+
+
+def test_only_one_profile_at_a_time():
+    profiler = profiling.start()
+    try:
+        assert profiling.start() is None
+    finally:
+        profiler.disable()
+        profiling._active.release()
@@ -0,0 +1,157 @@
+import pytest
+
+import utils.sqlite_backend as sb
+
+
+# -------------------------------------------------------------
+# Base SQLite temporaire
+# -------------------------------------------------------------
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(sb, "_pool", sb.ConnectionPool(str(tmp_path / "tigers.db")))
+    sb.import_json(
+        users=[
+            {"id": 1, "username": "alice", "email": "a@example.com", "password": "x",
+             "followers": [], "following": [2]},
+            {"id": 2, "username": "Bob", "email": "b@example.com", "password": "x",
+             "followers": [1], "following": [], "bio": "hello"},
+        ],
+        tweets=[
+            {"id": 1, "user_id": 2, "username": "Bob", "content": "salut", "image_urls": [],
+             "likes": [1], "created_at": "2025-12-01T10:00:00Z", "retweets": [1],
+             "comments": [{"user_id": 1, "username": "alice", "content": "yo",
+                           "created_at": "2025-12-01T11:00:00", "likes": []}],
+             "reactions": {"🔥": [1]}},
+        ],
+        notifications=[
+            {"to_user_id": 2, "from_user_id": 1, "type": "like", "tweet_id": 1,
+             "content": None, "seen": False, "created_at": "2025-12-01T10:05:00"},
+        ],
+    )
+    return sb
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_json_round_trip(db):
+    tweet = db.get_tweet(1)
+    assert tweet["likes"] == [1]
+    # Ancien format de retweet converti avec la date du tweet
+    assert tweet["retweets"] == [{"user_id": 1, "retweeted_at": "2025-12-01T10:00:00Z"}]
+    assert tweet["comments"][0]["content"] == "yo"
+    # Les champs inconnus sont conservés
+    assert tweet["reactions"] == {"🔥": [1]}
+
+    bob = db.get_user_by_username("bob", ignore_case=True)
+    assert bob["followers"] == [1] and bob["bio"] == "hello"
+    assert db.get_user_by_email("a@example.com")["following"] == [2]
+    assert len(db.read_notifications()) == 1
+
+
+def test_tweet_ops_are_idempotent(db):
+    db.apply_tweet_op({"op": "like", "tweet_id": 1, "user_id": 2})
+    tweet = db.apply_tweet_op({"op": "like", "tweet_id": 1, "user_id": 2})
+    assert tweet["likes"] == [1, 2]
+
+    reply = {"user_id": 2, "username": "Bob", "content": "merci", "created_at": "2025-12-02T00:00:00"}
+    db.apply_tweet_op({"op": "reply", "tweet_id": 1, "index": 0, "reply_index": 0, "reply": reply})
+    tweet = db.apply_tweet_op({"op": "reply", "tweet_id": 1, "index": 0, "reply_index": 0, "reply": reply})
+    assert tweet["comments"][0]["replies"] == [reply]
+
+    tweet = db.apply_tweet_op({"op": "unlike", "tweet_id": 1, "user_id": 1})
+    assert tweet["likes"] == [2]
+
+
+def test_follow_unfollow(db):
+    assert db.unfollow_user(1, 2) is True
+    assert db.get_user(2)["followers"] == []
+    assert db.follow_user(2, 1) is True
+    assert db.get_user(1)["followers"] == [2]
+    assert db.follow_user(2, 99) is False
+
+
+def test_tweets_page(db):
+    for i in range(2, 6):
+        db.apply_tweet_op({"op": "add_tweet", "tweet": {
+            "id": i, "user_id": 1 + i % 2, "username": "x", "content": str(i),
+            "created_at": f"2025-12-0{i}T10:00:00Z"}})
+
+    assert [t["id"] for t in db.tweets_page(limit=3)] == [5, 4, 3]
+    assert [t["id"] for t in db.tweets_page(before=("2025-12-04T10:00:00Z", 4), limit=3)] == [3, 2, 1]
+    assert [t["id"] for t in db.tweets_page(after=("2025-12-02T10:00:00Z", 2), limit=2)] == [4, 3]
+    assert [t["id"] for t in db.tweets_page(user_id=2)] == [5, 3, 1]
+    assert [t["id"] for t in db.tweets_page(exclude_user_ids=[2])] == [4, 2]
+    assert db.count_tweets(2) == 3
+
+
+def test_next_ids_follow_the_largest_id(db):
+    assert db.next_user_id() == 3
+    assert db.next_tweet_id() == 2
+    db.apply_tweet_op({"op": "add_tweet", "tweet": {
+        "id": 7, "user_id": 1, "username": "x", "content": "sept", "created_at": "2025-12-07T10:00:00Z"}})
+    assert db.next_tweet_id() == 8
+
+
+def test_retweets_page(db):
+    db.apply_tweet_op({"op": "add_tweet", "tweet": {
+        "id": 2, "user_id": 2, "username": "Bob", "content": "deux", "created_at": "2025-12-02T10:00:00Z"}})
+    db.apply_tweet_op({"op": "retweet", "tweet_id": 2, "user_id": 1, "retweeted_at": "2025-12-03T10:00:00Z"})
+
+    page = db.retweets_page(1)
+    assert [(t["id"], t["retweeted_at"]) for t in page] == [
+        (2, "2025-12-03T10:00:00Z"), (1, "2025-12-01T10:00:00Z")]
+    assert all(t["is_retweet"] for t in page)
+    assert [t["id"] for t in db.retweets_page(1, before=("2025-12-03T10:00:00Z", 2))] == [1]
+    assert [t["id"] for t in db.retweets_page(1, after=("2025-12-01T10:00:00Z", 1))] == [2]
+    assert db.count_retweets(1) == 2 and db.count_retweets(2) == 0
+
+
+def test_interaction_membership_and_counts(db):
+    assert db.liked_tweet_ids(1, [1, 42]) == {1}
+    assert db.liked_tweet_ids(2, [1]) == set()
+    assert db.retweeted_tweet_ids(1, [1]) == {1}
+    db.apply_tweet_op({"op": "like_comment", "tweet_id": 1, "index": 0, "user_id": 2})
+    assert db.liked_comment(1, 0, 2) and not db.liked_comment(1, 0, 1)
+    assert db.interaction_counts([1, 42]) == {1: {"likes": 1, "retweets": 1, "comments": 1}}
+
+
+def test_tweets_transaction_commits_once(db):
+    with db.tweets_transaction():
+        db.apply_tweet_op({"op": "like", "tweet_id": 1, "user_id": 2})
+        db.apply_tweet_op({"op": "retweet", "tweet_id": 1, "user_id": 2, "retweeted_at": "2025-12-02T00:00:00"})
+    assert db.interaction_counts([1]) == {1: {"likes": 2, "retweets": 2, "comments": 1}}
+
+    # Une erreur annule tout le bloc
+    with pytest.raises(RuntimeError):
+        with db.tweets_transaction():
+            db.apply_tweet_op({"op": "unlike", "tweet_id": 1, "user_id": 2})
+            raise RuntimeError
+    assert db.liked_tweet_ids(2, [1]) == {1}
+
+
+def test_get_users_batch(db):
+    users = db.get_users([2, 1, 42])
+    assert sorted(users) == [1, 2]
+    assert users[2]["username"] == "Bob"
+    assert db.get_users([]) == {}
+
+
+def test_notification_counters_and_retention(db):
+    assert db.unread_count(2) == 1
+    for i in range(3):
+        db.add_notification(2, 1, "comment", 1, f"c{i}")
+    assert db.unread_count(2) == 4
+    page = db.notifications_page(2, limit=2)
+    assert [n["content"] for n in page] == ["c2", "c1"]
+
+    db.mark_notifications_seen(2, up_to=page[-1]["id"])
+    assert db.unread_count(2) == 1
+    db.mark_notifications_seen(2)
+    assert db.unread_count(2) == 0
+
+    # Les notifications lues de plus de NOTIF_TTL_DAYS jours disparaissent (la plus ancienne, de 2025-12)
+    db.compact_notifications()
+    remaining = [n["content"] for n in db.notifications_page(2)]
+    assert None not in remaining and len(remaining) == 3
@@ -0,0 +1,75 @@
+import shutil
+
+import pytest
+
+import utils.data_manager as dm
+from utils.pagination import PAGE_SIZE
+
+
+@pytest.fixture
+def tweets_copy(tmp_path, monkeypatch):
+    """Tweets du dépôt copiés dans un dossier temporaire, pour les routes qui écrivent."""
+    path = str(tmp_path / "tweets.json")
+    shutil.copy(dm._tweets_store.path, path)
+    monkeypatch.setattr(dm, "_tweets_store", dm._make_tweets_store(path))
+
+    notif_dir = tmp_path / "notifications"
+    unread_file = str(notif_dir / "unread.json")
+    monkeypatch.setattr(dm, "NOTIF_DIR", str(notif_dir))
+    monkeypatch.setattr(dm, "NOTIF_UNREAD_FILE", unread_file)
+    monkeypatch.setattr(dm, "_inboxes", {})
+    monkeypatch.setattr(dm, "_unread_store", dm._make_unread_store(unread_file))
+
+
+# -------------------------------------------------------------
+# La fixture elle-même
+# -------------------------------------------------------------
+
+def test_budget_catches_one_lookup_per_item(storage_budget):
+    ids = [1, 2, 3, 4]
+    with pytest.raises(pytest.fail.Exception, match="lectures tweets.json : 4 > 1"):
+        with storage_budget(reads={"tweets.json": 1}):
+            [dm.get_tweet(tweet_id) for tweet_id in ids]
+
+    with storage_budget(reads={"tweets.json": 1}, writes=0, scanned={"tweets.json": len(ids)}) as calls:
+        dm.get_tweets(ids)
+    assert calls.reads == {"tweets.json": 1}
+
+
+# -------------------------------------------------------------
+# Routes en lecture (données du dépôt, après une requête de mise en route)
+# -------------------------------------------------------------
+
+@pytest.mark.parametrize("url, reads, scanned", [
+    ("/feed", {"tweets.json": 3, "users.json": 2, "timelines.json": 1}, {"tweets.json": 3 * PAGE_SIZE}),
+    ("/feed?partial=1", {"tweets.json": 3, "users.json": 2, "timelines.json": 1}, {"tweets.json": 3 * PAGE_SIZE}),
+    ("/feed?view=recommended", {"tweets.json": 3, "users.json": 2}, {"tweets.json": 3 * PAGE_SIZE}),
+    ("/api/feed", {"tweets.json": 3, "users.json": 2, "timelines.json": 1}, {"tweets.json": 3 * PAGE_SIZE}),
+    ("/profile/clairoew", {"tweets.json": 6, "users.json": 4}, None),
+    ("/comments/4", {"tweets.json": 1, "users.json": 1}, None),
+    ("/api/counts?ids=1,2,3,4,5", {"tweets.json": 3}, {"tweets.json": 15}),
+    ("/api/current_user", {"users.json": 1}, None),
+    ("/search?q=j", {"users.json": 2}, None),
+    ("/search_live?q=j", {"users.json": 2}, None),
+    ("/search/tweets?q=a", {"tweets.json": 2, "users.json": 1}, None),
+])
+def test_read_routes_stay_within_budget(authed_client, storage_budget, url, reads, scanned):
+    authed_client.get(url)
+    with storage_budget(reads=reads, writes=0, scanned=scanned):
+        assert authed_client.get(url).status_code < 400
+
+
+# -------------------------------------------------------------
+# Routes en écriture (copie temporaire des tweets)
+# -------------------------------------------------------------
+
+def test_like_writes_once(authed_client, storage_budget, tweets_copy):
+    with storage_budget(reads={"tweets.json": 3}, writes={"tweets.json": 1}):
+        assert authed_client.post("/like/5").get_json()["liked"]
+
+
+def test_batch_writes_tweets_once(authed_client, storage_budget, tweets_copy):
+    ops = [{"op": "like", "tweet_id": tweet_id} for tweet_id in (5, 6, 7, 8)]
+    with storage_budget(writes={"tweets.json": 1}):
+        results = authed_client.post("/api/batch", json={"ops": ops}).get_json()["results"]
+    assert all(result["liked"] for result in results)
@@ -0,0 +1,163 @@
+import pytest
+
+import utils.data_manager as dm
+import utils.timelines as tl
+from utils.pagination import decode_cursor
+
+
+# -------------------------------------------------------------
+# Timelines sur un fichier temporaire
+# -------------------------------------------------------------
+USERS = [
+    {"id": 1, "username": "alice", "following": [2], "followers": []},
+    {"id": 2, "username": "bob", "following": [], "followers": [1]},
+    {"id": 3, "username": "charlie", "following": [], "followers": []},
+]
+
+TWEETS = [
+    {"id": 1, "user_id": 2, "content": "bob 1", "created_at": "2025-12-01T10:00:00Z", "retweets": []},
+    {"id": 2, "user_id": 3, "content": "charlie 1", "created_at": "2025-12-02T10:00:00Z",
+     "retweets": [{"user_id": 2, "retweeted_at": "2025-12-03T10:00:00"}]},
+    {"id": 3, "user_id": 1, "content": "alice 1", "created_at": "2025-12-02T12:00:00Z", "retweets": []},
+    {"id": 4, "user_id": 3, "content": "charlie 2", "created_at": "2025-12-04T10:00:00Z", "retweets": []},
+]
+
+
+def install_tweets(tmp_path, monkeypatch, tweets):
+    """Tweets lus par follow() : un store temporaire contenant `tweets`."""
+    tweets_store = dm._make_tweets_store(str(tmp_path / "tweets.json"))
+    tweets_store.write([dict(t) for t in tweets])
+    monkeypatch.setattr(dm, "_tweets_store", tweets_store)
+    return tweets_store
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    install_tweets(tmp_path, monkeypatch, TWEETS)
+    store = tl._make_timelines_store(str(tmp_path / "timelines.json"))
+    monkeypatch.setattr(tl, "_timelines_store", store)
+    tl.rebuild(USERS, TWEETS)
+    return store
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_rebuild_orders_followed_tweets_and_retweets():
+    # Le retweet de bob fait remonter le tweet de charlie à la date du retweet
+    assert tl.home_timeline(1) == [2, 3, 1]
+    assert tl.home_timeline(1, limit=2) == [2, 3]
+    assert tl.home_timeline(3) == [4, 2]
+    assert tl.home_timeline(42) == []
+
+
+def test_fan_out_on_post_and_retweet():
+    tl.push_tweet({"id": 5, "user_id": 2, "created_at": "2025-12-05T10:00:00Z"}, [1])
+    assert tl.home_timeline(1)[0] == 5
+    assert tl.home_timeline(2)[0] == 5
+
+    tl.push_retweet(2, [1], 4, "2025-12-06T10:00:00")
+    assert tl.home_timeline(1)[:2] == [4, 5]
+
+    tl.remove_retweet(2, [1], 4)
+    assert 4 not in tl.home_timeline(1)
+
+
+def test_follow_and_unfollow():
+    tl.follow(1, 3)
+    assert tl.home_timeline(1) == [4, 2, 3, 1]
+
+    # Le tweet 2 reste visible via le retweet de bob
+    tl.unfollow(1, 3)
+    assert tl.home_timeline(1) == [2, 3, 1]
+    tl.unfollow(1, 2)
+    assert tl.home_timeline(1) == [3]
+
+
+def test_incremental_updates_match_rebuild(store):
+    tweet = {"id": 5, "user_id": 3, "created_at": "2025-12-05T10:00:00Z"}
+    dm.apply_tweet_op({"op": "add_tweet", "tweet": dict(tweet)})
+    tl.push_tweet(tweet, [])
+    tl.follow(1, 3)
+    incremental = tl.home_timeline(1)
+
+    users = [dict(USERS[0], following=[2, 3])] + USERS[1:]
+    tweets = TWEETS + [{"id": 5, "user_id": 3, "created_at": "2025-12-05T10:00:00Z"}]
+    tl.rebuild(users, tweets)
+    assert tl.home_timeline(1) == incremental
+
+
+def test_push_inserts_in_place_without_duplicates(monkeypatch):
+    monkeypatch.setattr(tl, "TIMELINE_MAX_LENGTH", 4)
+    entries = []
+    pushed = [["2025-12-0%d" % day, day, 1] for day in (3, 1, 5, 2, 4, 6)]
+    for entry in pushed + pushed:
+        tl._insert(entries, entry)
+    # Même résultat qu'une fusion complète : triée, sans doublon, tronquée
+    assert entries == tl._merge([], pushed)
+    assert [e[1] for e in entries] == [6, 5, 4, 3]
+
+    # Plus ancienne que toutes les entrées d'une timeline pleine : ignorée
+    assert not tl._insert(entries, ["2025-11-30", 9, 1])
+    assert len(entries) == 4
+
+
+def test_follow_reads_the_followed_tweets_not_their_full_timeline(tmp_path, monkeypatch):
+    monkeypatch.setattr(tl, "TIMELINE_MAX_LENGTH", 5)
+    users = [
+        {"id": 1, "username": "alice", "following": [2], "followers": []},
+        {"id": 2, "username": "bob", "following": [], "followers": [1]},
+        {"id": 3, "username": "charlie", "following": [], "followers": []},
+    ]
+    # Les tweets récents de bob remplissent la timeline d'alice : son propre tweet en sort
+    tweets = [{"id": 1, "user_id": 1, "content": "a1", "created_at": "2025-11-01T10:00:00Z", "retweets": []}]
+    tweets += [{"id": n, "user_id": 2, "content": f"b{n}", "created_at": f"2025-12-{n:02d}T10:00:00Z",
+                "retweets": []} for n in range(2, 10)]
+    install_tweets(tmp_path, monkeypatch, tweets)
+    tl.rebuild(users, tweets)
+    assert 1 not in tl.home_timeline(1)
+
+    tl.follow(3, 1)
+    incremental = tl.home_timeline(3)
+    assert incremental == [1]
+
+    users[2]["following"] = [1]
+    tl.rebuild(users, tweets)
+    assert tl.home_timeline(3) == incremental
+
+
+def test_full_timeline_pages_on_into_the_followed_tweets(tmp_path, monkeypatch):
+    users = [
+        {"id": 1, "username": "alice", "following": [2], "followers": []},
+        {"id": 2, "username": "bob", "following": [], "followers": [1]},
+        {"id": 3, "username": "charlie", "following": [], "followers": []},
+    ]
+    tweets = [{"id": 1, "user_id": 1, "content": "a1", "created_at": "2025-11-01T10:00:00Z", "retweets": []},
+              {"id": 2, "user_id": 3, "content": "c1", "created_at": "2025-11-02T10:00:00Z",
+               "retweets": [{"user_id": 2, "retweeted_at": "2025-11-03T10:00:00"}]},
+              # Ancien tweet retweeté récemment : déjà visible dans la timeline, pas repris plus loin
+              {"id": 3, "user_id": 2, "content": "b0", "created_at": "2025-11-04T10:00:00Z",
+               "retweets": [{"user_id": 1, "retweeted_at": "2025-12-20T10:00:00"}]}]
+    tweets += [{"id": n, "user_id": 2, "content": f"b{n}", "created_at": f"2025-12-{n:02d}T10:00:00Z",
+                "retweets": []} for n in range(4, 12)]
+    install_tweets(tmp_path, monkeypatch, tweets)
+    tl.rebuild(users, tweets)
+    complete = tl.home_timeline(1)
+
+    monkeypatch.setattr(tl, "TIMELINE_MAX_LENGTH", 5)
+    tl.rebuild(users, tweets)
+    assert len(tl.home_timeline(1)) == 5
+
+    pages, cursor = [], None
+    while True:
+        page = tl.home_timeline_page(1, before=cursor, limit=3, following=[2])
+        pages.append([entry[1] for entry in page.items])
+        if page.older is None:
+            break
+        cursor = decode_cursor(page.older)
+    assert [tweet_id for items in pages for tweet_id in items] == complete
+
+    # Et en remontant depuis la dernière page
+    newer = tl.home_timeline_page(1, after=decode_cursor(page.newer), limit=3, following=[2])
+    assert [entry[1] for entry in newer.items] == pages[-2]
@@ -0,0 +1,84 @@
+import copy
+import json
+
+import pytest
+
+import utils.tweet_search as ts
+from utils.pagination import decode_cursor
+
+
+# -------------------------------------------------------------
+# Index sur un fichier temporaire
+# -------------------------------------------------------------
+TWEETS = [
+    {"id": 1, "user_id": 1, "content": "Le café du matin", "created_at": "2025-12-01T10:00:00Z",
+     "comments": [{"user_id": 2, "content": "Un CAFÉ serré !"}]},
+    {"id": 2, "user_id": 2, "content": "Soirée cinéma et café", "created_at": "2025-12-01T14:00:00Z",
+     "comments": []},
+    {"id": 3, "user_id": 3, "content": "Rien à voir", "created_at": "2025-12-03T10:00:00Z",
+     "comments": [{"user_id": 1, "content": "vraiment rien",
+                   "replies": [{"user_id": 3, "content": "du thé alors"}]}]},
+]
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    store = ts._make_search_store(str(tmp_path / "search_index.json"))
+    monkeypatch.setattr(ts, "_search_store", store)
+    ts.rebuild(copy.deepcopy(TWEETS))
+    return store
+
+
+def ids(page):
+    return [tweet_id for _, tweet_id in page.items]
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_tokenize_folds_case_and_accents():
+    assert ts.tokenize("Le CAFÉ, c'est l'été !") == ["cafe", "ete"]
+
+
+def test_search_tweets_comments_and_replies():
+    assert sorted(ids(ts.search_page("cafe"))) == [1, 2]
+    assert ids(ts.search_page("thé")) == [3]
+    assert ids(ts.search_page("café cinéma")) == [2]
+    assert ids(ts.search_page("inconnu")) == []
+    assert ids(ts.search_page("le et")) == []
+
+
+def test_relevance_and_recency_ranking():
+    # Le tweet 1 mentionne deux fois « café » : plus pertinent que le tweet 2, de peu plus récent
+    assert ids(ts.search_page("cafe")) == [1, 2]
+    assert ids(ts.search_page("cafe", sort="recent")) == [2, 1]
+
+
+def test_pagination_over_hits():
+    first = ts.search_page("cafe", limit=1)
+    second = ts.search_page("cafe", before=decode_cursor(first.older), limit=1)
+    assert ids(first) + ids(second) == [1, 2]
+    assert second.older is None
+    assert ids(ts.search_page("cafe", after=decode_cursor(second.newer), limit=1)) == [1]
+
+
+def test_incremental_updates_match_rebuild(store, tmp_path):
+    tweet = {"id": 4, "user_id": 1, "content": "Thé vert", "created_at": "2025-12-04T10:00:00Z",
+             "comments": [{"user_id": 2, "content": "thé noir", "replies": []}]}
+    ts.index_tweet(tweet)
+    ts.index_comment(tweet, 0)
+    ts.index_comment(tweet, 0)  # rejoué : sans effet
+    tweet["comments"][0]["replies"].append({"user_id": 1, "content": "thé blanc"})
+    ts.index_reply(tweet, 0, 0)
+    incremental = ts.search_page("the")
+    assert ids(incremental) == [4, 3]
+
+    # Un autre processus relit l'index et son journal sans re-découper les tweets
+    reloaded = ts._make_search_store(store.path)
+    assert {r["tweet_id"] for r in reloaded.read() if "tweet_id" in r} == {1, 2, 3, 4}
+    with open(store.log_path) as f:
+        assert [json.loads(line)["part"] for line in f] == ["t", "c0", "c0", "c0r0"]
+
+    ts.rebuild(copy.deepcopy(TWEETS) + [tweet])
+    assert ts.search_page("the") == incremental
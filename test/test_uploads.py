@@ -0,0 +1,126 @@
+import hashlib
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import utils.data_manager as dm
+import utils.uploads as up
+
+
+# -------------------------------------------------------------
+# Dossier d'uploads et références sur des fichiers temporaires
+# -------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(up, "_refs_store", up._make_refs_store(str(tmp_path / "upload_refs.json")))
+    monkeypatch.setattr(up, "UPLOAD_ROOT", str(tmp_path / "uploads"))
+    return tmp_path / "uploads"
+
+
+def image(data, name="photo.JPG"):
+    return FileStorage(stream=io.BytesIO(data), filename=name)
+
+
+def files(root, kind):
+    return sorted(os.listdir(root / kind))
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_content_addressed_names_and_dedupe(root):
+    pending = up.ingest([image(b"chat"), image(b"pain", "pain.png"), image(b"chat")], up.TWEET_IMAGES)
+    names = up.attach(pending, up.TWEET_IMAGES, "tweet:1")
+
+    assert names[0] == hashlib.sha256(b"chat").hexdigest() + ".jpg"
+    assert names[0] == names[2]
+    # Une seule copie par contenu, aucun fichier temporaire restant
+    assert files(root, up.TWEET_IMAGES) == sorted(set(names))
+
+    up.attach(up.ingest([image(b"chat")], up.TWEET_IMAGES), up.TWEET_IMAGES, "tweet:2")
+    assert files(root, up.TWEET_IMAGES) == sorted(set(names))
+    assert up.ref_count(f"{up.TWEET_IMAGES}/{names[0]}") == 2
+    # Lisibles par le proxy frontal, pas 0600 comme le fichier temporaire
+    assert os.stat(root / up.TWEET_IMAGES / names[0]).st_mode & 0o777 == dm.FILE_MODE
+
+
+def test_size_cap_rejects_the_whole_upload(root, monkeypatch):
+    monkeypatch.setattr(up, "MAX_UPLOAD_SIZE", 10)
+    monkeypatch.setattr(up, "CHUNK_SIZE", 4)
+    with pytest.raises(up.UploadTooLarge):
+        up.ingest([image(b"petit"), image(b"beaucoup trop gros")], up.TWEET_IMAGES)
+    assert files(root, up.TWEET_IMAGES) == []
+
+
+def test_release_deletes_unused_files(root):
+    name, = up.attach(up.ingest([image(b"avatar")], up.PROFILE_PICS), up.PROFILE_PICS, "user:1")
+    up.attach(up.ingest([image(b"avatar")], up.PROFILE_PICS), up.PROFILE_PICS, "user:2")
+    path = f"{up.PROFILE_PICS}/{name}"
+
+    up.release(path, "user:1")
+    assert files(root, up.PROFILE_PICS) == [name]
+    up.release(path, "user:2")
+    assert files(root, up.PROFILE_PICS) == []
+    assert up.ref_count(path) == 0
+
+
+def test_rebuild_from_users_and_tweets(root):
+    digest = "a" * 64
+    (root / up.TWEET_IMAGES).mkdir(parents=True)
+    (root / up.TWEET_IMAGES / f"{digest}.png").write_bytes(b"image")
+    os.chmod(root / up.TWEET_IMAGES / f"{digest}.png", 0o600)
+    count = up.rebuild(
+        users=[{"id": 1, "profile_pic_url": f"/uploads/profile_pics/{digest}.png"},
+               {"id": 2, "profile_pic_url": "/uploads/profile_pics/2_ancien.jpg"}],
+        tweets=[{"id": 5, "image_urls": [f"/uploads/tweet_images/{digest}.png"] * 2}])
+    # Les anciens noms (non adressés par contenu) ne sont pas suivis
+    assert count == 2
+    assert up.ref_count(f"profile_pics/{digest}.png") == 1
+    assert up.ref_count(f"tweet_images/{digest}.png") == 1
+    assert os.stat(root / up.TWEET_IMAGES / f"{digest}.png").st_mode & 0o777 == dm.FILE_MODE
+
+
+# -------------------------------------------------------------
+# Service des images (/uploads)
+# -------------------------------------------------------------
+
+def test_content_addressed_images_are_immutable(root, client):
+    name, = up.attach(up.ingest([image(b"0123456789")], up.TWEET_IMAGES), up.TWEET_IMAGES, "tweet:1")
+    url = f"/uploads/tweet_images/{name}"
+
+    response = client.get(url)
+    assert response.data == b"0123456789"
+    assert response.headers["ETag"] == f'"{name.split(".")[0]}"'
+    assert "immutable" in response.headers["Cache-Control"]
+
+    assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    partial = client.get(url, headers={"Range": "bytes=2-5"})
+    assert partial.status_code == 206 and partial.data == b"2345"
+
+
+def test_legacy_images_are_revalidated(root, client):
+    os.makedirs(root / up.PROFILE_PICS)
+    (root / up.PROFILE_PICS / "3_avatar.jpg").write_bytes(b"ancien")
+
+    response = client.get("/uploads/profile_pics/3_avatar.jpg")
+    assert response.data == b"ancien"
+    assert "no-cache" in response.headers["Cache-Control"]
+    assert client.get("/uploads/profile_pics/3_avatar.jpg",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert client.get("/uploads/profile_pics/absent.jpg").status_code == 404
+
+
+def test_x_accel_mode_leaves_bytes_to_the_proxy(root, client, monkeypatch):
+    monkeypatch.setattr(up, "SERVE_MODE", "x-accel")
+    name, = up.attach(up.ingest([image(b"octets")], up.TWEET_IMAGES), up.TWEET_IMAGES, "tweet:1")
+
+    response = client.get(f"/uploads/tweet_images/{name}")
+    assert response.data == b""
+    assert response.headers["X-Accel-Redirect"] == f"{up.X_ACCEL_PREFIX}tweet_images/{name}"
+    assert response.mimetype == "image/jpeg"
+    assert "immutable" in response.headers["Cache-Control"]
+    assert client.get(f"/uploads/tweet_images/{name}",
+                      headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
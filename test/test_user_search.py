@@ -0,0 +1,88 @@
+from utils.user_search import UsernameIndex, trigrams
+
+
+# -------------------------------------------------------------
+# Index sur une liste d'utilisateurs en mémoire
+# -------------------------------------------------------------
+
+def make_index(users, state=None):
+    state = state if state is not None else {"version": 1}
+    return UsernameIndex(load_users=lambda: users, version=lambda: state["version"])
+
+
+def user(user_id, username, followers=0):
+    return {"id": user_id, "username": username, "followers": list(range(100, 100 + followers))}
+
+
+USERS = [
+    user(1, "kris"),
+    user(2, "krisboy", followers=1),
+    user(3, "kristal", followers=5),
+    user(4, "nlkris", followers=2),
+    user(5, "chris", followers=9),
+    user(6, "alice"),
+]
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_trigrams_are_padded():
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+
+
+def test_ranking_exact_prefix_substring_fuzzy():
+    index = make_index(USERS)
+    # exact, puis préfixes par abonnés, puis sous-chaîne, puis faute de frappe
+    assert index.search("KRIS") == [1, 3, 2, 4]
+    assert index.search("krist") == [3, 1, 2]
+
+
+def test_short_query_matches_prefix_only():
+    index = make_index(USERS)
+    assert index.search("kr") == [3, 2, 1]
+    assert index.search("is") == []
+
+
+def test_limit_and_excluded_user():
+    index = make_index(USERS)
+    assert index.search("kris", limit=2, exclude_id=1) == [3, 2]
+
+
+def test_typo_tolerance():
+    index = make_index(USERS)
+    assert index.search("alicr") == [6]
+    assert index.search("alicee") == [6]
+
+
+def test_updates_through_updating_keep_index_in_sync():
+    users = [dict(u) for u in USERS]
+    state = {"version": 1}
+    index = make_index(users, state)
+    assert index.search("kris")[0] == 1
+
+    with index.updating():
+        users.append(user(7, "zed"))
+        state["version"] += 1
+        index.add(users[-1])
+        index.rename(1, "bob")
+        index.set_followers(2, 50)
+
+    # Pas de reconstruction : l'index voit l'ajout, le renommage et les abonnés
+    assert index.synced == 2
+    assert index.search("zed") == [7]
+    assert index.search("bob") == [1]
+    assert index.search("kris")[:2] == [2, 3]
+
+
+def test_external_write_triggers_rebuild():
+    users = [user(1, "kris")]
+    state = {"version": 1}
+    index = make_index(users, state)
+    assert index.search("kris") == [1]
+
+    users.append(user(2, "krisp"))
+    assert index.search("kris") == [1]  # version inchangée : cache
+    state["version"] += 1
+    assert index.search("kris") == [1, 2]
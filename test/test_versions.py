@@ -0,0 +1,66 @@
+import pytest
+
+import backend.routes as routes
+import utils.versions as versions
+
+
+# -------------------------------------------------------------
+# Compteurs sur un fichier temporaire
+# -------------------------------------------------------------
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    store = versions._make_versions_store(str(tmp_path / "versions.json"))
+    monkeypatch.setattr(versions, "_versions_store", store)
+    return store
+
+
+# -------------------------------------------------------------
+# Tests
+# -------------------------------------------------------------
+
+def test_bump_changes_only_its_etags(store):
+    comments, profiles = versions.etag("comments:1"), versions.etag("profiles")
+    versions.bump("comments:1")
+    versions.bump("comments:1")
+
+    assert versions.etag("comments:1") != comments
+    assert versions.etag("profiles") == profiles
+    assert versions.etag("comments:1").endswith("-2")
+
+    # Relu par un autre processus (journal)
+    other = versions._make_versions_store(store.path)
+    assert other.get("key", "comments:1")["value"] == 2
+
+
+def test_reset_invalidates_every_etag():
+    versions.bump("users")
+    before = versions.etag("users")
+    versions.reset()
+    assert versions.etag("users") != before
+    assert versions.etag("users").endswith("-0")
+
+
+def test_not_modified_without_reading_users(authed_client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(routes, "get_user", lambda user_id: calls.append(user_id) or
+                        {"id": user_id, "username": "nlkris", "following": [1]})
+
+    response = authed_client.get("/api/current_user")
+    assert response.json["following"] == [1]
+    assert "no-cache" in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+
+    assert authed_client.get("/api/current_user", headers={"If-None-Match": etag}).status_code == 304
+    assert calls == [3]
+
+    # Un abonnement change la version de l'utilisateur
+    versions.bump("user:3")
+    assert authed_client.get("/api/current_user", headers={"If-None-Match": etag}).status_code == 200
+    assert calls == [3, 3]
+
+
+def test_errors_are_not_tagged(authed_client, monkeypatch):
+    monkeypatch.setattr(routes, "get_tweet", lambda tweet_id: None)
+    response = authed_client.get("/comments/999999")
+    assert response.status_code == 404
+    assert "ETag" not in response.headers
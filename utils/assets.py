@@ -0,0 +1,113 @@
+"""
+Ressources statiques versionnées par leur contenu (CSS, JS, images).
+
+asset_url('css/feed.css') dans les templates donne /assets/css/feed.<empreinte>.css :
+l'URL change avec le contenu, le navigateur peut donc la garder en cache
+un an sans jamais la revalider. Les fichiers texte sont compressés une fois
+(gzip) et servis compressés aux clients qui l'acceptent.
+
+Les ressources sont relues dès que leur fichier change (signature stat,
+comme JsonStore). Pour un proxy frontal qui sert static/ directement
+(gzip_static de nginx), les variantes .gz s'écrivent avec
+
+    python -m utils.assets
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import NamedTuple
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
+
+# Longueur de l'empreinte (sha256 tronqué) insérée dans le nom
+DIGEST_LENGTH = 12
+# Types compressés (les images le sont déjà)
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+# Réponses HTML/JSON plus petites que ça : pas de compression
+MIN_COMPRESS_SIZE = 500
+GZIP_LEVEL = 6
+
+
+class Asset(NamedTuple):
+    path: str        # chemin relatif à static/
+    digest: str
+    data: bytes
+    gzipped: bytes   # None si le type n'est pas compressible
+    mimetype: str
+    signature: tuple
+
+
+_assets = {}
+_assets_guard = threading.Lock()
+
+
+def gzip_bytes(data, level=GZIP_LEVEL):
+    """Compression gzip déterministe (sans date dans l'en-tête)."""
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _full_path(path):
+    full = os.path.normpath(os.path.join(STATIC_DIR, path))
+    return full if os.path.commonpath([full, STATIC_DIR]) == STATIC_DIR else None
+
+
+def get(path):
+    """Asset du fichier static/`path`, relu s'il a changé ; None s'il n'existe pas."""
+    full = _full_path(path)
+    try:
+        st = os.stat(full) if full else None
+    except FileNotFoundError:
+        st = None
+    if st is None or not os.path.isfile(full):
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _assets_guard:
+        asset = _assets.get(path)
+        if asset is None or asset.signature != signature:
+            with open(full, 'rb') as f:
+                data = f.read()
+            extension = os.path.splitext(path)[1].lower()
+            asset = Asset(path, hashlib.sha256(data).hexdigest()[:DIGEST_LENGTH], data,
+                          gzip_bytes(data, 9) if extension in COMPRESSIBLE else None,
+                          mimetypes.guess_type(path)[0] or 'application/octet-stream', signature)
+            _assets[path] = asset
+        return asset
+
+
+def fingerprint(path):
+    """Nom versionné de static/`path` ("css/feed.css" -> "css/feed.<empreinte>.css"), None s'il n'existe pas."""
+    asset = get(path)
+    if asset is None:
+        return None
+    stem, extension = os.path.splitext(path)
+    return f"{stem}.{asset.digest}{extension}"
+
+
+def resolve(name):
+    """Inverse de fingerprint() : (chemin, empreinte demandée), ou None si le nom n'est pas versionné."""
+    stem, extension = os.path.splitext(name)
+    stem, _, digest = stem.rpartition('.')
+    if not stem or len(digest) != DIGEST_LENGTH:
+        return None
+    return stem + extension, digest
+
+
+def write_gzip_variants():
+    """Écrit fichier.gz à côté de chaque ressource compressible ; retourne leur nombre."""
+    count = 0
+    for directory, _, filenames in os.walk(STATIC_DIR):
+        for filename in filenames:
+            if os.path.splitext(filename)[1].lower() not in COMPRESSIBLE:
+                continue
+            asset = get(os.path.relpath(os.path.join(directory, filename), STATIC_DIR))
+            with open(os.path.join(directory, filename + '.gz'), 'wb') as f:
+                f.write(asset.gzipped)
+            count += 1
+    return count
+
+
+if __name__ == '__main__':
+    count = write_gzip_variants()
+    print(f"{count} ressources compressées dans {STATIC_DIR}")
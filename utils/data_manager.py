@@ -1,10 +1,623 @@
+import bisect
 import json
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 
-# Le dossier data est à la racine du projet
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+from utils import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows : verrouillage limité au processus courant
+    fcntl = None
+
+# Le dossier data est à la racine du projet (TIGERS_DATA_DIR pour en utiliser un autre, ex. bench/)
+BASE_DIR = os.path.abspath(os.environ.get('TIGERS_DATA_DIR')
+                           or os.path.join(os.path.dirname(__file__), '..', 'data'))
 USERS_FILE = os.path.join(BASE_DIR, 'users.json')
 TWEETS_FILE = os.path.join(BASE_DIR, 'tweets.json')
+# Journal des mutations de tweets (likes, retweets, commentaires...)
+TWEETS_LOG_FILE = TWEETS_FILE + '.log'
+TWEETS_LOG_COMPACT_THRESHOLD = 500
+
+# Les tweets sans created_at sont triés comme très anciens
+EPOCH = '1970-01-01T00:00:00Z'
+
+# Backend de stockage : "json" (fichiers ci-dessus) ou "sqlite" (voir utils/sqlite_backend.py)
+STORAGE_BACKEND = os.environ.get('TIGERS_STORAGE', 'json')
+
+# Droits des fichiers écrits via un fichier temporaire (mkstemp les crée en 0600) :
+# ceux que donnerait un open() ordinaire avec l'umask du processus
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+def _atomic_replace(path, write, binary=False):
+    """Appelle write(f) sur un fichier temporaire du même dossier, le synchronise puis le renomme sur `path`."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """
+    Écrit `data` dans un fichier temporaire du même dossier, le synchronise sur
+    disque puis le renomme sur `path` : un lecteur ou un crash ne voit jamais
+    qu'un fichier complet (l'ancien ou le nouveau).
+    """
+    _atomic_replace(path, lambda f: json.dump(data, f, **dump_kwargs))
+
+
+def atomic_write_bytes(path, data):
+    """Comme atomic_write_json, pour des octets : `path` devient un nouveau fichier (nouvel inode)."""
+    _atomic_replace(path, lambda f: f.write(data), binary=True)
+
+
+class FileLock:
+    """
+    Verrou consultatif (flock) sur `<path>.lock`, partagé entre processus et
+    réentrant dans un même thread. À utiliser autour des séquences
+    lecture-modification-écriture pour ne pas perdre de mises à jour quand
+    plusieurs workers tournent en parallèle.
+    """
+
+    def __init__(self, path):
+        self.path = path + '.lock'
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.fd = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if self.depth == 0:
+            try:
+                self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl:
+                    fcntl.flock(self.fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self.fd is not None:
+                    os.close(self.fd)
+                    self.fd = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            os.close(self.fd)
+            self.fd = None
+        self.thread_lock.release()
+
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path):
+    """Retourne le verrou (unique par processus) associé au fichier `path`."""
+    with _file_locks_guard:
+        if path not in _file_locks:
+            _file_locks[path] = FileLock(path)
+        return _file_locks[path]
+
+
+class JsonStore:
+    """
+    Copie résidente d'un fichier JSON (liste d'enregistrements) avec index.
+
+    Le fichier n'est relu que si sa signature (inode, mtime, taille) change,
+    ce qui permet à plusieurs processus de partager les mêmes fichiers.
+    Les écritures passent par le store (write-through) : le fichier est
+    réécrit et les index reconstruits sans relecture.
+
+    Avec `log_path` et `apply_op`, les petites mutations sont ajoutées à un
+    journal (une ligne JSON par opération) au lieu de réécrire le fichier :
+    le journal est rejoué au chargement, puis fusionné dans un nouveau
+    snapshot dès qu'il dépasse `compact_threshold` opérations. Les opérations
+    doivent être idempotentes, un crash pendant la compaction pouvant les
+    rejouer sur un snapshot qui les contient déjà.
+
+    Les écritures sont atomiques (fichier temporaire + rename) et prennent le
+    verrou inter-processus `file_lock` ; les lectures ne le prennent pas.
+
+    `sorted_indexes` ({nom: (groupe, clé)}) maintient, par groupe, les
+    enregistrements triés par clé pour les paginer sans tout trier (voir
+    page()) ; `groupe` peut être None pour un seul groupe. Ces clés ne doivent
+    pas changer après l'ajout d'un enregistrement.
+
+    `multi_sorted_indexes` ({nom: entrées}) est la variante où un
+    enregistrement figure sous plusieurs couples (groupe, clé) renvoyés par
+    `entrées(enregistrement)`, par exemple un tweet sous chacun de ses
+    retweets. Ces entrées peuvent changer : apply_op les tient à jour avec
+    add_entry() / remove_entry().
+
+    `set_indexes` ({nom: clés}) maintient l'ensemble des clés renvoyées par
+    `clés(enregistrement)`, ex. les couples (tweet_id, user_id) des likes,
+    pour des tests d'appartenance en O(1) (voir members()) ; apply_op les
+    met à jour directement dans `sets`.
+
+    `retain(records)`, s'il est donné, filtre les enregistrements à chaque
+    compaction (règles de rétention).
+
+    Les lectures et écritures de fichiers sont comptées dans utils.metrics
+    sous `name` (par défaut le nom du fichier).
+
+    Dans un bloc `with store.batch():`, les append() sont appliqués en
+    mémoire tout de suite mais écrits au journal en une fois (un seul
+    fsync) à la sortie du bloc, verrou tenu de bout en bout.
+
+    Les enregistrements renvoyés sont partagés : toute modification doit être
+    suivie d'un write() ou passer par append(), sinon il faut travailler sur
+    une copie.
+    """
+
+    def __init__(self, path, indexes=None, log_path=None, apply_op=None, compact_threshold=500,
+                 sorted_indexes=None, multi_sorted_indexes=None, set_indexes=None, retain=None, name=None):
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self.index_keys = indexes or {}
+        self.sorted_keys = sorted_indexes or {}
+        self.multi_keys = multi_sorted_indexes or {}
+        self.set_keys = set_indexes or {}
+        self.log_path = log_path
+        self.apply_op = apply_op
+        self.compact_threshold = compact_threshold
+        self.retain = retain
+        self.records = []
+        self.indexes = {}
+        self.sorted = {}
+        self.sets = {}
+        self.maxima = {}
+        self.signature = None
+        self.log_signature = None
+        self.log_inode = None
+        self.log_offset = 0
+        self.log_ops = 0
+        self.pending = None
+        self.lock = threading.RLock()
+        self.file_lock = file_lock(path)
+        self._rebuild_indexes()
+
+    @staticmethod
+    def _stat_signature(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _rebuild_indexes(self):
+        self.indexes = {}
+        for name, key in self.index_keys.items():
+            index = {}
+            for record in self.records:
+                value = key(record)
+                if value is not None:
+                    index[value] = record
+            self.indexes[name] = index
+
+        self.sorted = {}
+        for name, (group, key) in self.sorted_keys.items():
+            groups = {}
+            for record in self.records:
+                groups.setdefault(group(record) if group else None, []).append((key(record), record))
+            self.sorted[name] = {}
+            for value, items in groups.items():
+                items.sort(key=lambda item: item[0])
+                self.sorted[name][value] = ([k for k, _ in items], [r for _, r in items])
+
+        for name, entries in self.multi_keys.items():
+            groups = {}
+            for record in self.records:
+                for value, key in entries(record):
+                    groups.setdefault(value, []).append((key, record))
+            self.sorted[name] = {}
+            for value, items in groups.items():
+                items.sort(key=lambda item: item[0])
+                self.sorted[name][value] = ([k for k, _ in items], [r for _, r in items])
+
+        self.sets = {name: {key for record in self.records for key in keys(record)}
+                     for name, keys in self.set_keys.items()}
+        self.maxima = {}
+
+    def _insert_sorted(self, name, value, key, record):
+        keys, records = self.sorted[name].setdefault(value, ([], []))
+        position = bisect.bisect_right(keys, key)
+        keys.insert(position, key)
+        records.insert(position, record)
+
+    def add_entry(self, name, value, key, record):
+        """Ajoute l'entrée (groupe `value`, clé `key`) de `record` à l'index multiple `name`."""
+        self._insert_sorted(name, value, key, record)
+
+    def remove_entry(self, name, value, key, record):
+        """Retire l'entrée (groupe `value`, clé `key`) de `record` de l'index multiple `name`."""
+        keys, records = self.sorted[name].get(value, ([], []))
+        position = bisect.bisect_left(keys, key)
+        while position < len(keys) and keys[position] == key:
+            if records[position] is record:
+                del keys[position]
+                del records[position]
+                return
+            position += 1
+
+    def add(self, record):
+        """Ajoute un enregistrement en mémoire et l'indexe (sans écriture)."""
+        self.records.append(record)
+        for name, key in self.index_keys.items():
+            value = key(record)
+            if value is not None:
+                self.indexes[name][value] = record
+                if name in self.maxima and value > self.maxima[name]:
+                    self.maxima[name] = value
+        for name, (group, key) in self.sorted_keys.items():
+            self._insert_sorted(name, group(record) if group else None, key(record), record)
+        for name, entries in self.multi_keys.items():
+            for value, key in entries(record):
+                self._insert_sorted(name, value, key, record)
+        for name, keys in self.set_keys.items():
+            self.sets[name].update(keys(record))
+
+    def _refresh(self):
+        signature = self._stat_signature(self.path)
+        if signature != self.signature:
+            with metrics.storage_io(self.name, 'read') as io:
+                if signature is None:
+                    self.records = []
+                else:
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self.records = json.load(f)
+                    io.bytes = signature[2]
+                self.signature = signature
+                self.log_signature = None
+                self.log_inode = None
+                self.log_offset = 0
+                self.log_ops = 0
+                self._rebuild_indexes()
+        if self.log_path:
+            self._replay_log()
+
+    def _replay_log(self):
+        log_signature = self._stat_signature(self.log_path)
+        if log_signature == self.log_signature:
+            return
+        size = log_signature[2] if log_signature else 0
+        inode = log_signature[0] if log_signature else None
+        if size < self.log_offset or (self.log_inode is not None and inode != self.log_inode):
+            # Journal remplacé par une compaction d'un autre processus : la
+            # position lue dans l'ancien ne vaut rien dans le nouveau
+            self.signature = None
+            self._refresh()
+            return
+        self.log_inode = inode
+        if self._replay_until(size):
+            self.log_signature = log_signature
+
+    def _replay_until(self, end):
+        """Rejoue le journal de log_offset à `end` ; False si une ligne est incomplète."""
+        if end <= self.log_offset:
+            return True
+        with metrics.storage_io(self.name, 'log_read') as io:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self.log_offset)
+                chunk = f.read(end - self.log_offset)
+            io.bytes = len(chunk)
+            # Une ligne incomplète (écriture en cours) sera relue plus tard
+            complete = chunk[:chunk.rfind(b'\n') + 1]
+            for line in complete.splitlines():
+                if line.strip():
+                    self.apply_op(self, json.loads(line))
+                    self.log_ops += 1
+            self.log_offset += len(complete)
+        return len(complete) == len(chunk)
+
+    def read(self):
+        """Retourne la liste des enregistrements, rechargée si le fichier a changé."""
+        with self.lock:
+            self._refresh()
+            return self.records
+
+    def get(self, index, value):
+        """Recherche O(1) d'un enregistrement via l'index `index`."""
+        with self.lock:
+            self._refresh()
+            return self.indexes[index].get(value)
+
+    def get_many(self, index, values):
+        """Recherche groupée : {valeur: enregistrement} pour les valeurs trouvées."""
+        with self.lock:
+            self._refresh()
+            found = self.indexes[index]
+            return {value: found[value] for value in values if value in found}
+
+    def members(self, name, keys):
+        """Sous-ensemble de `keys` présent dans l'index ensembliste `name`."""
+        with self.lock:
+            self._refresh()
+            found = self.sets[name]
+            return {key for key in keys if key in found}
+
+    def max_value(self, index):
+        """Plus grande valeur de l'index `index` (0 s'il est vide), calculée une fois par chargement."""
+        with self.lock:
+            self._refresh()
+            if index not in self.maxima:
+                self.maxima[index] = max(self.indexes[index], default=0)
+            return self.maxima[index]
+
+    def page(self, name, group=None, before=None, after=None, limit=20, where=None):
+        """
+        Parcourt l'index trié `name` (groupe `group`) du plus récent au plus
+        ancien : au plus `limit` enregistrements de clé < `before`, ou les
+        `limit` premiers de clé > `after`. `where` filtre au passage.
+        """
+        with self.lock:
+            self._refresh()
+            keys, records = self.sorted[name].get(group, ([], []))
+            page = []
+            if after is not None:
+                i = bisect.bisect_right(keys, after)
+                while i < len(keys) and len(page) < limit:
+                    if where is None or where(records[i]):
+                        page.append(records[i])
+                    i += 1
+                page.reverse()
+            else:
+                i = (bisect.bisect_left(keys, before) if before is not None else len(keys)) - 1
+                while i >= 0 and len(page) < limit:
+                    if where is None or where(records[i]):
+                        page.append(records[i])
+                    i -= 1
+            return page
+
+    def count(self, name, group=None):
+        """Nombre d'enregistrements du groupe `group` de l'index trié `name`."""
+        with self.lock:
+            self._refresh()
+            return len(self.sorted[name].get(group, ([], []))[0])
+
+    def append(self, op):
+        """Journalise une opération puis l'applique en mémoire ; retourne le résultat de apply_op."""
+        with self.file_lock, self.lock:
+            self._refresh()
+            line = (json.dumps(op, ensure_ascii=False) + '\n').encode('utf-8')
+            if self.pending is not None:
+                result = self.apply_op(self, op)
+                self.pending.append(line)
+                return result
+            self._write_log([line])
+            result = self.apply_op(self, op)
+            self.log_ops += 1
+            if self.log_ops >= self.compact_threshold:
+                self.compact()
+            return result
+
+    def _write_log(self, lines):
+        data = b''.join(lines)
+        with metrics.storage_io(self.name, 'log_append') as io, open(self.log_path, 'ab') as f:
+            if f.tell() > self.log_offset:
+                # Fin de ligne incomplète laissée par un crash : on l'écarte
+                f.truncate(self.log_offset)
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+            self.log_offset = f.tell()
+            self.log_inode = os.fstat(f.fileno()).st_ino
+            io.bytes = len(data)
+        self.log_signature = None
+
+    @contextmanager
+    def batch(self):
+        """Regroupe les append() du bloc en une seule écriture du journal (réentrant)."""
+        with self.file_lock:
+            if self.pending is not None:
+                yield
+                return
+            self.pending = []
+            try:
+                yield
+            finally:
+                # Même après une erreur : les opérations déjà appliquées en mémoire sont journalisées
+                with self.lock:
+                    lines, self.pending = self.pending, None
+                    if lines:
+                        self._write_log(lines)
+                        self.log_ops += len(lines)
+                        if self.log_ops >= self.compact_threshold:
+                            self.compact()
+
+    def compact(self):
+        """Fusionne le journal dans un nouveau snapshot (en appliquant `retain`)."""
+        with self.file_lock, self.lock:
+            self._refresh()
+            self.write(self.retain(self.records) if self.retain else self.records)
+
+    def write(self, records):
+        """Réécrit le fichier (et vide le journal) et remplace la copie résidente."""
+        with self.file_lock, self.lock, metrics.storage_io(self.name, 'write') as io:
+            atomic_write_json(self.path, records, indent=4)
+            # Un crash ici laisse un journal déjà inclus dans le snapshot : le rejouer est sans effet.
+            # Journal remplacé, pas tronqué : un processus qui a relu le snapshot juste avant
+            # voit un nouvel inode dans _replay_log et ne garde pas sa position dans l'ancien
+            if self.log_path and os.path.exists(self.log_path):
+                atomic_write_bytes(self.log_path, b'')
+            self.records = records
+            self.signature = self._stat_signature(self.path)
+            io.bytes = self.signature[2]
+            self.log_signature = self._stat_signature(self.log_path) if self.log_path else None
+            self.log_inode = self.log_signature[0] if self.log_signature else None
+            self.log_offset = 0
+            self.log_ops = 0
+            self._rebuild_indexes()
+
+    def invalidate(self):
+        """Force la relecture du fichier au prochain accès."""
+        with self.lock:
+            self.signature = None
+
+
+def _lower(value):
+    return value.lower() if isinstance(value, str) else None
+
+
+def _make_users_store(path):
+    """Store des utilisateurs sur `path` (aussi utilisé par les tests sur un fichier temporaire)."""
+    return JsonStore(path, indexes={
+        'id': lambda u: u.get('id'),
+        'username': lambda u: u.get('username'),
+        'username_lower': lambda u: _lower(u.get('username')),
+        'email': lambda u: u.get('email'),
+    })
+
+
+_users_store = _make_users_store(USERS_FILE)
+
+
+def _find_comment(tweet, index):
+    comments = tweet.get('comments', [])
+    return comments[index] if 0 <= index < len(comments) else None
+
+
+def _apply_tweet_op(store, op):
+    """
+    Applique une opération du journal des tweets et retourne le tweet concerné.
+    Chaque opération est idempotente : likes/retweets sont des ajouts ou
+    retraits conditionnels, commentaires et réponses portent leur position.
+    Les tests d'appartenance passent par les index ensemblistes du store
+    (O(1) même pour un tweet aux dizaines de milliers de likes).
+    """
+    kind = op['op']
+    if kind == 'add_tweet':
+        tweet = store.indexes['id'].get(op['tweet']['id'])
+        if tweet is None:
+            tweet = op['tweet']
+            store.add(tweet)
+        return tweet
+
+    tweet = store.indexes['id'].get(op['tweet_id'])
+    if tweet is None:
+        return None
+    user_id = op.get('user_id')
+    key = (tweet['id'], user_id)
+
+    if kind == 'like':
+        if key not in store.sets['likes']:
+            tweet.setdefault('likes', []).append(user_id)
+            store.sets['likes'].add(key)
+    elif kind == 'unlike':
+        if key in store.sets['likes']:
+            tweet['likes'].remove(user_id)
+            store.sets['likes'].discard(key)
+    elif kind in ('retweet', 'unretweet'):
+        retweets = tweet.setdefault('retweets', [])
+        if tweet['id'] in store.sets['legacy_retweets']:
+            # Ancien format (liste d'IDs) : on reprend la date du tweet comme la migration retweet_objects
+            retweets[:] = [rt if isinstance(rt, dict) else {"user_id": rt, "retweeted_at": tweet.get('created_at')}
+                           for rt in retweets]
+            store.sets['legacy_retweets'].discard(tweet['id'])
+        if kind == 'retweet' and key not in store.sets['retweets']:
+            retweet = {"user_id": user_id, "retweeted_at": op['retweeted_at']}
+            retweets.append(retweet)
+            store.sets['retweets'].add(key)
+            store.add_entry('retweeted_by', user_id, (_retweet_at(tweet, retweet), tweet['id']), tweet)
+        elif kind == 'unretweet' and key in store.sets['retweets']:
+            retweet = next(rt for rt in retweets if rt['user_id'] == user_id)
+            retweets.remove(retweet)
+            store.sets['retweets'].discard(key)
+            store.remove_entry('retweeted_by', user_id, (_retweet_at(tweet, retweet), tweet['id']), tweet)
+    elif kind == 'comment':
+        comments = tweet.setdefault('comments', [])
+        if len(comments) == op['index']:
+            comments.append(op['comment'])
+    elif kind in ('like_comment', 'unlike_comment'):
+        comment = _find_comment(tweet, op['index'])
+        comment_key = (tweet['id'], op['index'], user_id)
+        if comment is not None:
+            likes = comment.setdefault('likes', [])
+            if kind == 'like_comment' and comment_key not in store.sets['comment_likes']:
+                likes.append(user_id)
+                store.sets['comment_likes'].add(comment_key)
+            elif kind == 'unlike_comment' and comment_key in store.sets['comment_likes']:
+                likes.remove(user_id)
+                store.sets['comment_likes'].discard(comment_key)
+    elif kind == 'reply':
+        comment = _find_comment(tweet, op['index'])
+        if comment is not None:
+            replies = comment.setdefault('replies', [])
+            if len(replies) == op['reply_index']:
+                replies.append(op['reply'])
+    else:
+        raise ValueError(f"Opération de journal inconnue : {kind}")
+    return tweet
+
+
+def tweet_sort_key(tweet):
+    """Clé de tri chronologique d'un tweet : (created_at, id)."""
+    return (tweet.get('created_at') or EPOCH, tweet['id'])
+
+
+def _retweeter(retweet):
+    return retweet['user_id'] if isinstance(retweet, dict) else retweet
+
+
+def _retweet_at(tweet, retweet):
+    """Date d'un retweet ; l'ancien format (ID seul) prend la date du tweet."""
+    at = retweet.get('retweeted_at') if isinstance(retweet, dict) else None
+    return at or tweet.get('created_at') or EPOCH
+
+
+def _retweet_entries(tweet):
+    """Entrées de l'index inverse des retweets : (user_id, (retweeted_at, tweet_id))."""
+    return [(_retweeter(rt), (_retweet_at(tweet, rt), tweet['id'])) for rt in tweet.get('retweets', [])]
+
+
+# Index ensemblistes des interactions : likes, retweets et likes de commentaires
+# par (tweet_id, user_id) ; legacy_retweets liste les tweets à l'ancien format
+TWEET_SET_INDEXES = {
+    'likes': lambda t: [(t['id'], uid) for uid in t.get('likes', [])],
+    'retweets': lambda t: [(t['id'], _retweeter(rt)) for rt in t.get('retweets', [])],
+    'comment_likes': lambda t: [(t['id'], i, uid) for i, c in enumerate(t.get('comments', []))
+                                for uid in c.get('likes', [])],
+    'legacy_retweets': lambda t: [t['id']] if any(not isinstance(rt, dict) for rt in t.get('retweets', [])) else [],
+}
+
+def _make_tweets_store(path, compact_threshold=TWEETS_LOG_COMPACT_THRESHOLD):
+    """Store des tweets sur `path`, journal `path`.log (aussi utilisé par les tests)."""
+    return JsonStore(path, indexes={
+        'id': lambda t: t.get('id'),
+    }, sorted_indexes={
+        'created_at': (None, tweet_sort_key),
+        'user_created_at': (lambda t: t['user_id'], tweet_sort_key),
+    }, multi_sorted_indexes={
+        'retweeted_by': _retweet_entries,
+    }, set_indexes=TWEET_SET_INDEXES, log_path=path + '.log', apply_op=_apply_tweet_op,
+        compact_threshold=compact_threshold)
+
+
+_tweets_store = _make_tweets_store(TWEETS_FILE)
+
 
 def init_files():
     """Crée le dossier 'data' et les fichiers JSON seulement s'ils n'existent pas."""
@@ -14,118 +627,217 @@ def init_files():
 
     for file in [USERS_FILE, TWEETS_FILE]:
         if not os.path.exists(file):
-            with open(file, 'w') as f:
-                json.dump([], f, indent=4)
+            atomic_write_json(file, [], indent=4)
             print(f"Fichier {file} créé avec une liste vide.")
         else:
             print(f"Fichier {file} existe déjà → aucune modification.")
 
 def read_users():
-    with open(USERS_FILE, 'r') as f:
-        return json.load(f)
+    return _users_store.read()
 
 def write_users(users):
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=4)
+    _users_store.write(users)
 
 def read_tweets():
-    with open(TWEETS_FILE, 'r') as f:
-        return json.load(f)
+    return _tweets_store.read()
 
 def write_tweets(tweets):
-    with open(TWEETS_FILE, 'w') as f:
-        json.dump(tweets, f, indent=4)
-
-def ensure_likes_field():
-    """Ajoute le champ 'likes' aux tweets existants si absent."""
-    tweets = read_tweets()
-    modified = False
-    for tweet in tweets:
-        if 'likes' not in tweet:
-            tweet['likes'] = []
-            modified = True
-            print(f"Champ 'likes' ajouté pour le tweet id={tweet.get('id')}")
-    if modified:
+    _tweets_store.write(tweets)
+
+def users_lock():
+    """Verrou inter-processus à tenir pendant un lecture-modification-écriture des utilisateurs."""
+    return _users_store.file_lock
+
+def tweets_lock():
+    """Verrou inter-processus à tenir pendant un lecture-modification-écriture des tweets."""
+    return _tweets_store.file_lock
+
+def get_user(user_id):
+    """Retourne l'utilisateur d'identifiant `user_id` ou None."""
+    return _users_store.get('id', user_id)
+
+def users_version():
+    """Valeur qui change à chaque écriture des utilisateurs, y compris par un autre processus."""
+    _users_store.read()
+    return _users_store.signature
+
+def get_users(user_ids):
+    """Résout plusieurs identifiants en une fois : {id: utilisateur} (les inconnus sont omis)."""
+    return _users_store.get_many('id', user_ids)
+
+def hydrate_users(items, fields, key='user_id', defaults=None):
+    """
+    Complète des tweets, commentaires ou notifications (copies) avec les
+    données de leurs auteurs, résolus en une seule recherche groupée.
+    `fields` associe le champ à remplir au champ de l'utilisateur, ex.
+    {'profile_pic_url': 'profile_pic_url'} ; `defaults` donne la valeur à
+    utiliser si l'utilisateur est introuvable ou le champ vide.
+    """
+    defaults = defaults or {}
+    users = get_users({item.get(key) for item in items})
+    for item in items:
+        user = users.get(item.get(key))
+        for target, source in fields.items():
+            item[target] = (user.get(source) if user else None) or defaults.get(target)
+    return items
+
+def get_user_by_username(username, ignore_case=False):
+    """Retourne l'utilisateur portant ce nom (sensible à la casse par défaut) ou None."""
+    if ignore_case:
+        return _users_store.get('username_lower', _lower(username))
+    return _users_store.get('username', username)
+
+def get_user_by_email(email):
+    """Retourne l'utilisateur associé à cet email ou None."""
+    return _users_store.get('email', email)
+
+def get_tweet(tweet_id):
+    """Retourne le tweet d'identifiant `tweet_id` ou None."""
+    return _tweets_store.get('id', tweet_id)
+
+def get_tweets(tweet_ids):
+    """Résout plusieurs identifiants de tweets en une fois : {id: tweet} (les inconnus sont omis)."""
+    return _tweets_store.get_many('id', tweet_ids)
+
+def next_tweet_id():
+    """Identifiant du prochain tweet : un de plus que le plus grand existant."""
+    return _tweets_store.max_value('id') + 1
+
+def apply_tweet_op(op):
+    """
+    Ajoute une mutation au journal des tweets et l'applique.
+    Exemple : apply_tweet_op({"op": "like", "tweet_id": 4, "user_id": 3}).
+    Retourne le tweet modifié (None s'il n'existe pas).
+    """
+    return _tweets_store.append(op)
+
+def tweets_transaction():
+    """
+    Regroupe plusieurs apply_tweet_op en une seule écriture du journal
+    (à utiliser sous tweets_lock) : `with tweets_transaction(): ...`.
+    """
+    return _tweets_store.batch()
+
+def tweets_page(before=None, after=None, limit=20, user_id=None, exclude_user_ids=()):
+    """
+    Tweets du plus récent au plus ancien selon tweet_sort_key, sans trier tout
+    le corpus : les `limit` précédant la clé `before`, ou suivant la clé
+    `after`. `user_id` restreint à un auteur, `exclude_user_ids` en écarte.
+    """
+    exclude = set(exclude_user_ids)
+    where = (lambda t: t['user_id'] not in exclude) if exclude else None
+    if user_id is None:
+        return _tweets_store.page('created_at', before=before, after=after, limit=limit, where=where)
+    return _tweets_store.page('user_created_at', group=user_id, before=before, after=after,
+                              limit=limit, where=where)
+
+def count_tweets(user_id):
+    """Nombre de tweets publiés par `user_id`."""
+    return _tweets_store.count('user_created_at', user_id)
+
+def retweets_page(user_id, before=None, after=None, limit=20):
+    """
+    Retweets de `user_id` du plus récent au plus ancien, via l'index inverse
+    (sans parcourir les autres tweets) : copies des tweets marquées
+    is_retweet, avec retweeted_at ; même pagination que tweets_page() sur la
+    clé (retweeted_at, tweet_id).
+    """
+    retweets = []
+    for tweet in _tweets_store.page('retweeted_by', group=user_id, before=before, after=after, limit=limit):
+        rt = next(rt for rt in tweet.get('retweets', []) if _retweeter(rt) == user_id)
+        retweets.append(dict(tweet, is_retweet=True, retweeted_at=_retweet_at(tweet, rt)))
+    return retweets
+
+def count_retweets(user_id):
+    """Nombre de tweets retweetés par `user_id`."""
+    return _tweets_store.count('retweeted_by', user_id)
+
+def liked_tweet_ids(user_id, tweet_ids):
+    """Parmi `tweet_ids`, ceux que `user_id` a likés (une requête pour toute une page)."""
+    return {tweet_id for tweet_id, _ in _tweets_store.members('likes', [(tid, user_id) for tid in tweet_ids])}
+
+def retweeted_tweet_ids(user_id, tweet_ids):
+    """Parmi `tweet_ids`, ceux que `user_id` a retweetés."""
+    return {tweet_id for tweet_id, _ in _tweets_store.members('retweets', [(tid, user_id) for tid in tweet_ids])}
+
+def liked_comment(tweet_id, index, user_id):
+    """True si `user_id` a liké le commentaire `index` du tweet."""
+    return bool(_tweets_store.members('comment_likes', [(tweet_id, index, user_id)]))
+
+def interaction_counts(tweet_ids):
+    """Compteurs {id: {"likes", "retweets", "comments"}} des tweets trouvés parmi `tweet_ids`."""
+    return {tweet_id: {"likes": len(tweet.get('likes', [])), "retweets": len(tweet.get('retweets', [])),
+                       "comments": len(tweet.get('comments', []))}
+            for tweet_id, tweet in get_tweets(tweet_ids).items()}
+
+def compact_tweets():
+    """Fusionne le journal des mutations dans tweets.json."""
+    _tweets_store.compact()
+
+def next_user_id():
+    """Identifiant du prochain utilisateur inscrit : un de plus que le plus grand existant."""
+    return _users_store.max_value('id') + 1
+
+def add_user(user):
+    """Enregistre un nouvel utilisateur."""
+    with users_lock():
+        users = read_users()
+        users.append(user)
+        write_users(users)
+
+def update_user(user_id, fields):
+    """Met à jour les champs `fields` de l'utilisateur ; retourne l'utilisateur ou None."""
+    with users_lock():
+        user = get_user(user_id)
+        if not user:
+            return None
+        user.update(fields)
+        write_users(read_users())
+        return user
+
+def rename_user_tweets(user_id, username):
+    """Répercute un changement de nom d'utilisateur sur ses tweets."""
+    with tweets_lock():
+        tweets = read_tweets()
+        for t in tweets:
+            if t['user_id'] == user_id:
+                t['username'] = username
         write_tweets(tweets)
-        print("Tweets mis à jour avec le champ 'likes'.")
 
 
 def follow_user(follower_id, followed_id):
     """
     Ajoute un abonnement : follower_id suit followed_id.
-    Retourne True si la mise à jour a réussi, False sinon.
-    """
-    users = read_users()
-    follower = next((u for u in users if u['id'] == follower_id), None)
-    followed = next((u for u in users if u['id'] == followed_id), None)
-    if not follower or not followed:
-        print("Erreur : utilisateur non trouvé.")
-        return False
-    if followed_id not in follower['following']:
-        follower['following'].append(followed_id)
-    if follower_id not in followed['followers']:
-        followed['followers'].append(follower_id)
-    write_users(users)
-    print(f"{follower_id} suit maintenant {followed_id}.")
-    return True
-
-    # Initialise les listes si elles n'existent pas
-def ensure_follow_fields():
-    """
-    Ajoute les champs 'follower' et 'following' à tous les utilisateurs
-    s'ils n'existent pas.
-    """
-    users = read_users()
-    modified = False
-    for user in users:
-        if 'followers' not in user:
-            user['followers'] = []
-            modified = True
-        if 'following' not in user:
-            user['following'] = []
-            modified = True
-    if modified:
-        write_users(users)
-        print("Champs 'followers' et 'following' ajoutés aux utilisateurs.")
-    else:
-        print("Tous les utilisateurs ont déjà les champs 'followers' et 'following'.")
+    Retourne True si la mise à jour a réussi, False si l'un des deux n'existe pas.
+    """
+    with users_lock():
+        follower, followed = get_user(follower_id), get_user(followed_id)
+        if not follower or not followed:
+            return False
+        if followed_id not in follower['following']:
+            follower['following'].append(followed_id)
+        if follower_id not in followed['followers']:
+            followed['followers'].append(follower_id)
+        write_users(read_users())
+        return True
 
-    write_users(users)
-    return True
 
 def unfollow_user(follower_id, followed_id):
     """
     Supprime un abonnement : follower_id ne suit plus followed_id.
-    Retourne True si la mise à jour a réussi, False sinon.
-    """
-    users = read_users()
-    follower = next((u for u in users if u['id'] == follower_id), None)
-    followed = next((u for u in users if u['id'] == followed_id), None)
-    if not follower or not followed:
-        print("Erreur : utilisateur non trouvé.")
-        return False
-    if followed_id in follower['following']:
-        follower['following'].remove(followed_id)
-    if follower_id in followed['followers']:
-        followed['followers'].remove(follower_id)
-    write_users(users)
-    print(f"{follower_id} ne suit plus {followed_id}.")
-    return True
-
-    write_users(users, USER_JSON_PATH)
-    return True
-
-def ensure_comments_field():
-    tweets = read_tweets()
-    for tweet in tweets:
-        if 'comments' not in tweet:
-            tweet['comments'] = []
-        else:
-            # Ajoute un champ 'likes' à chaque commentaire existant
-            for comment in tweet['comments']:
-                if 'likes' not in comment:
-                    comment['likes'] = []
-    write_tweets(tweets)
+    Retourne True si la mise à jour a réussi, False si l'un des deux n'existe pas.
+    """
+    with users_lock():
+        follower, followed = get_user(follower_id), get_user(followed_id)
+        if not follower or not followed:
+            return False
+        if followed_id in follower['following']:
+            follower['following'].remove(followed_id)
+        if follower_id in followed['followers']:
+            followed['followers'].remove(follower_id)
+        write_users(read_users())
+        return True
+
 
 import json
 from datetime import datetime
@@ -159,44 +871,232 @@ def retweet_user(tweet_id: str, user_id: str, db_path: str = "user.json"):
                 return retweet
     raise ValueError("Utilisateur introuvable.")
 
-def ensure_retweets_field():
-    tweets = read_tweets()
-    for tweet in tweets:
-        if 'retweets' not in tweet:
-            tweet['retweets'] = []
-    write_tweets(tweets)
 
 
 NOTIF_FILE = os.path.join(os.getcwd(), "backend", "data", "notifications.json")
+# Notifications partitionnées par destinataire : une boîte <user_id>.json (+ journal)
+# par utilisateur, et unread.json pour les compteurs de non-lues
+NOTIF_DIR = os.path.join(os.getcwd(), "backend", "data", "notifications")
+NOTIF_UNREAD_FILE = os.path.join(NOTIF_DIR, "unread.json")
+# Rétention, appliquée à la compaction d'une boîte : les notifications lues sont
+# oubliées après NOTIF_TTL_DAYS jours et au-delà des NOTIF_INBOX_MAX plus récentes
+NOTIF_TTL_DAYS = 90
+NOTIF_INBOX_MAX = 500
+NOTIF_LOG_COMPACT_THRESHOLD = 100
+# Nombre de boîtes gardées en mémoire
+NOTIF_INBOX_CACHE_SIZE = 256
+
+
+def notification_sort_key(notification):
+    """Clé de tri et de pagination d'une notification : (date, id)."""
+    return (notification.get('created_at') or EPOCH, notification['id'])
+
+
+def _apply_notification_op(store, op):
+    """
+    Applique une opération du journal d'une boîte de notifications (idempotente) :
+    - add  : ajoute `notification` si son id est absent ;
+    - seen : marque lues les notifications d'id <= `up_to`.
+    """
+    kind = op['op']
+    if kind == 'add':
+        if op['notification']['id'] not in store.indexes['id']:
+            store.add(op['notification'])
+    elif kind == 'seen':
+        for notification in store.records:
+            if notification['id'] <= op['up_to']:
+                notification['seen'] = True
+    else:
+        raise ValueError(f"Opération de journal inconnue : {kind}")
+
+
+def _retain_notifications(notifications):
+    """Règles de rétention : les non-lues sont toujours gardées."""
+    from datetime import datetime, timedelta
+
+    cutoff = (datetime.now() - timedelta(days=NOTIF_TTL_DAYS)).isoformat()
+    kept_seen = 0
+    kept = []
+    for notification in sorted(notifications, key=notification_sort_key, reverse=True):
+        if notification.get('seen'):
+            if kept_seen >= NOTIF_INBOX_MAX or (notification.get('created_at') or EPOCH) < cutoff:
+                continue
+            kept_seen += 1
+        kept.append(notification)
+    kept.reverse()
+    return kept
+
+
+def _apply_unread_op(store, op):
+    """
+    Applique une opération du journal des compteurs (idempotente) :
+    - set : fixe `unread` et `last_id` de la boîte de `user_id`.
+    """
+    if op['op'] != 'set':
+        raise ValueError(f"Opération de journal inconnue : {op['op']}")
+    counter = store.indexes['user_id'].get(op['user_id'])
+    if counter is None:
+        counter = {'user_id': op['user_id']}
+        store.add(counter)
+    counter['unread'] = op['unread']
+    counter['last_id'] = op['last_id']
+
+
+def _make_unread_store(path):
+    """Store des compteurs de non-lus sur `path`, journal `path`.log (aussi utilisé par les tests)."""
+    return JsonStore(path, indexes={
+        'user_id': lambda c: c.get('user_id'),
+    }, log_path=path + '.log', apply_op=_apply_unread_op)
+
+
+_unread_store = _make_unread_store(NOTIF_UNREAD_FILE)
+
+_inboxes = {}
+_inboxes_guard = threading.Lock()
+
+
+def _inbox(user_id):
+    """Boîte de notifications de `user_id` (JsonStore, gardée en cache LRU)."""
+    with _inboxes_guard:
+        store = _inboxes.pop(user_id, None)
+        if store is None:
+            os.makedirs(NOTIF_DIR, exist_ok=True)
+            path = os.path.join(NOTIF_DIR, f"{int(user_id)}.json")
+            store = JsonStore(path, indexes={'id': lambda n: n.get('id')},
+                              sorted_indexes={'created_at': (None, notification_sort_key)},
+                              log_path=path + '.log', apply_op=_apply_notification_op,
+                              compact_threshold=NOTIF_LOG_COMPACT_THRESHOLD,
+                              retain=_retain_notifications, name='notifications/inbox')
+        _inboxes[user_id] = store
+        if len(_inboxes) > NOTIF_INBOX_CACHE_SIZE:
+            del _inboxes[next(iter(_inboxes))]
+        return store
+
+
+def _counter(user_id):
+    return _unread_store.get('user_id', user_id) or {'unread': 0, 'last_id': 0}
+
+
+def _partition_notifications(notifications):
+    """Réécrit toutes les boîtes et les compteurs à partir d'une liste globale."""
+    os.makedirs(NOTIF_DIR, exist_ok=True)
+    by_user = {}
+    for notification in notifications:
+        by_user.setdefault(notification['to_user_id'], []).append(notification)
+    counters = []
+    for name in os.listdir(NOTIF_DIR):
+        user_id = name.split('.')[0]
+        if name.endswith('.json') and user_id.isdigit() and int(user_id) not in by_user:
+            _inbox(int(user_id)).write([])
+    for user_id, inbox in by_user.items():
+        inbox = [dict(n, id=n.get('id') or i) for i, n in enumerate(inbox, start=1)]
+        _inbox(user_id).write(inbox)
+        counters.append({'user_id': user_id, 'unread': sum(1 for n in inbox if not n.get('seen')),
+                         'last_id': max(n['id'] for n in inbox)})
+    _unread_store.write(counters)
+
+
+def ensure_notification_inboxes():
+    """Répartit l'ancien fichier global notifications.json en boîtes par utilisateur (une seule fois)."""
+    with notifications_lock():
+        if os.path.exists(NOTIF_UNREAD_FILE):
+            return
+        notifications = []
+        if os.path.exists(NOTIF_FILE):
+            with open(NOTIF_FILE, "r", encoding="utf-8") as f:
+                notifications = json.load(f)
+        _partition_notifications(notifications)
+        print(f"{len(notifications)} notifications réparties par destinataire dans {NOTIF_DIR}.")
 
 def read_notifications():
-    import json
-    if not os.path.exists(NOTIF_FILE):
-        return []
-    with open(NOTIF_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Toutes les notifications du site (export, import SQLite) ; les routes lisent une seule boîte."""
+    notifications = []
+    for counter in _unread_store.read():
+        notifications.extend(_inbox(counter['user_id']).read())
+    return notifications
 
 def write_notifications(notifications):
-    import json
-    # Crée le dossier si nécessaire
+    with notifications_lock():
+        _partition_notifications(notifications)
+
+def notifications_lock():
+    """Verrou inter-processus des notifications (boîtes et compteurs)."""
     os.makedirs(os.path.dirname(NOTIF_FILE), exist_ok=True)
-    with open(NOTIF_FILE, "w", encoding="utf-8") as f:
-        json.dump(notifications, f, ensure_ascii=False, indent=4)
+    return file_lock(NOTIF_FILE)
 
 def add_notification(to_user_id, from_user_id, notif_type, tweet_id, content=None):
     from datetime import datetime
+    from utils import events
 
-    notifications = read_notifications()
+    with notifications_lock():
+        counter = _counter(to_user_id)
+        notification = {
+            "id": counter['last_id'] + 1,
+            "to_user_id": to_user_id,
+            "from_user_id": from_user_id,
+            "type": notif_type,  # "like" ou "comment"
+            "tweet_id": tweet_id,
+            "content": content,
+            "seen": False,
+            "created_at": datetime.now().isoformat()
+        }
+        _inbox(to_user_id).append({"op": "add", "notification": notification})
+        _unread_store.append({"op": "set", "user_id": to_user_id,
+                              "unread": counter['unread'] + 1, "last_id": notification['id']})
+        events.publish_notification(notification, counter['unread'] + 1)
 
-    notifications.append({
-        "to_user_id": to_user_id,
-        "from_user_id": from_user_id,
-        "type": notif_type,  # "like" ou "comment"
-        "tweet_id": tweet_id,
-        "content": content,
-        "seen": False,
-        "created_at": datetime.now().isoformat()
-    })
+def notifications_page(user_id, before=None, after=None, limit=20):
+    """Page des notifications de `user_id`, de la plus récente à la plus ancienne (voir JsonStore.page)."""
+    return _inbox(user_id).page('created_at', before=before, after=after, limit=limit)
+
+def unread_count(user_id):
+    """Nombre de notifications non lues de `user_id` (O(1), sans charger sa boîte)."""
+    return _counter(user_id)['unread']
+
+def mark_notifications_seen(user_id, up_to=None):
+    """Marque lues, en une opération, les notifications de `user_id` d'id <= `up_to` (toutes par défaut)."""
+    with notifications_lock():
+        counter = _counter(user_id)
+        if counter['unread'] == 0:
+            return
+        up_to = counter['last_id'] if up_to is None else min(up_to, counter['last_id'])
+        inbox = _inbox(user_id)
+        inbox.append({"op": "seen", "up_to": up_to})
+        unread = 0 if up_to == counter['last_id'] else sum(1 for n in inbox.read() if not n.get('seen'))
+        _unread_store.append({"op": "set", "user_id": user_id, "unread": unread, "last_id": counter['last_id']})
+
+def compact_notifications():
+    """Compacte toutes les boîtes en appliquant la rétention (maintenance)."""
+    with notifications_lock():
+        for counter in _unread_store.read():
+            _inbox(counter['user_id']).compact()
+        _unread_store.compact()
+
+
+# Versions JSON, toujours disponibles pour l'import dans SQLite (python -m utils.sqlite_backend)
+_json_ensure_notification_inboxes = ensure_notification_inboxes
+_json_read_notifications = read_notifications
+
+# Sélection du backend : le backend SQLite remplace les fonctions ci-dessus
+if STORAGE_BACKEND == 'sqlite':
+    from utils.sqlite_backend import (  # noqa: E402,F811
+        init_files, read_users, write_users, read_tweets, write_tweets,
+        users_version, get_user, get_users, get_user_by_username, get_user_by_email, get_tweet,
+        get_tweets, next_tweet_id, tweets_page, count_tweets, retweets_page, count_retweets, apply_tweet_op, tweets_transaction,
+        compact_tweets,
+        liked_tweet_ids, retweeted_tweet_ids, liked_comment, interaction_counts,
+        next_user_id, add_user, update_user, rename_user_tweets,
+        follow_user, unfollow_user, read_notifications, write_notifications, add_notification,
+        notifications_page, unread_count, mark_notifications_seen, compact_notifications,
+        ensure_notification_inboxes,
+    )
+elif STORAGE_BACKEND != 'json':
+    raise ValueError(f"TIGERS_STORAGE inconnu : {STORAGE_BACKEND}")
 
-    
-    write_notifications(notifications)
+# Lectures et écritures complètes comptées dans utils.metrics, quel que soit le backend
+read_users = metrics.storage_call(read_users)
+write_users = metrics.storage_call(write_users)
+read_tweets = metrics.storage_call(read_tweets)
+write_tweets = metrics.storage_call(write_tweets)
+read_notifications = metrics.storage_call(read_notifications)
+write_notifications = metrics.storage_call(write_notifications)
@@ -0,0 +1,249 @@
+"""
+Événements en direct (Server-Sent Events) : notifications et nouveaux tweets.
+
+add_notification() publie sur le canal "user:<id>" du destinataire et la
+publication d'un tweet sur "author:<id>" ; la route /events diffuse à chaque
+client les événements de ses canaux au lieu de lui faire recharger les pages.
+
+Chaque événement a un id croissant. Un client qui se reconnecte avec
+l'en-tête Last-Event-ID reçoit ce qu'il a manqué tant que c'est encore dans
+la mémoire tampon (REPLAY_SIZE derniers événements), sinon un événement
+"resync" lui indique de recharger.
+
+Broker (variable d'environnement TIGERS_EVENTS) :
+- memory : pub/sub dans le processus (un seul worker) ;
+- file   : journal partagé data/events.log suivi par chaque worker, pour
+           partager les événements entre plusieurs workers d'une même
+           machine (remplaçant local d'un broker externe).
+"""
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from utils.data_manager import BASE_DIR, FILE_MODE, file_lock
+
+EVENTS_BACKEND = os.environ.get('TIGERS_EVENTS', 'memory')
+EVENTS_LOG_FILE = os.path.join(BASE_DIR, 'events.log')
+
+# Événements gardés pour la reprise (Last-Event-ID)
+REPLAY_SIZE = 1000
+# Le journal partagé est réduit aux REPLAY_SIZE derniers événements au-delà de cette taille
+EVENTS_LOG_MAX = 10 * REPLAY_SIZE
+# Fréquence de lecture du journal partagé par chaque worker (secondes)
+POLL_INTERVAL = 0.25
+
+# Flux SSE : commentaire de maintien toutes les HEARTBEAT secondes, fin du flux après
+# STREAM_DURATION secondes (le navigateur se reconnecte seul après RETRY_MS)
+HEARTBEAT = 15
+STREAM_DURATION = 300
+RETRY_MS = 3000
+
+
+class Event(NamedTuple):
+    id: int
+    channel: str
+    type: str
+    data: dict
+
+
+class MemoryBroker:
+    """Pub/sub dans le processus : mémoire tampon circulaire + condition de réveil."""
+
+    def __init__(self, replay_size=REPLAY_SIZE):
+        self.buffer = deque(maxlen=replay_size)
+        self.last_id = 0
+        self.condition = threading.Condition()
+
+    def publish(self, channel, event_type, data):
+        """Publie un événement ; retourne son id."""
+        with self.condition:
+            event = Event(self.last_id + 1, channel, event_type, data)
+            self._deliver(event)
+            return event.id
+
+    def _deliver(self, event):
+        # Appelé sous self.condition
+        self.buffer.append(event)
+        self.last_id = event.id
+        self.condition.notify_all()
+
+    def current_id(self):
+        with self.condition:
+            return self.last_id
+
+    def _since(self, last_id, channels):
+        if last_id > self.last_id or (self.buffer and last_id < self.buffer[0].id - 1):
+            # Id inconnu (redémarrage) ou événements déjà sortis de la mémoire tampon
+            return None
+        start = max(0, last_id - self.buffer[0].id + 1) if self.buffer else 0
+        return [e for e in itertools.islice(self.buffer, start, None) if e.channel in channels]
+
+    def wait(self, last_id, channels, timeout):
+        """
+        Attend (au plus `timeout` secondes) un événement d'id > last_id et
+        retourne (événements de `channels`, nouvel id courant). Les événements
+        valent None si la reprise depuis last_id est impossible.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while self.last_id == last_id:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self._since(last_id, channels), self.last_id
+
+
+class FileBroker(MemoryBroker):
+    """
+    Broker partagé entre workers : les événements sont ajoutés (sous verrou
+    inter-processus) à un journal JSONL que chaque worker relit depuis sa
+    dernière position pour alimenter sa propre mémoire tampon.
+    """
+
+    def __init__(self, path=EVENTS_LOG_FILE, replay_size=REPLAY_SIZE):
+        super().__init__(replay_size)
+        self.path = path
+        self.file_lock = file_lock(path)
+        self.inode = None
+        self.offset = 0
+        self.first_id = None
+        self.follower_pid = None
+
+    def _follow(self):
+        """Lit les nouvelles lignes du journal (appelé sous self.condition)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # Nouveau journal (réduit par un autre worker) : relu depuis le début
+            self.inode, self.offset, self.first_id = st.st_ino, 0, None
+        if st.st_size == self.offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read(st.st_size - self.offset)
+        complete = chunk[:chunk.rfind(b'\n') + 1]
+        self.offset += len(complete)
+        for line in complete.splitlines():
+            event = Event(**json.loads(line))
+            if self.first_id is None:
+                self.first_id = event.id
+            if event.id > self.last_id:
+                self._deliver(event)
+
+    def _run_follower(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self.condition:
+                self._follow()
+
+    def _ensure_follower(self):
+        # Un thread par processus (les workers issus d'un fork n'héritent pas du thread)
+        if self.follower_pid != os.getpid():
+            self.follower_pid = os.getpid()
+            threading.Thread(target=self._run_follower, name='events-follower', daemon=True).start()
+
+    def publish(self, channel, event_type, data):
+        self._ensure_follower()
+        with self.file_lock, self.condition:
+            self._follow()
+            event = Event(self.last_id + 1, channel, event_type, data)
+            with open(self.path, 'ab') as f:
+                f.write((json.dumps(event._asdict(), ensure_ascii=False) + '\n').encode('utf-8'))
+            self._follow()
+            if self.first_id is not None and event.id - self.first_id >= EVENTS_LOG_MAX:
+                self._truncate()
+            return event.id
+
+    def _truncate(self):
+        """Réécrit le journal avec les derniers événements (sous les deux verrous)."""
+        directory = os.path.dirname(self.path)
+        fd, tmp_path = tempfile.mkstemp(prefix='.events.', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for event in self.buffer:
+                f.write(json.dumps(event._asdict(), ensure_ascii=False) + '\n')
+        # Mêmes droits que le journal créé par open(), pas les 0600 de mkstemp
+        os.chmod(tmp_path, FILE_MODE)
+        os.replace(tmp_path, self.path)
+        self._follow()
+
+    def current_id(self):
+        self._ensure_follower()
+        with self.condition:
+            self._follow()
+            return self.last_id
+
+    def wait(self, last_id, channels, timeout):
+        self._ensure_follower()
+        with self.condition:
+            self._follow()
+        return super().wait(last_id, channels, timeout)
+
+
+def make_broker(kind=EVENTS_BACKEND):
+    if kind == 'memory':
+        return MemoryBroker()
+    if kind == 'file':
+        return FileBroker()
+    raise ValueError(f"TIGERS_EVENTS inconnu : {kind}")
+
+
+broker = make_broker()
+
+
+def publish(channel, event_type, data):
+    """Publie un événement sur `channel` via le broker configuré."""
+    return broker.publish(channel, event_type, data)
+
+
+def user_channel(user_id):
+    return f"user:{user_id}"
+
+
+def author_channel(user_id):
+    return f"author:{user_id}"
+
+
+def publish_notification(notification, unread):
+    """Annonce une nouvelle notification à son destinataire, avec son nombre de non-lues."""
+    return publish(user_channel(notification['to_user_id']), 'notification', {
+        'id': notification.get('id'),
+        'type': notification['type'],
+        'from_user_id': notification['from_user_id'],
+        'tweet_id': notification['tweet_id'],
+        'unread': unread,
+    })
+
+
+def stream(channels, last_event_id=None, duration=STREAM_DURATION, heartbeat=HEARTBEAT):
+    """
+    Générateur du flux text/event-stream pour `channels`, à partir de
+    last_event_id (en-tête Last-Event-ID) ou des seuls événements à venir.
+    """
+    channels = set(channels)
+    cursor = broker.current_id() if last_event_id is None else last_event_id
+    yield f"retry: {RETRY_MS}\n\n"
+    deadline = time.monotonic() + duration
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        found, latest = broker.wait(cursor, channels, min(heartbeat, remaining))
+        if found is None:
+            yield f"id: {latest}\nevent: resync\ndata: {{}}\n\n"
+        else:
+            for event in found:
+                yield f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+            if latest != (found[-1].id if found else cursor):
+                # Événements d'autres canaux : l'id avance quand même pour la reprise
+                yield f"id: {latest}\n\n"
+            elif not found:
+                yield ": keepalive\n\n"
+        cursor = latest
@@ -0,0 +1,216 @@
+"""
+Métriques de l'application, exposées au format texte de Prometheus (/metrics).
+
+- Requêtes : histogramme des durées par endpoint et méthode, nombre de
+  réponses par statut, temps cumulé par phase.
+- Stockage : appels des fonctions read_* / write_* de data_manager (nombre,
+  temps) ; lectures et écritures de fichiers des JsonStore (nombre, octets,
+  temps) et transactions SQLite.
+- Phases : pendant une requête (start_request / end_request, appelés par
+  les routes), le temps passé dans chaque phase (storage, render, uploads,
+  compress ; le reste est compté comme « handler ») est cumulé par thread,
+  pour le journal des requêtes lentes. Une lecture faite pendant le rendu
+  d'un template compte dans les deux phases.
+
+Les compteurs sont ceux du processus : avec plusieurs workers, chacun est
+une cible Prometheus. Module sans Flask : data_manager, sqlite_backend et
+uploads l'alimentent directement.
+"""
+import functools
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from types import SimpleNamespace
+
+# Bornes (secondes) de l'histogramme des durées de requêtes
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Temps de la requête hors phases mesurées (code des routes, tris...)
+HANDLER_PHASE = 'handler'
+
+_lock = threading.Lock()
+# (endpoint, méthode) -> [requêtes <= chaque borne..., total, somme des durées]
+_requests = {}
+# (endpoint, méthode, statut) -> nombre de réponses
+_statuses = {}
+# (endpoint, phase) -> secondes
+_phases = {}
+# fonction -> [appels, secondes]
+_calls = {}
+# (store, opération) -> [nombre, octets, secondes]
+_io = {}
+# Requête en cours du thread (phases, E/S)
+_current = threading.local()
+
+
+def reset():
+    """Remet tous les compteurs à zéro (tests)."""
+    with _lock:
+        for table in (_requests, _statuses, _phases, _calls, _io):
+            table.clear()
+
+
+# ------------------- REQUÊTE EN COURS -------------------
+def start_request():
+    _current.start = perf_counter()
+    _current.phases = {}
+    _current.open = {}
+    _current.io = {}
+
+
+def begin_phase(name):
+    """Début de la phase `name` ; les phases imbriquées de même nom ne comptent qu'une fois."""
+    if getattr(_current, 'phases', None) is None:
+        return
+    depth, start = _current.open.get(name, (0, None))
+    _current.open[name] = (depth + 1, perf_counter() if depth == 0 else start)
+
+
+def end_phase(name):
+    if getattr(_current, 'phases', None) is None or name not in _current.open:
+        return
+    depth, start = _current.open.pop(name)
+    if depth > 1:
+        _current.open[name] = (depth - 1, start)
+    else:
+        _current.phases[name] = _current.phases.get(name, 0.0) + perf_counter() - start
+
+
+@contextmanager
+def phase(name):
+    """Compte le temps du bloc (ou de la fonction décorée) dans la phase `name` de la requête en cours."""
+    begin_phase(name)
+    try:
+        yield
+    finally:
+        end_phase(name)
+
+
+def end_request(endpoint, method, status):
+    """
+    Termine la requête en cours du thread et l'enregistre ; retourne
+    (durée, {phase: secondes}, {(store, opération): [nombre, octets]}).
+    """
+    duration = perf_counter() - _current.start
+    phases, io = _current.phases, _current.io
+    _current.phases = None
+    phases[HANDLER_PHASE] = max(0.0, duration - sum(phases.values()))
+    with _lock:
+        histogram = _requests.setdefault((endpoint, method), [0] * (len(BUCKETS) + 1) + [0.0])
+        for i, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                histogram[i] += 1
+        histogram[len(BUCKETS)] += 1
+        histogram[-1] += duration
+        key = (endpoint, method, str(status))
+        _statuses[key] = _statuses.get(key, 0) + 1
+        for name, seconds in phases.items():
+            _phases[(endpoint, name)] = _phases.get((endpoint, name), 0.0) + seconds
+    return duration, phases, io
+
+
+def describe(duration, phases, io):
+    """Résumé d'une requête pour le journal des requêtes lentes."""
+    parts = [f"{name} {seconds * 1000:.0f} ms"
+             for name, seconds in sorted(phases.items(), key=lambda item: -item[1])]
+    text = f"{duration * 1000:.0f} ms ({', '.join(parts)})"
+    if io:
+        text += ' ; E/S : ' + ', '.join(f"{store} {operation} x{count} {size} o"
+                                        for (store, operation), (count, size) in sorted(io.items()))
+    return text
+
+
+# ------------------- STOCKAGE -------------------
+@contextmanager
+def storage_io(store, operation):
+    """
+    Chronomètre une opération de fichier de `store` (read, write, log_read,
+    log_append, transaction), comptée dans la phase storage ; le bloc note
+    la taille lue ou écrite dans `io.bytes`.
+    """
+    io = SimpleNamespace(bytes=0)
+    begin_phase('storage')
+    start = perf_counter()
+    try:
+        yield io
+    finally:
+        seconds = perf_counter() - start
+        end_phase('storage')
+        key = (store, operation)
+        with _lock:
+            totals = _io.setdefault(key, [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += io.bytes
+            totals[2] += seconds
+        if getattr(_current, 'phases', None) is not None:
+            counts = _current.io.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += io.bytes
+
+
+def storage_call(func):
+    """Décorateur des fonctions read_* / write_* de data_manager : appels et temps comptés."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            with phase('storage'):
+                return func(*args, **kwargs)
+        finally:
+            seconds = perf_counter() - start
+            with _lock:
+                totals = _calls.setdefault(name, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+    return wrapper
+
+
+# ------------------- FORMAT PROMETHEUS -------------------
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def _metric(lines, name, kind, help_text, samples):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_labels(**labels)} {value}")
+
+
+def render():
+    """Toutes les métriques au format texte de Prometheus (version 0.0.4)."""
+    with _lock:
+        requests = {key: list(value) for key, value in _requests.items()}
+        statuses, phases = dict(_statuses), dict(_phases)
+        calls = {key: list(value) for key, value in _calls.items()}
+        io = {key: list(value) for key, value in _io.items()}
+
+    lines = []
+    samples = []
+    for (endpoint, method), histogram in sorted(requests.items()):
+        for bound, count in zip(BUCKETS, histogram):
+            samples.append(('_bucket', dict(endpoint=endpoint, method=method, le=bound), count))
+        samples.append(('_bucket', dict(endpoint=endpoint, method=method, le='+Inf'), histogram[len(BUCKETS)]))
+        samples.append(('_sum', dict(endpoint=endpoint, method=method), histogram[-1]))
+        samples.append(('_count', dict(endpoint=endpoint, method=method), histogram[len(BUCKETS)]))
+    _metric(lines, 'tigers_request_duration_seconds', 'histogram',
+            "Durée des requêtes par endpoint.", samples)
+    _metric(lines, 'tigers_requests_total', 'counter', "Réponses par endpoint et statut.",
+            [('', dict(endpoint=e, method=m, status=s), n) for (e, m, s), n in sorted(statuses.items())])
+    _metric(lines, 'tigers_request_phase_seconds_total', 'counter',
+            "Temps des requêtes par endpoint et phase (storage, render, uploads, compress, handler).",
+            [('', dict(endpoint=e, phase=p), s) for (e, p), s in sorted(phases.items())])
+    _metric(lines, 'tigers_storage_calls_total', 'counter', "Appels des fonctions read_*/write_* de data_manager.",
+            [('', dict(function=f), n) for f, (n, _) in sorted(calls.items())])
+    _metric(lines, 'tigers_storage_call_seconds_total', 'counter', "Temps passé dans ces fonctions.",
+            [('', dict(function=f), s) for f, (_, s) in sorted(calls.items())])
+    _metric(lines, 'tigers_storage_io_total', 'counter', "Opérations de fichiers des stores.",
+            [('', dict(store=st, operation=op), n) for (st, op), (n, _, _) in sorted(io.items())])
+    _metric(lines, 'tigers_storage_io_bytes_total', 'counter', "Octets lus ou écrits par ces opérations.",
+            [('', dict(store=st, operation=op), b) for (st, op), (_, b, _) in sorted(io.items())])
+    _metric(lines, 'tigers_storage_io_seconds_total', 'counter', "Temps passé dans ces opérations.",
+            [('', dict(store=st, operation=op), s) for (st, op), (_, _, s) in sorted(io.items())])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,146 @@
+"""
+Migrations du format des données (fichiers JSON de data/).
+
+La version du format est notée dans data/schema.json, qui accompagne
+users.json et tweets.json (sync.sh le copie avec eux). MIGRATIONS est la
+liste ordonnée des migrations : la version N est appliquée par la N-ième.
+Au démarrage, migrate() lit seulement ce petit fichier quand les données sont
+à jour ; sinon il applique, une seule fois et sous verrou (un seul worker
+s'en charge, les autres attendent puis trouvent la version à jour), les
+migrations manquantes dans l'ordre, en notant la version après chacune.
+
+Chaque migration ne réécrit un fichier que si elle y change quelque chose,
+et doit pouvoir être rejouée sans effet (un crash avant la mise à jour de la
+version la fait rejouer au démarrage suivant).
+
+Pour ajouter une migration : une fonction à la fin de MIGRATIONS, jamais
+d'insertion ni de suppression au milieu. Lancement manuel :
+
+    python -m utils.migrations
+"""
+import json
+import os
+from datetime import datetime, timezone
+
+from utils import data_manager as dm
+from utils.data_manager import BASE_DIR, EPOCH, atomic_write_json, file_lock
+
+SCHEMA_FILE = os.path.join(BASE_DIR, 'schema.json')
+
+
+def _follow_fields():
+    """Champs 'followers' et 'following' des utilisateurs (ancien ensure_follow_fields)."""
+    users = dm._users_store.read()
+    changed = 0
+    for user in users:
+        if 'followers' not in user or 'following' not in user:
+            user.setdefault('followers', [])
+            user.setdefault('following', [])
+            changed += 1
+    if changed:
+        dm._users_store.write(users)
+    return changed
+
+
+def _tweet_fields():
+    """Listes 'likes', 'comments' (et likes des commentaires) et 'retweets' des tweets."""
+    tweets = dm._tweets_store.read()
+    changed = 0
+    for tweet in tweets:
+        missing = [field for field in ('likes', 'comments', 'retweets') if field not in tweet]
+        comments = [c for c in tweet.get('comments', []) if 'likes' not in c]
+        for field in missing:
+            tweet[field] = []
+        for comment in comments:
+            comment['likes'] = []
+        changed += bool(missing or comments)
+    if changed:
+        dm._tweets_store.write(tweets)
+    return changed
+
+
+def _retweet_objects():
+    """
+    Retweets à l'ancien format (liste d'IDs) convertis en
+    {"user_id", "retweeted_at"}, avec la date du tweet (ancien /migrate-retweets).
+    """
+    tweets = dm._tweets_store.read()
+    changed = 0
+    for tweet in tweets:
+        retweets = tweet.get('retweets', [])
+        if any(not isinstance(rt, dict) for rt in retweets):
+            tweet['retweets'] = [rt if isinstance(rt, dict) else
+                                 {"user_id": rt, "retweeted_at": tweet.get('created_at') or EPOCH}
+                                 for rt in retweets]
+            changed += 1
+    if changed:
+        dm._tweets_store.write(tweets)
+    return changed
+
+
+def _normalize_date(value):
+    """Date ISO en UTC terminée par Z ; EPOCH si elle est absente ou illisible."""
+    try:
+        dt = datetime.fromisoformat(value.rstrip('Z'))
+    except (AttributeError, ValueError):
+        return EPOCH
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat() + 'Z'
+
+
+def _tweet_dates():
+    """
+    created_at des tweets au format UTC « ...Z » (ancien data/fix_tweet.py,
+    sans la renumérotation des tweets, qui casserait likes, notifications et
+    timelines). Les timelines, qui recopient ces dates, sont recalculées.
+    """
+    tweets = dm._tweets_store.read()
+    changed = 0
+    for tweet in tweets:
+        created_at = _normalize_date(tweet.get('created_at'))
+        if created_at != tweet.get('created_at'):
+            tweet['created_at'] = created_at
+            changed += 1
+    if changed:
+        dm._tweets_store.write(tweets)
+        if dm.STORAGE_BACKEND == 'json':
+            from utils import timelines
+            timelines.rebuild()
+    return changed
+
+
+MIGRATIONS = [
+    _follow_fields,
+    _tweet_fields,
+    _retweet_objects,
+    _tweet_dates,
+]
+
+
+def current_version():
+    """Version notée dans data/schema.json (0 pour des données d'avant le versionnement)."""
+    try:
+        with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)['version']
+    except FileNotFoundError:
+        return 0
+
+
+def migrate():
+    """Applique les migrations en attente ; retourne le nombre de migrations appliquées."""
+    if current_version() >= len(MIGRATIONS):
+        return 0
+    with file_lock(SCHEMA_FILE), dm._users_store.file_lock, dm._tweets_store.file_lock:
+        # Un autre worker a pu migrer pendant l'attente du verrou
+        version = current_version()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            changed = migration()
+            atomic_write_json(SCHEMA_FILE, {'version': number}, indent=4)
+            print(f"Migration {number} ({migration.__name__.lstrip('_')}) : {changed} enregistrements modifiés.")
+        return len(MIGRATIONS) - version
+
+
+if __name__ == '__main__':
+    count = migrate()
+    print(f"{count} migrations appliquées, données en version {current_version()} ({SCHEMA_FILE})")
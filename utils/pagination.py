@@ -0,0 +1,104 @@
+"""
+Pagination par curseur pour le fil, les profils et les notifications.
+
+Chaque liste est triée du plus récent au plus ancien selon une clé
+(date, id). Un curseur est cette clé encodée de façon opaque :
+?before=<curseur> donne la page plus ancienne, ?after=<curseur> la page
+plus récente. Une page ne coûte que O(taille de page) quand la source
+s'appuie sur un index trié (JsonStore.page, timelines, SQL).
+"""
+import base64
+import binascii
+import bisect
+import heapq
+import json
+from typing import NamedTuple
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class Page(NamedTuple):
+    items: list
+    older: str = None   # curseur de la page suivante (plus ancienne), None à la fin
+    newer: str = None   # curseur de la page précédente (plus récente), None en tête
+
+
+def encode_cursor(key):
+    """Encode une clé (date, id) en curseur opaque pour l'URL."""
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Décode un curseur ; None s'il est absent ou invalide."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        at, item_id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    if not isinstance(at, str) or not isinstance(item_id, int):
+        return None
+    return (at, item_id)
+
+
+def page_params(args):
+    """Lit before / after / limit dans les paramètres de la requête."""
+    try:
+        limit = int(args.get('limit', PAGE_SIZE))
+    except ValueError:
+        limit = PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    return decode_cursor(args.get('before')), decode_cursor(args.get('after')), limit
+
+
+def paginate(fetch, key, before=None, after=None, limit=PAGE_SIZE):
+    """
+    Construit une Page à partir de `fetch(before=, after=, limit=)`, qui renvoie
+    les éléments du plus récent au plus ancien. Un élément de plus que
+    `limit` est demandé pour savoir s'il reste une page.
+    """
+    items = fetch(before=before, after=after, limit=limit + 1)
+    if after is not None:
+        more = len(items) > limit
+        items = items[1:] if more else items
+        newer = encode_cursor(key(items[0])) if more else None
+        older = encode_cursor(key(items[-1]) if items else after)
+        return Page(items, older, newer)
+
+    more = len(items) > limit
+    items = items[:limit]
+    older = encode_cursor(key(items[-1])) if more else None
+    newer = encode_cursor(key(items[0])) if before is not None and items else None
+    return Page(items, older, newer)
+
+
+def sorted_fetcher(items, key):
+    """`fetch` pour une liste déjà triée du plus récent au plus ancien."""
+    ascending = items[::-1]
+    keys = [key(item) for item in ascending]
+
+    def fetch(before=None, after=None, limit=PAGE_SIZE):
+        if after is not None:
+            start = bisect.bisect_right(keys, after)
+            end = min(len(keys), start + limit)
+        else:
+            end = bisect.bisect_left(keys, before) if before is not None else len(keys)
+            start = max(0, end - limit)
+        return ascending[start:end][::-1]
+
+    return fetch
+
+
+def merged_fetcher(fetchers, key):
+    """`fetch` fusionnant plusieurs sources triées (fusion k-voies)."""
+
+    def fetch(before=None, after=None, limit=PAGE_SIZE):
+        pages = [f(before=before, after=after, limit=limit) for f in fetchers]
+        merged = list(heapq.merge(*pages, key=key, reverse=True))
+        # Après un curseur `after`, on garde les éléments les plus proches du curseur
+        return merged[-limit:] if after is not None else merged[:limit]
+
+    return fetch
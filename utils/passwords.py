@@ -0,0 +1,138 @@
+"""
+Hachage des mots de passe hors du thread de la requête.
+
+check_password_hash et generate_password_hash occupent le processeur
+plusieurs dizaines de millisecondes en tenant le GIL : pendant une vague de
+connexions, toutes les autres requêtes du worker attendaient. Les hachages
+passent donc par un petit pool de processus, et le thread de la requête
+attend le résultat sans tenir le GIL :
+
+- HASH_WORKERS processus (TIGERS_HASH_WORKERS ; 0 = dans le thread de la
+  requête, comme avant) ;
+- au plus HASH_QUEUE hachages en cours ou en attente (TIGERS_HASH_QUEUE) :
+  au-delà, HashingBusy est levée tout de suite plutôt que d'empiler ;
+- un hachage sans résultat après HASH_TIMEOUT secondes (TIGERS_HASH_TIMEOUT)
+  lève aussi HashingBusy.
+
+Les paramètres de hachage sont ceux de werkzeug (TIGERS_HASH_METHOD) :
+"scrypt", "scrypt:32768:8:1", "pbkdf2:sha256:1000000"... Un mot de passe
+haché avec d'autres paramètres est re-haché à la connexion suivante :
+verify_password() retourne alors le nouveau hash à enregistrer.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from utils import metrics
+
+HASH_METHOD = os.environ.get('TIGERS_HASH_METHOD', 'scrypt')
+HASH_WORKERS = int(os.environ.get('TIGERS_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE = int(os.environ.get('TIGERS_HASH_QUEUE', str(8 * max(HASH_WORKERS, 1))))
+HASH_TIMEOUT = float(os.environ.get('TIGERS_HASH_TIMEOUT', '5'))
+
+# Processus démarrés par un serveur dédié (ou lancés à neuf) plutôt que par fork() :
+# un fork du worker pendant qu'un autre thread tient un verrou peut bloquer le fils
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+_lock = threading.Lock()
+_executor = None
+_pending = 0
+
+
+class HashingBusy(RuntimeError):
+    """Trop de hachages en attente, ou hachage trop long."""
+
+
+@lru_cache(maxsize=None)
+def _method_prefix(method):
+    # Forme complète des paramètres ("scrypt" -> "scrypt:32768:8:1"), telle qu'écrite dans les hash
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def needs_rehash(stored, method=None):
+    """Vrai si `stored` n'a pas été haché avec les paramètres `method` (HASH_METHOD par défaut)."""
+    return stored.split('$', 1)[0] != _method_prefix(method or HASH_METHOD)
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method)
+
+
+def _verify(stored, password, method):
+    if not check_password_hash(stored, password):
+        return False, None
+    return True, (generate_password_hash(password, method) if needs_rehash(stored, method) else None)
+
+
+def _release(future):
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+def _run(func, *args):
+    """Exécute func(*args) dans le pool, dans la limite de HASH_QUEUE et HASH_TIMEOUT."""
+    global _executor, _pending
+    if HASH_WORKERS <= 0:
+        return func(*args)
+    with _lock:
+        if _pending >= HASH_QUEUE:
+            raise HashingBusy(f"{_pending} hachages en attente")
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS,
+                                            mp_context=multiprocessing.get_context(_START_METHOD))
+        executor = _executor
+        # Soumis sous le verrou : shutdown() ne peut pas arrêter le pool entre-temps
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            _executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise HashingBusy("Pool de hachage interrompu") from None
+        _pending += 1
+    future.add_done_callback(_release)
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except TimeoutError:
+        # concurrent.futures.TimeoutError (distincte de l'exception native avant Python 3.11).
+        # Encore en file : retiré ; déjà commencé : son résultat sera ignoré
+        future.cancel()
+        raise HashingBusy(f"Hachage sans résultat après {HASH_TIMEOUT} s") from None
+    except CancelledError:
+        # Retiré de la file par shutdown(cancel_futures=True)
+        raise HashingBusy("Pool de hachage arrêté") from None
+    except BrokenProcessPool:
+        # Processus tué (mémoire...) : un nouveau pool au prochain appel
+        shutdown(executor)
+        raise HashingBusy("Pool de hachage interrompu") from None
+
+
+@metrics.phase('hashing')
+def hash_password(password):
+    """Hash de `password` avec les paramètres HASH_METHOD."""
+    return _run(_hash, password, HASH_METHOD)
+
+
+@metrics.phase('hashing')
+def verify_password(stored, password):
+    """
+    Vérifie `password` contre le hash `stored` : (valide, nouveau_hash).
+    nouveau_hash n'est donné que pour un mot de passe valide haché avec
+    d'autres paramètres que HASH_METHOD ; il est à enregistrer à la place.
+    """
+    return _run(_verify, stored, password, HASH_METHOD)
+
+
+def shutdown(executor=None):
+    """Arrête le pool (le suivant est créé au prochain hachage) ; `executor` : seulement s'il est actif."""
+    global _executor
+    with _lock:
+        if _executor is None or (executor is not None and executor is not _executor):
+            return
+        stopping, _executor = _executor, None
+    stopping.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,140 @@
+"""
+Profilage cProfile d'une partie des requêtes (activé dans app.py).
+
+Un profil par requête profilée, écrit dans PROFILE_DIR sous le nom
+<endpoint>__<date>__<pid>.prof ; au-delà de `max_files` profils, les plus
+anciens sont supprimés. report() agrège les profils (tous, ou ceux d'un
+endpoint) et donne les fonctions les plus coûteuses.
+
+Un seul profil à la fois par processus : une requête qui arrive pendant
+qu'une autre est profilée ne l'est pas.
+
+Les fichiers s'ouvrent aussi avec les outils habituels, par exemple :
+
+    python -m pstats data/profiles/routes.feed__20250101T120000.000000__1234.prof
+    snakeviz data/profiles/routes.feed__20250101T120000.000000__1234.prof
+"""
+import cProfile
+import glob
+import os
+import pstats
+import random
+import re
+import threading
+from datetime import datetime
+
+from utils.data_manager import BASE_DIR
+
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+MAX_FILES = 200
+REPORT_LIMIT = 20
+REPORT_SORTS = ('cumulative', 'tottime', 'calls')
+
+_active = threading.Lock()
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def sampled(rate):
+    """Tirage d'une requête à profiler avec la probabilité `rate` (0 à 1)."""
+    return rate > 0 and random.random() < rate
+
+
+def start():
+    """Démarre un profil pour la requête en cours ; None si un autre est déjà en cours."""
+    if not _active.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except BaseException:
+        _active.release()
+        raise
+    return profiler
+
+
+def stop(profiler, endpoint, directory=PROFILE_DIR, max_files=MAX_FILES):
+    """Arrête `profiler`, écrit son profil et retourne le chemin du fichier."""
+    try:
+        profiler.disable()
+    finally:
+        _active.release()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{_UNSAFE.sub('_', endpoint)}__{datetime.now().strftime('%Y%m%dT%H%M%S.%f')}__{os.getpid()}.prof"
+    path = os.path.join(directory, name)
+    # Écrit puis renommé : report() ne lit jamais un profil incomplet
+    profiler.dump_stats(path + '.tmp')
+    os.replace(path + '.tmp', path)
+    prune(directory, max_files)
+    return path
+
+
+def profiles(directory=PROFILE_DIR, endpoint=None):
+    """Profils enregistrés (du plus ancien au plus récent), éventuellement d'un seul endpoint."""
+    pattern = f"{_UNSAFE.sub('_', endpoint)}__*.prof" if endpoint else '*.prof'
+    paths = glob.glob(os.path.join(directory, pattern))
+    return sorted(paths, key=lambda p: os.path.basename(p).split('__')[1])
+
+
+def prune(directory=PROFILE_DIR, max_files=MAX_FILES):
+    """Supprime les profils les plus anciens au-delà de `max_files`."""
+    paths = profiles(directory)
+    for path in paths[:max(0, len(paths) - max_files)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Déjà supprimé par un autre worker
+            pass
+
+
+def endpoint_of(path):
+    return os.path.basename(path).split('__')[0]
+
+
+def report(directory=PROFILE_DIR, endpoint=None, limit=REPORT_LIMIT, sort='cumulative'):
+    """
+    Fonctions les plus coûteuses sur l'ensemble des profils (ou ceux de
+    `endpoint`), triées par `sort` (temps cumulé, temps propre ou appels).
+    """
+    if sort not in REPORT_SORTS:
+        raise ValueError(f"Tri inconnu : {sort}")
+    paths = profiles(directory, endpoint)
+    counts = {}
+    for path in paths:
+        counts[endpoint_of(path)] = counts.get(endpoint_of(path), 0) + 1
+    result = {'profiles': len(paths), 'endpoints': counts, 'functions': []}
+    stats, loaded = None, 0
+    for path in paths:
+        try:
+            if stats is None:
+                stats = pstats.Stats(path)
+            else:
+                stats.add(path)
+        except (OSError, EOFError, TypeError, ValueError):
+            # Profil supprimé ou illisible entre-temps
+            continue
+        loaded += 1
+    if stats is None:
+        return result
+
+    key = {'cumulative': 3, 'tottime': 2, 'calls': 1}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+    for (filename, line, name), (primitive, calls, tottime, cumtime, _) in rows:
+        result['functions'].append({
+            'function': f"{_short_path(filename)}:{line}({name})",
+            'calls': calls,
+            'primitive_calls': primitive,
+            'tottime': round(tottime, 6),
+            'cumtime': round(cumtime, 6),
+            'per_profile_ms': round(cumtime * 1000 / loaded, 3),
+        })
+    return result
+
+
+def _short_path(filename):
+    """Chemin relatif au projet pour ses fichiers, nom de module ailleurs."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if filename.startswith(root + os.sep):
+        return os.path.relpath(filename, root)
+    if 'site-packages' in filename:
+        return filename.split('site-packages' + os.sep, 1)[1]
+    return filename
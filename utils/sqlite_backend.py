@@ -0,0 +1,779 @@
+"""
+Backend SQLite de utils/data_manager.
+
+Mêmes fonctions que le backend JSON (read_users, read_tweets, apply_tweet_op,
+follow_user, add_notification...), mais les likes, retweets, commentaires,
+réponses et abonnements sont des tables indexées : une mutation ou une
+recherche ne touche plus que les lignes concernées.
+
+Activation : TIGERS_STORAGE=sqlite (chemin de la base : TIGERS_SQLITE_PATH).
+Import des fichiers JSON existants :
+
+    python -m utils.sqlite_backend
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from backend.models import User
+from utils import metrics
+
+BASE_DIR = os.path.abspath(os.environ.get('TIGERS_DATA_DIR')
+                           or os.path.join(os.path.dirname(__file__), '..', 'data'))
+DB_FILE = os.environ.get('TIGERS_SQLITE_PATH', os.path.join(BASE_DIR, 'tigers.db'))
+POOL_SIZE = int(os.environ.get('TIGERS_SQLITE_POOL_SIZE', '8'))
+# Les tweets sans created_at sont triés comme très anciens (comme data_manager.EPOCH)
+EPOCH = '1970-01-01T00:00:00Z'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT,
+    bio TEXT,
+    profile_pic_url TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users(username COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+-- Compteur incrémenté à chaque écriture de `users` (voir users_version)
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('users_version', 0);
+CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'users_version'; END;
+CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'users_version'; END;
+CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'users_version'; END;
+
+CREATE TABLE IF NOT EXISTS follows (
+    follower_id INTEGER NOT NULL,
+    followed_id INTEGER NOT NULL,
+    UNIQUE (follower_id, followed_id)
+);
+CREATE INDEX IF NOT EXISTS idx_follows_followed ON follows(followed_id);
+
+CREATE TABLE IF NOT EXISTS tweets (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    username TEXT,
+    content TEXT,
+    image_urls TEXT,
+    created_at TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tweets_user ON tweets(user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_tweets_created ON tweets(created_at);
+
+CREATE TABLE IF NOT EXISTS likes (
+    tweet_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    UNIQUE (tweet_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_likes_user ON likes(user_id);
+
+CREATE TABLE IF NOT EXISTS retweets (
+    tweet_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    retweeted_at TEXT,
+    UNIQUE (tweet_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_retweets_user ON retweets(user_id, retweeted_at);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY,
+    tweet_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    user_id INTEGER,
+    username TEXT,
+    content TEXT,
+    created_at TEXT,
+    UNIQUE (tweet_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_comments_user ON comments(user_id);
+
+CREATE TABLE IF NOT EXISTS comment_likes (
+    comment_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    UNIQUE (comment_id, user_id)
+);
+
+CREATE TABLE IF NOT EXISTS replies (
+    id INTEGER PRIMARY KEY,
+    comment_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    user_id INTEGER,
+    username TEXT,
+    content TEXT,
+    created_at TEXT,
+    UNIQUE (comment_id, position)
+);
+CREATE INDEX IF NOT EXISTS idx_replies_user ON replies(user_id);
+
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY,
+    to_user_id INTEGER,
+    from_user_id INTEGER,
+    type TEXT,
+    tweet_id INTEGER,
+    content TEXT,
+    seen INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(to_user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications(to_user_id, seen);
+
+-- Non-lues par destinataire (voir unread_count), tenu à jour par triggers
+CREATE TABLE IF NOT EXISTS notification_counters (
+    user_id INTEGER PRIMARY KEY,
+    unread INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO notification_counters (user_id, unread)
+    SELECT to_user_id, COUNT(*) FROM notifications
+    WHERE seen = 0 AND NOT EXISTS (SELECT 1 FROM notification_counters) GROUP BY to_user_id;
+CREATE TRIGGER IF NOT EXISTS notification_unread_insert AFTER INSERT ON notifications WHEN NEW.seen = 0
+BEGIN
+    INSERT OR IGNORE INTO notification_counters (user_id, unread) VALUES (NEW.to_user_id, 0);
+    UPDATE notification_counters SET unread = unread + 1 WHERE user_id = NEW.to_user_id;
+END;
+CREATE TRIGGER IF NOT EXISTS notification_unread_seen AFTER UPDATE OF seen ON notifications
+WHEN OLD.seen = 0 AND NEW.seen != 0
+BEGIN UPDATE notification_counters SET unread = unread - 1 WHERE user_id = OLD.to_user_id; END;
+CREATE TRIGGER IF NOT EXISTS notification_unread_unseen AFTER UPDATE OF seen ON notifications
+WHEN OLD.seen != 0 AND NEW.seen = 0
+BEGIN
+    INSERT OR IGNORE INTO notification_counters (user_id, unread) VALUES (NEW.to_user_id, 0);
+    UPDATE notification_counters SET unread = unread + 1 WHERE user_id = NEW.to_user_id;
+END;
+CREATE TRIGGER IF NOT EXISTS notification_unread_delete AFTER DELETE ON notifications WHEN OLD.seen = 0
+BEGIN UPDATE notification_counters SET unread = unread - 1 WHERE user_id = OLD.to_user_id; END;
+"""
+
+TWEET_COLUMNS = ('id', 'user_id', 'username', 'content', 'image_urls', 'created_at')
+
+
+class ConnectionPool:
+    """
+    Pool de connexions SQLite (mode WAL) partagé par les threads du processus.
+    Après un fork (workers gunicorn), le pool est recréé pour ne jamais
+    partager une connexion entre deux processus.
+
+    Un appel à connection() imbriqué dans un autre (même thread) réutilise
+    la connexion englobante : tout est validé en une transaction à la sortie
+    du bloc le plus externe (voir tweets_transaction).
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.pid = os.getpid()
+        self.idle = queue.LifoQueue(maxsize=size)
+        self.schema_ready = False
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self.lock:
+            if not self.schema_ready:
+                conn.executescript(SCHEMA)
+                self.schema_ready = True
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Fournit une connexion ; la transaction est validée en sortie (annulée sur exception)."""
+        if os.getpid() != self.pid:
+            self.__init__(self.path, self.size)
+        held = getattr(self.local, 'conn', None)
+        if held is not None:
+            yield held
+            return
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = self._connect()
+        self.local.conn = conn
+        try:
+            with metrics.storage_io('sqlite', 'transaction'), conn:
+                yield conn
+        finally:
+            self.local.conn = None
+            try:
+                self.idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+
+_pool = ConnectionPool(DB_FILE)
+
+
+# ------------------- UTILISATEURS -------------------
+
+def _grouped(conn, sql, ids, key):
+    """Exécute `sql` (filtré sur `ids` si fourni) et regroupe les lignes par colonne `key`."""
+    groups = {}
+    if ids is not None:
+        if not ids:
+            return groups
+        sql = sql.format(where=f"WHERE {key} IN ({','.join('?' * len(ids))})")
+        rows = conn.execute(sql, list(ids))
+    else:
+        rows = conn.execute(sql.format(where=""))
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+def _load_users(conn, rows):
+    """Assemble des lignes de `users` (avec abonnements) au format dict du backend JSON."""
+    rows = list(rows)
+    ids = None if len(rows) > 500 else [r['id'] for r in rows]
+    following = _grouped(conn, "SELECT follower_id, followed_id FROM follows {where} ORDER BY rowid",
+                         ids, 'follower_id')
+    followers = _grouped(conn, "SELECT follower_id, followed_id FROM follows {where} ORDER BY rowid",
+                         ids, 'followed_id')
+    users = []
+    for row in rows:
+        user = User(**{k: row[k] for k in ('id', 'username', 'email', 'password', 'bio', 'profile_pic_url')}).to_dict()
+        user['following'] = [r['followed_id'] for r in following.get(row['id'], [])]
+        user['followers'] = [r['follower_id'] for r in followers.get(row['id'], [])]
+        user.update(json.loads(row['extra'] or '{}'))
+        users.append(user)
+    return users
+
+
+def _insert_user(conn, user):
+    model = User.from_dict(user)
+    known = set(model.to_dict()) | {'followers', 'following'}
+    extra = {k: v for k, v in user.items() if k not in known}
+    conn.execute(
+        "INSERT OR REPLACE INTO users (id, username, email, password, bio, profile_pic_url, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (model.id, model.username, model.email, model.password, model.bio, model.profile_pic_url,
+         json.dumps(extra) if extra else None))
+
+
+def _insert_follows(conn, users):
+    rows = []
+    for user in users:
+        rows += [(user['id'], followed) for followed in user.get('following', [])]
+        rows += [(follower, user['id']) for follower in user.get('followers', [])]
+    conn.executemany("INSERT OR IGNORE INTO follows (follower_id, followed_id) VALUES (?, ?)", rows)
+
+
+def init_files():
+    """Crée la base et son schéma si nécessaire."""
+    with _pool.connection():
+        pass
+
+
+def read_users():
+    with _pool.connection() as conn:
+        return _load_users(conn, conn.execute("SELECT * FROM users ORDER BY id"))
+
+
+def write_users(users):
+    with _pool.connection() as conn:
+        conn.execute("DELETE FROM users")
+        conn.execute("DELETE FROM follows")
+        for user in users:
+            _insert_user(conn, user)
+        _insert_follows(conn, users)
+
+
+def _get_user_where(clause, value):
+    with _pool.connection() as conn:
+        users = _load_users(conn, conn.execute(f"SELECT * FROM users WHERE {clause} LIMIT 1", (value,)))
+        return users[0] if users else None
+
+
+def get_user(user_id):
+    return _get_user_where("id = ?", user_id)
+
+
+def users_version():
+    with _pool.connection() as conn:
+        return conn.execute("SELECT value FROM meta WHERE key = 'users_version'").fetchone()[0]
+
+
+def get_users(user_ids):
+    user_ids = [uid for uid in set(user_ids) if uid is not None]
+    if not user_ids:
+        return {}
+    with _pool.connection() as conn:
+        rows = conn.execute(f"SELECT * FROM users WHERE id IN ({','.join('?' * len(user_ids))})", user_ids)
+        return {user['id']: user for user in _load_users(conn, rows)}
+
+
+def get_user_by_username(username, ignore_case=False):
+    if ignore_case:
+        return _get_user_where("username = ? COLLATE NOCASE", username)
+    return _get_user_where("username = ?", username)
+
+
+def get_user_by_email(email):
+    return _get_user_where("email = ?", email)
+
+
+def next_user_id():
+    with _pool.connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()[0]
+
+
+def add_user(user):
+    with _pool.connection() as conn:
+        _insert_user(conn, user)
+        _insert_follows(conn, [user])
+
+
+def update_user(user_id, fields):
+    user = get_user(user_id)
+    if not user:
+        return None
+    user.update(fields)
+    with _pool.connection() as conn:
+        _insert_user(conn, user)
+    return user
+
+
+def follow_user(follower_id, followed_id):
+    """
+    Ajoute un abonnement : follower_id suit followed_id.
+    Retourne True si la mise à jour a réussi, False si l'un des deux n'existe pas.
+    """
+    with _pool.connection() as conn:
+        found = conn.execute("SELECT COUNT(*) FROM users WHERE id IN (?, ?)",
+                             (follower_id, followed_id)).fetchone()[0]
+        if found < len({follower_id, followed_id}):
+            return False
+        conn.execute("INSERT OR IGNORE INTO follows (follower_id, followed_id) VALUES (?, ?)",
+                     (follower_id, followed_id))
+    return True
+
+
+def unfollow_user(follower_id, followed_id):
+    """
+    Supprime un abonnement : follower_id ne suit plus followed_id.
+    Retourne True si la mise à jour a réussi, False si l'un des deux n'existe pas.
+    """
+    with _pool.connection() as conn:
+        found = conn.execute("SELECT COUNT(*) FROM users WHERE id IN (?, ?)",
+                             (follower_id, followed_id)).fetchone()[0]
+        if found < len({follower_id, followed_id}):
+            return False
+        conn.execute("DELETE FROM follows WHERE follower_id = ? AND followed_id = ?",
+                     (follower_id, followed_id))
+    return True
+
+
+# ------------------- TWEETS -------------------
+
+def _load_tweets(conn, rows):
+    """Assemble des lignes de `tweets` au format dict du backend JSON."""
+    rows = list(rows)
+    ids = None if len(rows) > 500 else [r['id'] for r in rows]
+    likes = _grouped(conn, "SELECT tweet_id, user_id FROM likes {where} ORDER BY rowid", ids, 'tweet_id')
+    retweets = _grouped(conn, "SELECT tweet_id, user_id, retweeted_at FROM retweets {where} ORDER BY rowid",
+                        ids, 'tweet_id')
+    comments = _grouped(conn, "SELECT * FROM comments {where} ORDER BY tweet_id, position", ids, 'tweet_id')
+    comment_ids = None if ids is None else [c['id'] for group in comments.values() for c in group]
+    comment_likes = _grouped(conn, "SELECT comment_id, user_id FROM comment_likes {where} ORDER BY rowid",
+                             comment_ids, 'comment_id')
+    replies = _grouped(conn, "SELECT * FROM replies {where} ORDER BY comment_id, position",
+                       comment_ids, 'comment_id')
+
+    tweets = []
+    for row in rows:
+        tweet = {k: row[k] for k in TWEET_COLUMNS}
+        tweet['image_urls'] = json.loads(row['image_urls'] or '[]')
+        tweet['likes'] = [r['user_id'] for r in likes.get(row['id'], [])]
+        tweet['retweets'] = [{"user_id": r['user_id'], "retweeted_at": r['retweeted_at']}
+                             for r in retweets.get(row['id'], [])]
+        tweet['comments'] = []
+        for c in comments.get(row['id'], []):
+            comment = {k: c[k] for k in ('user_id', 'username', 'content', 'created_at')}
+            comment['likes'] = [r['user_id'] for r in comment_likes.get(c['id'], [])]
+            if c['id'] in replies:
+                comment['replies'] = [{k: r[k] for k in ('user_id', 'username', 'content', 'created_at')}
+                                      for r in replies[c['id']]]
+            tweet['comments'].append(comment)
+        tweet.update(json.loads(row['extra'] or '{}'))
+        tweets.append(tweet)
+    return tweets
+
+
+def _insert_comment(conn, tweet_id, position, comment):
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO comments (tweet_id, position, user_id, username, content, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (tweet_id, position, comment.get('user_id'), comment.get('username'), comment.get('content'),
+         comment.get('created_at')))
+    if not cur.rowcount:
+        return
+    comment_id = cur.lastrowid
+    conn.executemany("INSERT OR IGNORE INTO comment_likes (comment_id, user_id) VALUES (?, ?)",
+                     [(comment_id, uid) for uid in comment.get('likes', [])])
+    for reply_position, reply in enumerate(comment.get('replies', [])):
+        _insert_reply(conn, comment_id, reply_position, reply)
+
+
+def _insert_reply(conn, comment_id, position, reply):
+    conn.execute(
+        "INSERT OR IGNORE INTO replies (comment_id, position, user_id, username, content, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (comment_id, position, reply.get('user_id'), reply.get('username'), reply.get('content'),
+         reply.get('created_at')))
+
+
+def _insert_tweet(conn, tweet):
+    known = set(TWEET_COLUMNS) | {'likes', 'retweets', 'comments'}
+    extra = {k: v for k, v in tweet.items() if k not in known}
+    cur = conn.execute(
+        "INSERT OR IGNORE INTO tweets (id, user_id, username, content, image_urls, created_at, extra) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (tweet['id'], tweet['user_id'], tweet.get('username'), tweet.get('content'),
+         json.dumps(tweet.get('image_urls', [])), tweet.get('created_at'),
+         json.dumps(extra) if extra else None))
+    if not cur.rowcount:
+        return
+    conn.executemany("INSERT OR IGNORE INTO likes (tweet_id, user_id) VALUES (?, ?)",
+                     [(tweet['id'], uid) for uid in tweet.get('likes', [])])
+    conn.executemany(
+        "INSERT OR IGNORE INTO retweets (tweet_id, user_id, retweeted_at) VALUES (?, ?, ?)",
+        [(tweet['id'], rt['user_id'], rt.get('retweeted_at')) if isinstance(rt, dict)
+         else (tweet['id'], rt, tweet.get('created_at'))
+         for rt in tweet.get('retweets', [])])
+    for position, comment in enumerate(tweet.get('comments', [])):
+        _insert_comment(conn, tweet['id'], position, comment)
+
+
+def read_tweets():
+    with _pool.connection() as conn:
+        return _load_tweets(conn, conn.execute("SELECT * FROM tweets ORDER BY id"))
+
+
+def write_tweets(tweets):
+    with _pool.connection() as conn:
+        for table in ('tweets', 'likes', 'retweets', 'comments', 'comment_likes', 'replies'):
+            conn.execute(f"DELETE FROM {table}")
+        for tweet in tweets:
+            _insert_tweet(conn, tweet)
+
+
+def get_tweet(tweet_id):
+    with _pool.connection() as conn:
+        tweets = _load_tweets(conn, conn.execute("SELECT * FROM tweets WHERE id = ?", (tweet_id,)))
+        return tweets[0] if tweets else None
+
+
+def get_tweets(tweet_ids):
+    tweet_ids = [tid for tid in set(tweet_ids) if tid is not None]
+    if not tweet_ids:
+        return {}
+    with _pool.connection() as conn:
+        rows = conn.execute(f"SELECT * FROM tweets WHERE id IN ({','.join('?' * len(tweet_ids))})", tweet_ids)
+        return {tweet['id']: tweet for tweet in _load_tweets(conn, rows)}
+
+
+def next_tweet_id():
+    with _pool.connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tweets").fetchone()[0]
+
+
+def _cursor_clause(before, after, at="created_at", key="id"):
+    """
+    Condition SQL équivalente à clé < before, ou > after, pour une clé
+    (created_at, id) comme tweet_sort_key (created_at NULL = EPOCH).
+    `at` et `key` nomment les expressions SQL de la date et de l'id.
+    """
+    if after is not None:
+        value, item_id = after
+        if value > EPOCH:
+            return f"({at}, {key}) > (?, ?)", [value, item_id]
+        return f"({at} IS NOT NULL OR {key} > ?)", [item_id]
+    if before is not None:
+        value, item_id = before
+        if value > EPOCH:
+            return f"(({at}, {key}) < (?, ?) OR {at} IS NULL)", [value, item_id]
+        return f"({at} IS NULL AND {key} < ?)", [item_id]
+    return "1", []
+
+
+def tweets_page(before=None, after=None, limit=20, user_id=None, exclude_user_ids=()):
+    clause, params = _cursor_clause(before, after)
+    where = [clause]
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+    exclude = list(set(exclude_user_ids))
+    if exclude:
+        where.append(f"user_id NOT IN ({','.join('?' * len(exclude))})")
+        params.extend(exclude)
+    # Parcours de idx_tweets_created / idx_tweets_user (l'id est la rowid, dernière colonne de l'index)
+    order = "ASC" if after is not None else "DESC"
+    with _pool.connection() as conn:
+        rows = conn.execute(f"SELECT * FROM tweets WHERE {' AND '.join(where)} "
+                            f"ORDER BY created_at {order}, id {order} LIMIT ?", params + [limit])
+        tweets = _load_tweets(conn, rows)
+    return tweets[::-1] if after is not None else tweets
+
+
+def count_tweets(user_id):
+    with _pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM tweets WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+def retweets_page(user_id, before=None, after=None, limit=20):
+    # Date d'un retweet sans date : celle du tweet, comme dans le backend JSON
+    at = "COALESCE(r.retweeted_at, t.created_at)"
+    clause, params = _cursor_clause(before, after, at=at, key="t.id")
+    order = "ASC" if after is not None else "DESC"
+    with _pool.connection() as conn:
+        # Parcours de idx_retweets_user : seulement les retweets de l'utilisateur
+        rows = conn.execute(f"SELECT t.*, {at} AS rt_at FROM retweets r JOIN tweets t ON t.id = r.tweet_id "
+                            f"WHERE r.user_id = ? AND {clause} ORDER BY {at} {order}, t.id {order} LIMIT ?",
+                            [user_id] + params + [limit]).fetchall()
+        tweets = _load_tweets(conn, rows)
+    retweets = [dict(tweet, is_retweet=True, retweeted_at=row['rt_at'] or EPOCH)
+                for row, tweet in zip(rows, tweets)]
+    return retweets[::-1] if after is not None else retweets
+
+
+def count_retweets(user_id):
+    with _pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM retweets r JOIN tweets t ON t.id = r.tweet_id WHERE r.user_id = ?",
+                            (user_id,)).fetchone()[0]
+
+
+def _user_tweet_ids(table, user_id, tweet_ids):
+    # Sonde de l'index UNIQUE (tweet_id, user_id) pour chaque tweet demandé
+    tweet_ids = list(set(tweet_ids))
+    if not tweet_ids:
+        return set()
+    with _pool.connection() as conn:
+        rows = conn.execute(f"SELECT tweet_id FROM {table} WHERE user_id = ? "
+                            f"AND tweet_id IN ({','.join('?' * len(tweet_ids))})", [user_id] + tweet_ids)
+        return {row[0] for row in rows}
+
+
+def liked_tweet_ids(user_id, tweet_ids):
+    return _user_tweet_ids('likes', user_id, tweet_ids)
+
+
+def retweeted_tweet_ids(user_id, tweet_ids):
+    return _user_tweet_ids('retweets', user_id, tweet_ids)
+
+
+def liked_comment(tweet_id, index, user_id):
+    with _pool.connection() as conn:
+        return conn.execute("SELECT 1 FROM comment_likes l JOIN comments c ON c.id = l.comment_id "
+                            "WHERE c.tweet_id = ? AND c.position = ? AND l.user_id = ?",
+                            (tweet_id, index, user_id)).fetchone() is not None
+
+
+def interaction_counts(tweet_ids):
+    tweet_ids = list(set(tweet_ids))
+    if not tweet_ids:
+        return {}
+    marks = ','.join('?' * len(tweet_ids))
+    with _pool.connection() as conn:
+        counts = {row[0]: {"likes": 0, "retweets": 0, "comments": 0}
+                  for row in conn.execute(f"SELECT id FROM tweets WHERE id IN ({marks})", tweet_ids)}
+        for table in ('likes', 'retweets', 'comments'):
+            for tweet_id, count in conn.execute(f"SELECT tweet_id, COUNT(*) FROM {table} "
+                                                f"WHERE tweet_id IN ({marks}) GROUP BY tweet_id", tweet_ids):
+                if tweet_id in counts:
+                    counts[tweet_id][table] = count
+    return counts
+
+
+def _comment_id(conn, tweet_id, position):
+    row = conn.execute("SELECT id FROM comments WHERE tweet_id = ? AND position = ?",
+                       (tweet_id, position)).fetchone()
+    return row[0] if row else None
+
+
+def tweets_transaction():
+    """Une seule transaction pour toutes les mutations du bloc (connexion partagée)."""
+    return _pool.connection()
+
+
+def apply_tweet_op(op):
+    """
+    Applique une mutation (même format que le journal du backend JSON)
+    en une transaction ; retourne le tweet modifié (None s'il n'existe pas).
+    """
+    kind = op['op']
+    with _pool.connection() as conn:
+        if kind == 'add_tweet':
+            _insert_tweet(conn, op['tweet'])
+            tweet_id = op['tweet']['id']
+        else:
+            tweet_id = op['tweet_id']
+            user_id = op.get('user_id')
+            if kind == 'like':
+                conn.execute("INSERT OR IGNORE INTO likes (tweet_id, user_id) VALUES (?, ?)", (tweet_id, user_id))
+            elif kind == 'unlike':
+                conn.execute("DELETE FROM likes WHERE tweet_id = ? AND user_id = ?", (tweet_id, user_id))
+            elif kind == 'retweet':
+                conn.execute("INSERT OR IGNORE INTO retweets (tweet_id, user_id, retweeted_at) VALUES (?, ?, ?)",
+                             (tweet_id, user_id, op['retweeted_at']))
+            elif kind == 'unretweet':
+                conn.execute("DELETE FROM retweets WHERE tweet_id = ? AND user_id = ?", (tweet_id, user_id))
+            elif kind == 'comment':
+                _insert_comment(conn, tweet_id, op['index'], op['comment'])
+            elif kind in ('like_comment', 'unlike_comment', 'reply'):
+                comment_id = _comment_id(conn, tweet_id, op['index'])
+                if comment_id is None:
+                    pass
+                elif kind == 'like_comment':
+                    conn.execute("INSERT OR IGNORE INTO comment_likes (comment_id, user_id) VALUES (?, ?)",
+                                 (comment_id, user_id))
+                elif kind == 'unlike_comment':
+                    conn.execute("DELETE FROM comment_likes WHERE comment_id = ? AND user_id = ?",
+                                 (comment_id, user_id))
+                else:
+                    _insert_reply(conn, comment_id, op['reply_index'], op['reply'])
+            else:
+                raise ValueError(f"Opération inconnue : {kind}")
+        tweets = _load_tweets(conn, conn.execute("SELECT * FROM tweets WHERE id = ?", (tweet_id,)))
+        return tweets[0] if tweets else None
+
+
+def compact_tweets():
+    """Rien à compacter : chaque mutation est déjà une écriture ciblée."""
+
+
+def rename_user_tweets(user_id, username):
+    with _pool.connection() as conn:
+        conn.execute("UPDATE tweets SET username = ? WHERE user_id = ?", (username, user_id))
+
+
+# Le schéma garantit déjà ces champs
+# ------------------- NOTIFICATIONS -------------------
+
+NOTIFICATION_COLUMNS = ('to_user_id', 'from_user_id', 'type', 'tweet_id', 'content', 'seen', 'created_at')
+
+
+def _notification_from_row(row):
+    notification = {'id': row['id'], **{k: row[k] for k in NOTIFICATION_COLUMNS}}
+    notification['seen'] = bool(notification['seen'])
+    return notification
+
+
+def _insert_notifications(conn, notifications):
+    conn.executemany(
+        f"INSERT INTO notifications ({', '.join(NOTIFICATION_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [tuple(int(bool(n.get(k))) if k == 'seen' else n.get(k) for k in NOTIFICATION_COLUMNS)
+         for n in notifications])
+
+
+def read_notifications():
+    with _pool.connection() as conn:
+        return [_notification_from_row(r) for r in conn.execute("SELECT * FROM notifications ORDER BY id")]
+
+
+def write_notifications(notifications):
+    with _pool.connection() as conn:
+        conn.execute("DELETE FROM notifications")
+        _insert_notifications(conn, notifications)
+
+
+def add_notification(to_user_id, from_user_id, notif_type, tweet_id, content=None):
+    from utils import events
+
+    notification = {
+        "to_user_id": to_user_id,
+        "from_user_id": from_user_id,
+        "type": notif_type,
+        "tweet_id": tweet_id,
+        "content": content,
+        "seen": False,
+        "created_at": datetime.now().isoformat()
+    }
+    with _pool.connection() as conn:
+        _insert_notifications(conn, [notification])
+        notification['id'] = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    events.publish_notification(notification, unread_count(to_user_id))
+
+
+def notifications_page(user_id, before=None, after=None, limit=20):
+    clause, params = _cursor_clause(before, after)
+    order = "ASC" if after is not None else "DESC"
+    with _pool.connection() as conn:
+        rows = conn.execute(f"SELECT * FROM notifications WHERE to_user_id = ? AND {clause} "
+                            f"ORDER BY created_at {order}, id {order} LIMIT ?", [user_id] + params + [limit])
+        notifications = [_notification_from_row(r) for r in rows]
+    return notifications[::-1] if after is not None else notifications
+
+
+def unread_count(user_id):
+    with _pool.connection() as conn:
+        row = conn.execute("SELECT unread FROM notification_counters WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+
+def mark_notifications_seen(user_id, up_to=None):
+    with _pool.connection() as conn:
+        conn.execute("UPDATE notifications SET seen = 1 WHERE to_user_id = ? AND seen = 0 AND id <= ?",
+                     (user_id, up_to if up_to is not None else 2 ** 63 - 1))
+
+
+def compact_notifications():
+    """Rétention (mêmes règles que le backend JSON) : les non-lues sont toujours gardées."""
+    from utils.data_manager import NOTIF_INBOX_MAX, NOTIF_TTL_DAYS
+    from datetime import timedelta
+
+    cutoff = (datetime.now() - timedelta(days=NOTIF_TTL_DAYS)).isoformat()
+    with _pool.connection() as conn:
+        conn.execute("""
+            DELETE FROM notifications WHERE id IN (
+                SELECT id FROM (
+                    SELECT id, COALESCE(created_at, ?) AS at, ROW_NUMBER() OVER (
+                        PARTITION BY to_user_id ORDER BY created_at DESC, id DESC) AS rank
+                    FROM notifications WHERE seen != 0)
+                WHERE rank > ? OR at < ?)""", (EPOCH, NOTIF_INBOX_MAX, cutoff))
+
+
+def ensure_notification_inboxes():
+    pass
+
+
+# ------------------- IMPORT JSON -------------------
+
+def import_json(users, tweets, notifications):
+    """Remplace le contenu de la base par les données des fichiers JSON."""
+    write_users(users)
+    write_tweets(tweets)
+    write_notifications(notifications)
+
+
+if __name__ == '__main__':
+    # Lecture via le backend JSON (journal des tweets compris)
+    from utils import data_manager as dm
+    from utils import migrations
+
+    # Fichiers JSON mis au format courant avant l'import
+    migrations.migrate()
+    users = dm._users_store.read()
+    tweets = dm._tweets_store.read()
+    dm._json_ensure_notification_inboxes()
+    notifications = dm._json_read_notifications()
+
+    import_json(users, tweets, notifications)
+    print(f"{len(users)} utilisateurs, {len(tweets)} tweets et {len(notifications)} notifications "
+          f"importés dans {DB_FILE}")
@@ -0,0 +1,287 @@
+"""
+Timelines d'accueil pré-calculées (fan-out à l'écriture).
+
+Chaque utilisateur a une liste d'entrées [date, tweet_id, source_id] triée
+du plus récent au plus ancien : `source_id` est l'auteur du tweet ou
+l'utilisateur qui l'a retweeté. La timeline de U contient les entrées dont
+la source est U ou un compte suivi par U ; elle est mise à jour à la
+publication d'un tweet, à un (dés)abonnement et à un (dé)retweet, si bien
+que /feed?view=followed lit directement les premiers identifiants au lieu
+de parcourir tous les tweets.
+
+Les timelines sont des données dérivées (data/timelines.json + journal) :
+elles se reconstruisent à partir des utilisateurs et des tweets avec
+
+    python -m utils.timelines
+"""
+import os
+
+from utils.data_manager import BASE_DIR, EPOCH, JsonStore, read_users, read_tweets, tweets_page, retweets_page
+from utils.pagination import PAGE_SIZE, merged_fetcher, paginate, sorted_fetcher
+
+TIMELINES_FILE = os.path.join(BASE_DIR, 'timelines.json')
+TIMELINES_LOG_FILE = TIMELINES_FILE + '.log'
+
+# Nombre d'entrées conservées par timeline (les plus anciennes sont oubliées)
+TIMELINE_MAX_LENGTH = 1000
+
+
+def _merge(entries, new_entries):
+    """Fusionne deux listes d'entrées : sans doublon, triée par date décroissante, tronquée."""
+    merged = {tuple(e) for e in entries}
+    merged.update(tuple(e) for e in new_entries)
+    merged = sorted(merged, key=lambda e: (e[0], e[1]), reverse=True)
+    return [list(e) for e in merged[:TIMELINE_MAX_LENGTH]]
+
+
+def _insert(entries, entry):
+    """
+    Insère `entry` à sa place dans `entries` (déjà triée, voir _merge), sans
+    doublon, en gardant au plus TIMELINE_MAX_LENGTH entrées ; retourne False
+    si elle n'a pas été ajoutée (déjà présente ou trop ancienne).
+    """
+    key = (entry[0], entry[1])
+    low, high = 0, len(entries)
+    while low < high:
+        middle = (low + high) // 2
+        if (entries[middle][0], entries[middle][1]) > key:
+            low = middle + 1
+        else:
+            high = middle
+    position = low
+    while position < len(entries) and (entries[position][0], entries[position][1]) == key:
+        if entries[position] == entry:
+            return False
+        position += 1
+    if low >= TIMELINE_MAX_LENGTH:
+        return False
+    entries.insert(low, list(entry))
+    del entries[TIMELINE_MAX_LENGTH:]
+    return True
+
+
+def _timeline(store, user_id):
+    timeline = store.indexes['user_id'].get(user_id)
+    if timeline is None:
+        timeline = {'user_id': user_id, 'entries': []}
+        store.add(timeline)
+    return timeline
+
+
+def _apply_timeline_op(store, op):
+    """
+    Applique une opération du journal des timelines (idempotente) :
+    - push   : ajoute `entries` aux timelines de `user_ids` ;
+    - remove : retire de ces timelines les entrées de `source_id`
+               (seulement celles de `tweet_id` s'il est donné).
+    """
+    kind = op['op']
+    for user_id in op['user_ids']:
+        timeline = _timeline(store, user_id)
+        if kind == 'push':
+            # Insertion en place (pas de fusion complète) : un tweet d'un auteur très suivi
+            # touche des milliers de timelines, sous tweets_lock et à chaque relecture du journal
+            for entry in op['entries']:
+                _insert(timeline['entries'], entry)
+        elif kind == 'remove':
+            timeline['entries'] = [e for e in timeline['entries']
+                                   if not (e[2] == op['source_id']
+                                           and op.get('tweet_id') in (None, e[1]))]
+        else:
+            raise ValueError(f"Opération de journal inconnue : {kind}")
+        # La liste modifiée en place garde son identité : on oublie ses entrées visibles
+        _visible.pop(user_id, None)
+
+
+# Entrées visibles (sans doublon) par utilisateur, recalculées quand la liste change
+_visible = {}
+
+def _make_timelines_store(path):
+    """Store des timelines sur `path`, journal `path`.log (aussi utilisé par les tests)."""
+    return JsonStore(path, indexes={
+        'user_id': lambda t: t.get('user_id'),
+    }, log_path=path + '.log', apply_op=_apply_timeline_op)
+
+
+_timelines_store = _make_timelines_store(TIMELINES_FILE)
+
+
+def _source_entries(tweets):
+    """Entrées produites par chaque source : ses tweets et ses retweets."""
+    by_source = {}
+    for tweet in tweets:
+        created_at = tweet.get('created_at') or EPOCH
+        by_source.setdefault(tweet['user_id'], []).append([created_at, tweet['id'], tweet['user_id']])
+        for rt in tweet.get('retweets', []):
+            # Ancien format (liste d'IDs) : date du tweet, comme la migration retweet_objects (utils.migrations)
+            if isinstance(rt, dict):
+                by_source.setdefault(rt['user_id'], []).append(
+                    [rt.get('retweeted_at') or created_at, tweet['id'], rt['user_id']])
+            else:
+                by_source.setdefault(rt, []).append([created_at, tweet['id'], rt])
+    return by_source
+
+
+def rebuild(users=None, tweets=None):
+    """Recalcule toutes les timelines à partir des utilisateurs et des tweets."""
+    store = _timelines_store
+    with store.file_lock:
+        users = read_users() if users is None else users
+        tweets = read_tweets() if tweets is None else tweets
+        by_source = _source_entries(tweets)
+        timelines = []
+        for user in users:
+            entries = []
+            for source_id in {user['id'], *user.get('following', [])}:
+                entries.extend(by_source.get(source_id, []))
+            timelines.append({'user_id': user['id'], 'entries': _merge([], entries)})
+        store.write(timelines)
+    return len(timelines)
+
+
+def entry_key(entry):
+    """Clé de pagination d'une entrée : (date, tweet_id)."""
+    return (entry[0], entry[1])
+
+
+def _visible_timeline(user_id):
+    """(entrées, `fetch` des entrées visibles, identifiants visibles) de la timeline de user_id."""
+    if not os.path.exists(_timelines_store.path):
+        rebuild()
+    timeline = _timelines_store.get('user_id', user_id)
+    entries = timeline['entries'] if timeline else []
+    cached = _visible.get(user_id)
+    if cached is None or cached[0] is not entries:
+        # Un tweet peut arriver par plusieurs sources : on garde l'entrée la plus récente
+        seen = set()
+        visible = []
+        for entry in entries:
+            if entry[1] not in seen:
+                seen.add(entry[1])
+                visible.append(entry)
+        cached = (entries, sorted_fetcher(visible, entry_key), seen)
+        _visible[user_id] = cached
+    return cached
+
+
+def _timeline_fetcher(user_id):
+    return _visible_timeline(user_id)[1]
+
+
+def _source_fetcher(source_id):
+    """`fetch` des entrées d'une source lues dans les tweets : ses tweets et ses retweets."""
+    def tweets(before=None, after=None, limit=PAGE_SIZE):
+        return [[t.get('created_at') or EPOCH, t['id'], source_id]
+                for t in tweets_page(before=before, after=after, limit=limit, user_id=source_id)]
+
+    def retweets(before=None, after=None, limit=PAGE_SIZE):
+        return [[rt['retweeted_at'], rt['id'], source_id]
+                for rt in retweets_page(source_id, before=before, after=after, limit=limit)]
+
+    return merged_fetcher([tweets, retweets], entry_key)
+
+
+def _archive_fetcher(source_ids, oldest, skip):
+    """
+    `fetch` des entrées plus anciennes que `oldest` (la dernière d'une
+    timeline pleine), lues dans les tweets des sources : sans les tweets
+    `skip` déjà visibles dans la timeline, ni doublon dans une page.
+    """
+    sources = merged_fetcher([_source_fetcher(source_id) for source_id in sorted(source_ids)], entry_key)
+
+    def fetch(before=None, after=None, limit=PAGE_SIZE):
+        newer = after is not None
+        if newer and after >= oldest:
+            return []
+        if not newer and (before is None or before > oldest):
+            before = oldest
+        found, seen = [], set(skip)
+        while len(found) < limit:
+            batch = sources(before=before, after=after, limit=limit)
+            # Après un curseur `after` : du plus proche au plus éloigné, sans dépasser la timeline
+            ordered = [e for e in reversed(batch) if entry_key(e) < oldest] if newer else batch
+            for entry in ordered:
+                if entry[1] not in seen:
+                    seen.add(entry[1])
+                    found.append(entry)
+            if len(ordered) < limit:
+                break
+            if newer:
+                after = entry_key(batch[0])
+            else:
+                before = entry_key(batch[-1])
+        found = found[:limit]
+        return found[::-1] if newer else found
+
+    return fetch
+
+
+def _continued_fetcher(recent, older):
+    """`fetch` lisant `recent` (la timeline), puis `older` au-delà de sa dernière entrée."""
+    def fetch(before=None, after=None, limit=PAGE_SIZE):
+        items = recent(before=before, after=after, limit=limit)
+        if after is None:
+            return items if len(items) >= limit else items + older(before=before, limit=limit - len(items))
+        # `older` ne renvoie rien après un curseur pris dans la timeline
+        return (items + older(after=after, limit=limit))[-limit:]
+
+    return fetch
+
+
+def home_timeline(user_id, limit=None):
+    """Identifiants des tweets de la timeline de `user_id`, du plus récent au plus ancien."""
+    entries = _timeline_fetcher(user_id)(limit=limit or TIMELINE_MAX_LENGTH)
+    return [entry[1] for entry in entries]
+
+
+def home_timeline_page(user_id, before=None, after=None, limit=PAGE_SIZE, following=()):
+    """
+    Page (utils.pagination.Page) des entrées [date, tweet_id, source_id] de la
+    timeline. Une timeline pleine ne garde que TIMELINE_MAX_LENGTH entrées :
+    les pages suivantes sont lues dans les tweets de user_id et de `following`.
+    """
+    entries, fetch, seen = _visible_timeline(user_id)
+    if len(entries) >= TIMELINE_MAX_LENGTH:
+        archive = _archive_fetcher({user_id, *following}, entry_key(entries[-1]), seen)
+        fetch = _continued_fetcher(fetch, archive)
+    return paginate(fetch, entry_key, before, after, limit)
+
+
+def push_tweet(tweet, follower_ids):
+    """Distribue un nouveau tweet à son auteur et à ses abonnés."""
+    entry = [tweet.get('created_at') or EPOCH, tweet['id'], tweet['user_id']]
+    _timelines_store.append({"op": "push", "user_ids": [tweet['user_id'], *follower_ids],
+                             "entries": [entry]})
+
+
+def push_retweet(user_id, follower_ids, tweet_id, retweeted_at):
+    """Distribue un retweet à son auteur (le retweeteur) et à ses abonnés."""
+    _timelines_store.append({"op": "push", "user_ids": [user_id, *follower_ids],
+                             "entries": [[retweeted_at, tweet_id, user_id]]})
+
+
+def remove_retweet(user_id, follower_ids, tweet_id):
+    """Retire un retweet annulé des timelines où il avait été distribué."""
+    _timelines_store.append({"op": "remove", "user_ids": [user_id, *follower_ids],
+                             "source_id": user_id, "tweet_id": tweet_id})
+
+
+def follow(follower_id, followed_id):
+    """
+    Ajoute à la timeline de follower_id les tweets et retweets de followed_id,
+    lus dans les tweets (comme rebuild) : la timeline de followed_id est
+    tronquée et mêlée aux comptes qu'il suit, ses propres entrées anciennes
+    n'y sont plus forcément.
+    """
+    entries = _merge([], _source_fetcher(followed_id)(limit=TIMELINE_MAX_LENGTH))
+    _timelines_store.append({"op": "push", "user_ids": [follower_id], "entries": entries})
+
+
+def unfollow(follower_id, followed_id):
+    """Retire de la timeline de follower_id les entrées venant de followed_id."""
+    _timelines_store.append({"op": "remove", "user_ids": [follower_id], "source_id": followed_id})
+
+
+if __name__ == '__main__':
+    count = rebuild()
+    print(f"{count} timelines reconstruites dans {TIMELINES_FILE}")
@@ -0,0 +1,212 @@
+"""
+Recherche plein texte dans les tweets (index inversé incrémental).
+
+Le texte d'un tweet, de ses commentaires et de leurs réponses est découpé
+en termes (minuscules, sans accents, sans mots vides). L'index est
+persisté dans data/search_index.json (+ journal) sous forme de deux types
+d'enregistrements :
+
+- {"term": t, "postings": [[tweet_id, fréquence], ...]} triés par tweet_id ;
+- {"tweet_id": id, "at": date en secondes, "parts": [...]} où `parts`
+  liste les textes déjà indexés ("t" pour le tweet, "c3" pour le
+  commentaire 3, "c3r0" pour sa première réponse), ce qui rend les
+  opérations du journal idempotentes.
+
+feed(), comment_tweet() et reply_comment() ajoutent leurs textes au fil de
+l'eau ; le démarrage ne relit que l'index, sans re-découper le corpus.
+Les tweets trouvés contiennent tous les termes de la requête et sont
+classés par pertinence (tf-idf) et fraîcheur, ou par date seule. L'index
+est une donnée dérivée qui se reconstruit avec
+
+    python -m utils.tweet_search
+"""
+import bisect
+import math
+import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+
+from utils.data_manager import BASE_DIR, EPOCH, JsonStore, read_tweets
+from utils.pagination import PAGE_SIZE, paginate, sorted_fetcher
+
+SEARCH_INDEX_FILE = os.path.join(BASE_DIR, 'search_index.json')
+SEARCH_INDEX_LOG_FILE = SEARCH_INDEX_FILE + '.log'
+
+# Un jour de fraîcheur pèse autant qu'un facteur e de pertinence
+RECENCY_SCALE = 86400
+
+# Mots vides ignorés (français seulement : « thé » devient « the » sans accents)
+STOP_WORDS = {
+    'au', 'aux', 'ce', 'ces', 'de', 'des', 'du', 'en', 'est', 'et', 'il', 'je', 'la', 'le', 'les',
+    'ma', 'mes', 'on', 'ou', 'par', 'pas', 'pour', 'que', 'qui', 'sa', 'se', 'ses', 'sur', 'ta',
+    'nous', 'te', 'tu', 'un', 'une', 'vous',
+}
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Termes d'un texte : minuscules, accents retirés, sans mots vides ni lettres isolées."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return [word for word in _WORD.findall(text)
+            if (len(word) > 1 or word.isdigit()) and word not in STOP_WORDS]
+
+
+def _term_counts(text):
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def _timestamp(value):
+    """Date ISO (avec ou sans 'Z') en secondes ; les dates naïves sont en UTC."""
+    try:
+        moment = datetime.fromisoformat((value or EPOCH).replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _apply_search_op(store, op):
+    """
+    Applique une opération du journal de l'index (idempotente) :
+    - index : ajoute les termes `terms` de la partie `part` du tweet.
+    """
+    if op['op'] != 'index':
+        raise ValueError(f"Opération de journal inconnue : {op['op']}")
+    doc = store.indexes['tweet_id'].get(op['tweet_id'])
+    if doc is None:
+        doc = {'tweet_id': op['tweet_id'], 'at': op['at'], 'parts': []}
+        store.add(doc)
+    if op['part'] in doc['parts']:
+        return
+    doc['parts'].append(op['part'])
+    for term, count in op['terms'].items():
+        record = store.indexes['term'].get(term)
+        if record is None:
+            record = {'term': term, 'postings': []}
+            store.add(record)
+        postings = record['postings']
+        position = bisect.bisect_left(postings, [op['tweet_id']])
+        if position < len(postings) and postings[position][0] == op['tweet_id']:
+            postings[position][1] += count
+        else:
+            postings.insert(position, [op['tweet_id'], count])
+
+
+def _make_search_store(path):
+    """Store de l'index sur `path`, journal `path`.log (aussi utilisé par les tests)."""
+    return JsonStore(path, indexes={
+        'term': lambda r: r.get('term'),
+        'tweet_id': lambda r: r.get('tweet_id'),
+    }, log_path=path + '.log', apply_op=_apply_search_op)
+
+
+_search_store = _make_search_store(SEARCH_INDEX_FILE)
+
+
+def _tweet_parts(tweet):
+    """Textes indexés d'un tweet : (partie, texte)."""
+    yield 't', tweet.get('content', '')
+    for i, comment in enumerate(tweet.get('comments', [])):
+        yield f'c{i}', comment.get('content', '')
+        for j, reply in enumerate(comment.get('replies', [])):
+            yield f'c{i}r{j}', reply.get('content', '')
+
+
+def rebuild(tweets=None):
+    """Recalcule tout l'index à partir des tweets."""
+    store = _search_store
+    with store.file_lock:
+        tweets = read_tweets() if tweets is None else tweets
+        postings = {}
+        docs = []
+        for tweet in tweets:
+            parts = []
+            counts = {}
+            for part, text in _tweet_parts(tweet):
+                parts.append(part)
+                for term, count in _term_counts(text).items():
+                    counts[term] = counts.get(term, 0) + count
+            docs.append({'tweet_id': tweet['id'], 'at': _timestamp(tweet.get('created_at')), 'parts': parts})
+            for term, count in counts.items():
+                postings.setdefault(term, []).append([tweet['id'], count])
+        records = [{'term': term, 'postings': sorted(entries)} for term, entries in postings.items()]
+        store.write(records + docs)
+    return len(docs)
+
+
+def _index(tweet, part, text):
+    _search_store.append({"op": "index", "tweet_id": tweet['id'], "part": part,
+                          "at": _timestamp(tweet.get('created_at')), "terms": _term_counts(text)})
+
+
+def index_tweet(tweet):
+    """Indexe le texte d'un nouveau tweet."""
+    _index(tweet, 't', tweet.get('content', ''))
+
+
+def index_comment(tweet, index):
+    """Indexe le commentaire `index` du tweet."""
+    _index(tweet, f'c{index}', tweet['comments'][index].get('content', ''))
+
+
+def index_reply(tweet, index, reply_index):
+    """Indexe la réponse `reply_index` au commentaire `index` du tweet."""
+    reply = tweet['comments'][index]['replies'][reply_index]
+    _index(tweet, f'c{index}r{reply_index}', reply.get('content', ''))
+
+
+def hit_key(hit):
+    """Clé de pagination d'un résultat (rang, tweet_id)."""
+    return hit
+
+
+def _hits(query, sort):
+    """Résultats (rang, tweet_id) du meilleur au moins bon ; le rang est une chaîne triable."""
+    if not os.path.exists(_search_store.path):
+        rebuild()
+    terms = set(tokenize(query))
+    records = [_search_store.get('term', term) for term in terms]
+    if not terms or None in records:
+        return []
+
+    # Intersection en partant de la liste la plus courte (dichotomie dans les autres)
+    records.sort(key=lambda r: len(r['postings']))
+    total = len(_search_store.indexes['tweet_id'])
+    matches = {}
+    for tweet_id, _ in records[0]['postings']:
+        relevance = 0.0
+        for record in records:
+            postings = record['postings']
+            position = bisect.bisect_left(postings, [tweet_id])
+            if position == len(postings) or postings[position][0] != tweet_id:
+                break
+            relevance += (1 + math.log(postings[position][1])) * math.log(1 + total / len(postings))
+        else:
+            matches[tweet_id] = relevance
+
+    docs = _search_store.get_many('tweet_id', matches)
+    hits = []
+    for tweet_id, relevance in matches.items():
+        at = docs[tweet_id]['at'] if tweet_id in docs else 0.0
+        # Rang indépendant de l'heure de la requête : les curseurs restent valides
+        rank = at if sort == 'recent' else math.log1p(relevance) + at / RECENCY_SCALE
+        hits.append((f"{max(rank, 0.0):020.6f}", tweet_id))
+    hits.sort(reverse=True)
+    return hits
+
+
+def search_page(query, before=None, after=None, limit=PAGE_SIZE, sort='relevance'):
+    """Page (utils.pagination.Page) de résultats (rang, tweet_id) pour `query`."""
+    return paginate(sorted_fetcher(_hits(query, sort), hit_key), hit_key, before, after, limit)
+
+
+if __name__ == '__main__':
+    count = rebuild()
+    print(f"{count} tweets indexés dans {SEARCH_INDEX_FILE}")
@@ -0,0 +1,245 @@
+"""
+Stockage des images envoyées (tweets et photos de profil).
+
+Les fichiers sont nommés par leur contenu (sha256 + extension) : une image
+déjà présente n'est pas réécrite. L'envoi se fait en deux temps :
+
+- ingest() lit chaque fichier par blocs vers un fichier temporaire en
+  calculant son empreinte, refuse ceux qui dépassent MAX_UPLOAD_SIZE et
+  traite les images d'un même tweet en parallèle ;
+- attach() (sous le verrou des références, après la création du tweet ou la
+  mise à jour du profil) déplace chaque fichier à son nom définitif, ou le
+  jette s'il existe déjà, et enregistre qui y fait référence.
+
+Les références ({"path": "tweet_images/<nom>", "refs": ["tweet:12", ...]})
+sont dans data/upload_refs.json (+ journal) ; release() retire une référence
+et supprime le fichier devenu inutilisé. Elles se recalculent à partir des
+utilisateurs et des tweets avec
+
+    python -m utils.uploads
+
+Un fichier nommé par son contenu ne change jamais : /uploads le sert avec
+son empreinte pour ETag et un cache `immutable`. Les octets peuvent être
+délégués au proxy frontal (variable d'environnement TIGERS_UPLOADS_SERVE) :
+- flask      : envoyés par le worker (défaut) ;
+- x-sendfile : en-tête X-Sendfile (Apache mod_xsendfile, lighttpd) ;
+- x-accel    : en-tête X-Accel-Redirect vers X_ACCEL_PREFIX (nginx, avec
+               une location `internal` qui pointe sur backend/uploads/).
+"""
+import hashlib
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from utils import metrics
+from utils.data_manager import BASE_DIR, FILE_MODE, JsonStore, read_users, read_tweets
+
+UPLOAD_ROOT = os.path.join(os.getcwd(), "backend", "uploads")
+PROFILE_PICS = "profile_pics"
+TWEET_IMAGES = "tweet_images"
+
+UPLOAD_REFS_FILE = os.path.join(BASE_DIR, 'upload_refs.json')
+UPLOAD_REFS_LOG_FILE = UPLOAD_REFS_FILE + '.log'
+
+# Taille maximale d'une image, et d'une requête entière (MAX_CONTENT_LENGTH de Flask)
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_REQUEST_SIZE = 5 * MAX_UPLOAD_SIZE
+CHUNK_SIZE = 64 * 1024
+# Images d'un même envoi écrites en parallèle
+UPLOAD_WORKERS = 4
+
+SERVE_MODE = os.environ.get('TIGERS_UPLOADS_SERVE', 'flask')
+if SERVE_MODE not in ('flask', 'x-sendfile', 'x-accel'):
+    raise ValueError(f"TIGERS_UPLOADS_SERVE inconnu : {SERVE_MODE}")
+X_ACCEL_PREFIX = '/_uploads/'
+# Durée de cache des fichiers nommés par contenu (un an, le maximum usuel)
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_CONTENT_NAME = re.compile(r'^[0-9a-f]{64}\.[a-z0-9]+$')
+
+
+class UploadTooLarge(ValueError):
+    """Image plus grande que MAX_UPLOAD_SIZE."""
+
+
+class Upload(NamedTuple):
+    name: str       # nom définitif : sha256 + extension
+    tmp_path: str   # fichier temporaire en attente de attach()
+
+
+def _apply_refs_op(store, op):
+    """
+    Applique une opération du journal des références (idempotente) :
+    - ref   : ajoute `referrer` aux références de `path` ;
+    - unref : l'en retire.
+    """
+    record = store.indexes['path'].get(op['path'])
+    if record is None:
+        record = {'path': op['path'], 'refs': []}
+        store.add(record)
+    if op['op'] == 'ref':
+        if op['referrer'] not in record['refs']:
+            record['refs'].append(op['referrer'])
+    elif op['op'] == 'unref':
+        if op['referrer'] in record['refs']:
+            record['refs'].remove(op['referrer'])
+    else:
+        raise ValueError(f"Opération de journal inconnue : {op['op']}")
+    return record
+
+
+def _make_refs_store(path):
+    """Store des références sur `path`, journal `path`.log (aussi utilisé par les tests)."""
+    return JsonStore(path, indexes={
+        'path': lambda r: r.get('path'),
+    }, log_path=path + '.log', apply_op=_apply_refs_op,
+        retain=lambda records: [r for r in records if r['refs']])
+
+
+_refs_store = _make_refs_store(UPLOAD_REFS_FILE)
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix='uploads')
+
+
+def is_content_name(name):
+    return bool(_CONTENT_NAME.match(name))
+
+
+def content_etag(name):
+    """ETag fort d'un fichier nommé par contenu : son empreinte sha256 (None pour les anciens noms)."""
+    return name.split('.', 1)[0] if is_content_name(name) else None
+
+
+def url_path(url, kind):
+    """Chemin "kind/nom" d'une URL /uploads/kind/nom nommée par contenu, sinon None."""
+    prefix = f"/uploads/{kind}/"
+    if not url or not url.startswith(prefix):
+        return None
+    name = url[len(prefix):]
+    return f"{kind}/{name}" if is_content_name(name) else None
+
+
+def _spool(file, kind):
+    """Copie `file` (FileStorage) par blocs dans un fichier temporaire ; retourne l'Upload."""
+    directory = os.path.join(UPLOAD_ROOT, kind)
+    extension = file.filename.rsplit('.', 1)[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(prefix='.upload.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise UploadTooLarge(file.filename)
+                digest.update(chunk)
+                out.write(chunk)
+        # mkstemp crée le fichier en 0600 : le proxy frontal (x-sendfile, x-accel) doit pouvoir le lire
+        os.chmod(tmp_path, FILE_MODE)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return Upload(f"{digest.hexdigest()}.{extension}", tmp_path)
+
+
+@metrics.phase('uploads')
+def ingest(files, kind):
+    """
+    Écrit les fichiers (FileStorage) dans le dossier `kind`, en parallèle,
+    sans les publier. Lève UploadTooLarge si l'un d'eux est trop gros
+    (aucun fichier n'est alors conservé).
+    """
+    os.makedirs(os.path.join(UPLOAD_ROOT, kind), exist_ok=True)
+    futures = [_executor.submit(_spool, file, kind) for file in files]
+    uploads, error = [], None
+    for future in futures:
+        try:
+            uploads.append(future.result())
+        except Exception as exc:
+            error = error or exc
+    if error is not None:
+        discard(uploads)
+        raise error
+    return uploads
+
+
+def discard(uploads):
+    """Supprime les fichiers temporaires d'envois abandonnés."""
+    for upload in uploads:
+        try:
+            os.remove(upload.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+@metrics.phase('uploads')
+def attach(uploads, kind, referrer):
+    """
+    Publie les fichiers sous leur nom de contenu (une seule copie par image)
+    et les référence pour `referrer` ("tweet:12", "user:3") ; retourne les noms.
+    """
+    names = []
+    with _refs_store.file_lock:
+        for upload in uploads:
+            path = os.path.join(UPLOAD_ROOT, kind, upload.name)
+            if os.path.exists(path):
+                os.remove(upload.tmp_path)
+            else:
+                os.replace(upload.tmp_path, path)
+            _refs_store.append({"op": "ref", "path": f"{kind}/{upload.name}", "referrer": referrer})
+            names.append(upload.name)
+    return names
+
+
+def release(path, referrer):
+    """Retire la référence de `referrer` à `path` ("kind/nom") ; supprime le fichier s'il n'est plus utilisé."""
+    with _refs_store.file_lock:
+        record = _refs_store.append({"op": "unref", "path": path, "referrer": referrer})
+        if not record['refs']:
+            try:
+                os.remove(os.path.join(UPLOAD_ROOT, path))
+            except FileNotFoundError:
+                pass
+
+
+def ref_count(path):
+    record = _refs_store.get('path', path)
+    return len(record['refs']) if record else 0
+
+
+def rebuild(users=None, tweets=None):
+    """
+    Recalcule les références à partir des photos de profil et des images des
+    tweets, et redonne aux images référencées les droits FILE_MODE.
+    """
+    with _refs_store.file_lock:
+        users = read_users() if users is None else users
+        tweets = read_tweets() if tweets is None else tweets
+        refs = {}
+        for user in users:
+            path = url_path(user.get('profile_pic_url'), PROFILE_PICS)
+            if path:
+                refs.setdefault(path, []).append(f"user:{user['id']}")
+        for tweet in tweets:
+            for url in tweet.get('image_urls') or []:
+                path = url_path(url, TWEET_IMAGES)
+                if path and f"tweet:{tweet['id']}" not in refs.get(path, []):
+                    refs.setdefault(path, []).append(f"tweet:{tweet['id']}")
+        _refs_store.write([{'path': path, 'refs': referrers} for path, referrers in refs.items()])
+        for path in refs:
+            # Images publiées en 0600 avant que _spool ne règle leurs droits
+            try:
+                os.chmod(os.path.join(UPLOAD_ROOT, path), FILE_MODE)
+            except FileNotFoundError:
+                pass
+    return len(refs)
+
+
+if __name__ == '__main__':
+    count = rebuild()
+    print(f"{count} images référencées dans {UPLOAD_REFS_FILE}")
@@ -0,0 +1,180 @@
+"""
+Index des noms d'utilisateur pour /search_live et /search.
+
+- tableau trié des noms en minuscules : correspondance exacte et préfixe
+  par recherche dichotomique ;
+- postings de trigrammes : sous-chaînes (intersection des postings) et
+  fautes de frappe (similarité de trigrammes, comme pg_trgm).
+
+Les résultats sont classés exact > préfixe > sous-chaîne > approché, puis
+par nombre d'abonnés. L'index est tenu à jour par les routes qui écrivent
+les utilisateurs (inscription, édition du profil, abonnements) via
+updating() ; toute autre écriture, y compris d'un autre processus, est
+détectée par users_version() et provoque une reconstruction complète.
+"""
+import bisect
+import heapq
+import math
+import threading
+from contextlib import contextmanager
+
+from utils.data_manager import read_users, users_version
+
+# Similarité minimale pour une correspondance approchée
+FUZZY_THRESHOLD = 0.3
+# Nombre de requêtes dont le classement est gardé en cache (vidé à chaque modification)
+CACHE_SIZE = 1024
+
+
+def trigrams(text):
+    """Trigrammes d'un nom, bordé comme dans pg_trgm ("  nom ")."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class UsernameIndex:
+    def __init__(self, load_users=read_users, version=users_version):
+        self.load_users = load_users
+        self.version = version
+        self.lock = threading.RLock()
+        self.synced = None
+        self.names = []        # [(nom en minuscules, id)] trié
+        self.lower = {}        # id -> nom en minuscules
+        self.postings = {}     # trigramme -> {id}
+        self.gram_counts = {}  # id -> nombre de trigrammes du nom
+        self.followers = {}    # id -> nombre d'abonnés
+        self.cache = {}
+
+    # ------------------- MISE À JOUR -------------------
+
+    def rebuild(self):
+        with self.lock:
+            users = self.load_users()
+            self.names = []
+            self.lower = {}
+            self.postings = {}
+            self.gram_counts = {}
+            self.followers = {}
+            self.cache = {}
+            for user in users:
+                self._insert(user['id'], user['username'])
+                self.followers[user['id']] = len(user.get('followers', []))
+            self.names.sort()
+            self.synced = self.version()
+
+    def _ensure_fresh(self):
+        if self.synced is None or self.version() != self.synced:
+            self.rebuild()
+
+    def _insert(self, user_id, username, keep_sorted=False):
+        name = username.lower()
+        self.lower[user_id] = name
+        if keep_sorted:
+            bisect.insort(self.names, (name, user_id))
+        else:
+            self.names.append((name, user_id))
+        grams = trigrams(name)
+        self.gram_counts[user_id] = len(grams)
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(user_id)
+
+    def _delete(self, user_id):
+        name = self.lower.pop(user_id, None)
+        if name is None:
+            return
+        position = bisect.bisect_left(self.names, (name, user_id))
+        if position < len(self.names) and self.names[position] == (name, user_id):
+            del self.names[position]
+        for gram in trigrams(name):
+            self.postings.get(gram, set()).discard(user_id)
+        self.gram_counts.pop(user_id, None)
+
+    @contextmanager
+    def updating(self):
+        """
+        À utiliser sous users_lock() autour d'une écriture des utilisateurs
+        suivie des appels add() / rename() / set_followers() correspondants :
+        l'index est resynchronisé avant, puis marqué à jour après.
+        """
+        with self.lock:
+            self._ensure_fresh()
+            yield self
+            self.cache = {}
+            self.synced = self.version()
+
+    def add(self, user):
+        with self.lock:
+            self._insert(user['id'], user['username'], keep_sorted=True)
+            self.followers[user['id']] = len(user.get('followers', []))
+
+    def rename(self, user_id, username):
+        with self.lock:
+            self._delete(user_id)
+            self._insert(user_id, username, keep_sorted=True)
+
+    def set_followers(self, user_id, count):
+        with self.lock:
+            self.followers[user_id] = count
+
+    # ------------------- RECHERCHE -------------------
+
+    def _top(self, ids, limit):
+        return heapq.nsmallest(limit, ids, key=lambda uid: (-self.followers.get(uid, 0), self.lower[uid]))
+
+    def search(self, query, limit=10, exclude_id=None):
+        """Identifiants des utilisateurs correspondant à `query`, les mieux classés d'abord."""
+        query = query.lower().strip()
+        if not query:
+            return []
+        with self.lock:
+            self._ensure_fresh()
+            key = (query, limit, exclude_id)
+            if key not in self.cache:
+                if len(self.cache) >= CACHE_SIZE:
+                    self.cache = {}
+                self.cache[key] = self._search(query, limit, exclude_id)
+            return list(self.cache[key])
+
+    def _search(self, query, limit, exclude_id):
+        excluded = {exclude_id}
+        results = []
+
+        def take(ids):
+            ids = [uid for uid in ids if uid not in excluded]
+            results.extend(self._top(ids, limit - len(results)))
+            excluded.update(results)
+
+        # 1. Exact puis préfixe : plage contiguë du tableau trié
+        start = bisect.bisect_left(self.names, (query,))
+        end = bisect.bisect_left(self.names, (query + '\uffff',))
+        exact = [uid for name, uid in self.names[start:end] if name == query]
+        take(exact)
+        if len(results) < limit:
+            take(uid for _, uid in self.names[start:end])
+        if len(query) < 3 or len(results) >= limit:
+            return results
+
+        # 2. Sous-chaîne : noms contenant tous les trigrammes de la requête
+        grams = sorted((self.postings.get(query[i:i + 3], set()) for i in range(len(query) - 2)), key=len)
+        candidates = set.intersection(*grams) - excluded if grams[0] else set()
+        take(uid for uid in candidates if query in self.lower[uid])
+        if len(results) >= limit:
+            return results
+
+        # 3. Approché : similarité de trigrammes (fautes de frappe)
+        # Atteindre le seuil demande au moins `needed` trigrammes communs : un
+        # candidat figure donc dans l'un des len - needed + 1 postings les plus rares.
+        postings = sorted((self.postings.get(gram, set()) for gram in trigrams(query)), key=len)
+        needed = max(1, math.ceil(FUZZY_THRESHOLD * len(postings)))
+        candidates = set().union(*postings[:len(postings) - needed + 1]) - excluded
+        scored = []
+        for uid in candidates:
+            count = sum(1 for posting in postings if uid in posting)
+            similarity = count / (len(postings) + self.gram_counts[uid] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((-similarity, -self.followers.get(uid, 0), self.lower[uid], uid))
+        results.extend(uid for *_, uid in heapq.nsmallest(limit - len(results), scored))
+        return results
+
+
+username_index = UsernameIndex()
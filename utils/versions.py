@@ -0,0 +1,91 @@
+"""
+Compteurs de version par ressource, pour les ETag des routes JSON.
+
+Les routes qui modifient une ressource incrémentent son compteur après
+l'écriture ; /comments, /api/current_user et /search_live construisent leur
+ETag à partir des compteurs lus avant de calculer la réponse, et répondent
+304 sans lire les tweets ni les utilisateurs quand le client est à jour.
+
+Clés utilisées :
+- comments:<tweet_id> : commentaire, réponse ou like de commentaire ;
+- user:<id>           : abonnement de l'utilisateur, édition de son profil ;
+- profiles            : édition d'un profil (noms et photos affichés partout) ;
+- users               : inscription, abonnement ou édition de profil
+                        (résultats et classement de la recherche).
+
+Les compteurs sont partagés entre processus (data/versions.json + journal).
+Chaque ETag porte aussi une « époque » tirée au hasard à la création du
+fichier : après une écriture des données hors de l'application (sync.sh
+push, scripts), tous les ETag sont invalidés avec
+
+    python -m utils.versions
+"""
+import os
+import secrets
+
+from utils.data_manager import BASE_DIR, JsonStore
+
+VERSIONS_FILE = os.path.join(BASE_DIR, 'versions.json')
+VERSIONS_LOG_FILE = VERSIONS_FILE + '.log'
+
+EPOCH_KEY = '_epoch'
+
+
+def _apply_version_op(store, op):
+    """
+    Applique une opération du journal des versions (idempotente) :
+    - set : fixe la valeur de `key` (calculée sous le verrou par bump()).
+    """
+    if op['op'] != 'set':
+        raise ValueError(f"Opération de journal inconnue : {op['op']}")
+    record = store.indexes['key'].get(op['key'])
+    if record is None:
+        store.add({'key': op['key'], 'value': op['value']})
+    else:
+        record['value'] = op['value']
+
+
+def _make_versions_store(path):
+    """Store des compteurs sur `path`, journal `path`.log (aussi utilisé par les tests)."""
+    return JsonStore(path, indexes={
+        'key': lambda r: r.get('key'),
+    }, log_path=path + '.log', apply_op=_apply_version_op)
+
+
+_versions_store = _make_versions_store(VERSIONS_FILE)
+
+
+def _epoch():
+    record = _versions_store.get('key', EPOCH_KEY)
+    if record is None:
+        with _versions_store.file_lock:
+            # Un autre processus a pu créer le fichier entre-temps
+            if _versions_store.get('key', EPOCH_KEY) is None:
+                reset()
+            record = _versions_store.get('key', EPOCH_KEY)
+    return record['value']
+
+
+def bump(*keys):
+    """Incrémente les compteurs `keys` (à appeler après l'écriture des données)."""
+    with _versions_store.file_lock:
+        for key in keys:
+            record = _versions_store.get('key', key)
+            _versions_store.append({"op": "set", "key": key, "value": (record['value'] if record else 0) + 1})
+
+
+def etag(*keys):
+    """ETag (fort) des ressources `keys` : époque et valeur de chaque compteur."""
+    found = _versions_store.get_many('key', keys)
+    return '-'.join([_epoch()] + [str(found[key]['value']) if key in found else '0' for key in keys])
+
+
+def reset():
+    """Nouvelle époque, compteurs remis à zéro : invalide tous les ETag déjà donnés."""
+    with _versions_store.file_lock:
+        _versions_store.write([{'key': EPOCH_KEY, 'value': secrets.token_hex(4)}])
+
+
+if __name__ == '__main__':
+    reset()
+    print(f"Versions réinitialisées dans {VERSIONS_FILE}")